@@ -0,0 +1,9 @@
+# benchmarks/__init__.py
+"""
+Bancs d'essai hors ligne (aucune connexion à Discord, base SQLite temporaire).
+
+    python -m benchmarks.message_handlers --output rapport.json
+
+Chaque banc écrit un rapport JSON stable (clés triées, valeurs arrondies) sur la
+sortie standard ou dans `--output`, pour comparer deux versions du code.
+"""
@@ -0,0 +1,74 @@
+# benchmarks/common.py
+"""Outils partagés des bancs d'essai : base temporaire, percentiles, rapport JSON."""
+import json
+import os
+import platform
+import sqlite3
+import sys
+import tempfile
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+
+import aiosqlite
+
+from utils.database import DatabaseManager
+
+# Version du format des rapports : à incrémenter si la structure change.
+REPORT_SCHEMA = 1
+
+
+@asynccontextmanager
+async def temp_database(**options):
+    """DatabaseManager connecté et migré sur un fichier temporaire, supprimé à la sortie."""
+    with tempfile.TemporaryDirectory(prefix="bench-") as directory:
+        db = DatabaseManager(db_path=os.path.join(directory, "bench.db"), **options)
+        await db.connect()
+        try:
+            await db.initialize_tables()
+            yield db
+        finally:
+            await db.close()
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Percentile exact (rang le plus proche) d'une liste déjà triée."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * q // 100))  # plafond de n * q / 100
+    return sorted_values[int(rank) - 1]
+
+
+def summarize(latencies_ms: List[float]) -> Dict[str, float]:
+    values = sorted(latencies_ms)
+    return {
+        "count": len(values),
+        "mean": round(sum(values) / len(values), 4) if values else 0.0,
+        "p50": round(percentile(values, 50), 4),
+        "p90": round(percentile(values, 90), 4),
+        "p99": round(percentile(values, 99), 4),
+        "max": round(values[-1], 4) if values else 0.0,
+    }
+
+
+def environment() -> Dict[str, str]:
+    return {
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "aiosqlite": getattr(aiosqlite, "__version__", "?"),
+        "platform": platform.platform(terse=True),
+    }
+
+
+def build_report(benchmark: str, params: Dict, results: Dict) -> Dict:
+    return {"schema": REPORT_SCHEMA, "benchmark": benchmark, "environment": environment(),
+            "params": params, "results": results}
+
+
+def write_report(report: Dict, output: Optional[str]):
+    text = json.dumps(report, indent=2, sort_keys=True, ensure_ascii=False)
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"Rapport écrit dans {output}", file=sys.stderr)
+    else:
+        print(text)
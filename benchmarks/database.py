@@ -0,0 +1,249 @@
+# benchmarks/database.py
+"""
+Micro-benchmark de `DatabaseManager` : opérations/s et distribution des latences des
+requêtes les plus fréquentes, sur des bases temporaires de différentes tailles
+(1k, 100k, 1M lignes de `user_data` réparties sur plusieurs serveurs), pour plusieurs
+configurations de la couche de stockage (journal, écritures groupées, index).
+
+    python -m benchmarks.database --sizes 1k 100k --output rapport.json
+
+Chaque taille est générée une seule fois (sqlite3 synchrone, graine fixe) puis copiée
+pour chaque configuration : toutes les configurations mesurent exactement les mêmes données.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from typing import Callable, Dict, List
+
+from benchmarks.common import build_report, summarize, write_report
+from utils.database import DatabaseManager, READ_POOL_SIZE
+
+# --- Configurations comparées ---
+# journal : mode de journal SQLite ; batch_writes : écritures groupées (group commit) ;
+# read_pool : connexions de lecture ; indexes : False = index secondaires supprimés.
+CONFIGURATIONS: Dict[str, Dict] = {
+    "production": {"journal": "WAL", "batch_writes": True, "read_pool": READ_POOL_SIZE, "indexes": True},
+    "sans-lots": {"journal": "WAL", "batch_writes": False, "read_pool": READ_POOL_SIZE, "indexes": True},
+    "rollback": {"journal": "DELETE", "batch_writes": False, "read_pool": 0, "indexes": True},
+    "sans-index": {"journal": "WAL", "batch_writes": True, "read_pool": READ_POOL_SIZE, "indexes": False},
+}
+# Index ajoutés par les migrations (les index des contraintes UNIQUE restent en place).
+SECONDARY_INDEXES = ("idx_infractions_history", "idx_marriages_user2", "idx_user_data_rank")
+
+OPERATIONS = ("get_user_data", "update_user_xp", "get_leaderboard", "get_partners", "add_warning",
+              "get_infractions_page", "get_guild_settings")
+SIZES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+FIRST_GUILD_ID = 1_000
+FIRST_USER_ID = 100_000
+
+
+def parse_size(label: str) -> int:
+    return SIZES.get(label.lower()) or int(label)
+
+
+# ==============================================================================
+# --- GÉNÉRATION DES DONNÉES ---
+# ==============================================================================
+class Dataset:
+    """Base modèle d'une taille donnée et les clés existantes à interroger."""
+
+    def __init__(self, path: str, rows: int, members_per_guild: int):
+        self.path = path
+        self.rows = rows
+        self.guilds = max(1, rows // members_per_guild)
+        self.members_per_guild = -(-rows // self.guilds)
+
+    def random_member(self, rng: random.Random):
+        guild_index = rng.randrange(self.guilds)
+        # Le dernier serveur peut être incomplet.
+        count = min(self.members_per_guild, self.rows - guild_index * self.members_per_guild)
+        return FIRST_GUILD_ID + guild_index, FIRST_USER_ID + rng.randrange(max(1, count))
+
+    def random_guild(self, rng: random.Random) -> int:
+        return FIRST_GUILD_ID + rng.randrange(self.guilds)
+
+
+async def _migrate(path: str):
+    db = DatabaseManager(db_path=path, read_pool_size=0)
+    await db.connect()
+    try:
+        await db.initialize_tables()
+    finally:
+        await db.close()
+
+
+def _seed(dataset: Dataset, seed: int):
+    """Remplit user_data, marriages, infractions et guild_settings (une transaction, sans fsync)."""
+    rng = random.Random(seed)
+    connection = sqlite3.connect(dataset.path)
+    try:
+        connection.execute("PRAGMA synchronous = OFF")
+        members = [(FIRST_GUILD_ID + i // dataset.members_per_guild, FIRST_USER_ID + i % dataset.members_per_guild)
+                   for i in range(dataset.rows)]
+        connection.executemany(
+            "INSERT INTO user_data (guild_id, user_id, xp, level) VALUES (?, ?, ?, ?)",
+            ((g, u, rng.randrange(1000), rng.randint(1, 60)) for g, u in members)
+        )
+        # Un membre sur dix marié (à son voisin), un avertissement pour un membre sur dix.
+        connection.executemany(
+            "INSERT OR IGNORE INTO marriages (guild_id, user1_id, user2_id, marriage_timestamp) VALUES (?, ?, ?, ?)",
+            ((g, u, u + 1, "2024-01-01T00:00:00+00:00") for g, u in members[::10])
+        )
+        connection.executemany(
+            "INSERT INTO infractions (guild_id, user_id, moderator_id, type, reason, timestamp) VALUES (?, ?, ?, ?, ?, ?)",
+            ((g, u, 1, "avertissement", "Avertissement de test", 1_704_067_200) for g, u in members[5::10])
+        )
+        connection.executemany(
+            "INSERT INTO guild_settings (guild_id, leveling_config, automod_config) VALUES (?, ?, ?)",
+            ((FIRST_GUILD_ID + g, json.dumps({"enabled": True, "role_rewards": {"5": 1, "10": 2}}),
+              json.dumps({"enabled": True, "banned_words": ["interdit"]})) for g in range(dataset.guilds))
+        )
+        connection.commit()
+        connection.execute("ANALYZE")
+    finally:
+        connection.close()
+
+
+async def build_dataset(directory: str, rows: int, members_per_guild: int, seed: int) -> Dataset:
+    dataset = Dataset(os.path.join(directory, f"modele-{rows}.db"), rows, members_per_guild)
+    await _migrate(dataset.path)
+    await asyncio.to_thread(_seed, dataset, seed)
+    return dataset
+
+
+async def open_configured(dataset: Dataset, directory: str, name: str) -> DatabaseManager:
+    """Copie la base modèle et l'ouvre avec la configuration `name`."""
+    config = CONFIGURATIONS[name]
+    path = os.path.join(directory, f"{name}-{dataset.rows}.db")
+    shutil.copyfile(dataset.path, path)
+    if not config["indexes"]:
+        connection = sqlite3.connect(path)
+        for index in SECONDARY_INDEXES:
+            connection.execute(f"DROP INDEX IF EXISTS {index}")
+        connection.close()
+    db = DatabaseManager(db_path=path, batch_writes=config["batch_writes"], read_pool_size=config["read_pool"])
+    await db.connect()
+    if config["journal"] != "WAL":
+        # Profil d'avant WAL : journal de rollback et fsync complet à chaque COMMIT.
+        await db._connection.execute(f"PRAGMA journal_mode = {config['journal']};")
+        await db._connection.execute("PRAGMA synchronous = FULL;")
+    return db
+
+
+# ==============================================================================
+# --- OPÉRATIONS MESURÉES ---
+# ==============================================================================
+def operations(db: DatabaseManager, dataset: Dataset) -> Dict[str, Callable]:
+    """Nom -> fabrique (rng -> coroutine) ; les clés existantes sont tirées du générateur à graine fixe."""
+
+    def get_user_data(rng):
+        return db.get_user_data(*dataset.random_member(rng))
+
+    def update_user_xp(rng):
+        guild_id, user_id = dataset.random_member(rng)
+        return db.update_user_xp(guild_id, user_id, rng.randrange(1000), rng.randint(1, 60))
+
+    def get_leaderboard(rng):
+        return db.get_leaderboard(dataset.random_guild(rng), 10)
+
+    def get_partners(rng):
+        return db.get_partners(*dataset.random_member(rng))
+
+    def add_warning(rng):
+        guild_id, user_id = dataset.random_member(rng)
+        return db.add_warning(guild_id, user_id, 1, "Avertissement de test")
+
+    def get_infractions_page(rng):
+        return db.get_infractions_page(*dataset.random_member(rng), limit=5)
+
+    def get_guild_settings(rng):
+        return db.get_guild_settings(dataset.random_guild(rng))
+
+    return {op.__name__: op for op in (get_user_data, update_user_xp, get_leaderboard, get_partners,
+                                       add_warning, get_infractions_page, get_guild_settings)}
+
+
+async def measure(factory: Callable, count: int, concurrency: int, seed: int) -> Dict:
+    """Exécute `count` opérations avec `concurrency` tâches simultanées."""
+    rng = random.Random(seed)
+    remaining = count
+    latencies: List[float] = []
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            await factory(rng)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {"ops_per_sec": round(count / elapsed, 1), "latency_ms": summarize(latencies)}
+
+
+async def run(args) -> Dict:
+    results: Dict[str, Dict] = {}
+    with tempfile.TemporaryDirectory(prefix="bench-db-") as directory:
+        for label in args.sizes:
+            rows = parse_size(label)
+            print(f"[BENCH] Génération de {rows} lignes...", file=sys.stderr)
+            started = time.perf_counter()
+            dataset = await build_dataset(directory, rows, args.members_per_guild, args.seed)
+            size_result = {"rows": rows, "guilds": dataset.guilds,
+                           "seed_seconds": round(time.perf_counter() - started, 2), "configurations": {}}
+            for name in args.configurations:
+                print(f"[BENCH]   {rows} lignes, configuration '{name}'...", file=sys.stderr)
+                db = await open_configured(dataset, directory, name)
+                try:
+                    ops = operations(db, dataset)
+                    config_result = {}
+                    for op_name in args.operations:
+                        await measure(ops[op_name], args.warmup, 1, args.seed)
+                        config_result[op_name] = {
+                            f"c{concurrency}": await measure(ops[op_name], args.ops, concurrency, args.seed)
+                            for concurrency in args.concurrency
+                        }
+                    config_result["settings_cache"] = db.settings_cache_stats()
+                    size_result["configurations"][name] = config_result
+                finally:
+                    await db.close()
+            results[label] = size_result
+    params = {key: getattr(args, key) for key in
+              ("sizes", "configurations", "operations", "ops", "warmup", "concurrency", "members_per_guild", "seed")}
+    return build_report("database", params, results)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-benchmark de DatabaseManager.")
+    parser.add_argument("--sizes", nargs="+", default=list(SIZES), help="Tailles de user_data (1k, 100k, 1m ou un nombre).")
+    parser.add_argument("--configurations", nargs="+", choices=list(CONFIGURATIONS), default=list(CONFIGURATIONS))
+    parser.add_argument("--operations", nargs="+", choices=OPERATIONS, default=list(OPERATIONS))
+    parser.add_argument("--ops", type=int, default=1000, help="Opérations mesurées par (opération, concurrence).")
+    parser.add_argument("--warmup", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16],
+                        help="Niveaux de concurrence (les écritures groupées ne servent qu'en concurrence).")
+    parser.add_argument("--members-per-guild", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Fichier du rapport JSON (sortie standard par défaut).")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    with redirect_stdout(sys.stderr):
+        report = asyncio.run(run(args))
+    write_report(report, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# benchmarks/fakes.py
+"""
+Faux objets Discord pour les bancs d'essai : juste les attributs et méthodes lus par
+le pipeline de messages et les cogs (aucun appel réseau).
+"""
+import asyncio
+from typing import Dict, List, Optional
+
+from utils.activity_counter import ActivityCounter
+from utils.level_up_queue import LevelUpQueue
+from utils.message_pipeline import MessagePipeline
+from utils.settings_registry import SettingsRegistry
+from utils.xp_buffer import XpBuffer
+
+
+class FakePermissions:
+    def __init__(self, manage_guild: bool = False):
+        self.manage_guild = manage_guild
+        self.administrator = manage_guild
+
+
+class FakeRole:
+    def __init__(self, role_id: int, position: int):
+        self.id = role_id
+        self.position = position
+        self.managed = False
+
+    def __lt__(self, other: "FakeRole") -> bool:
+        return self.position < other.position
+
+
+class FakeGuild:
+    def __init__(self, guild_id: int):
+        self.id = guild_id
+        self.name = f"serveur-{guild_id}"
+        self.members: Dict[int, "FakeMember"] = {}
+        self.me = FakeMember(0, self)
+        self.me.top_role = FakeRole(0, 1000)
+
+    def get_member(self, user_id: int) -> Optional["FakeMember"]:
+        return self.members.get(user_id)
+
+    def get_channel(self, channel_id: int):
+        # Aucun salon d'annonce : la file de level-up ne fait pas d'appel REST.
+        return None
+
+    def get_role(self, role_id: int):
+        return None
+
+
+class FakeMember:
+    bot = False
+
+    def __init__(self, user_id: int, guild: FakeGuild, staff: bool = False):
+        self.id = user_id
+        self.guild = guild
+        self.guild_permissions = FakePermissions(manage_guild=staff)
+        self.roles: List[FakeRole] = []
+        self.mention = f"<@{user_id}>"
+        self.display_name = f"membre-{user_id}"
+
+    async def add_roles(self, *roles, reason: Optional[str] = None):
+        self.roles.extend(roles)
+
+
+class FakeChannel:
+    def __init__(self, channel_id: int, guild: FakeGuild):
+        self.id = channel_id
+        self.guild = guild
+
+
+class FakeMessage:
+    def __init__(self, message_id: int, content: str, author: FakeMember, channel: FakeChannel):
+        self.id = message_id
+        self.content = content
+        self.author = author
+        self.channel = channel
+        self.guild = channel.guild
+        self.mentions: List[FakeMember] = []
+        self.role_mentions: List[FakeRole] = []
+        self.deleted = False
+
+    async def delete(self):
+        self.deleted = True
+
+
+class FakeBot:
+    """Les services de `MyBot` utilisés par les étapes du pipeline, branchés sur `db`."""
+
+    def __init__(self, db):
+        self.db = db
+        self.user = FakeMember(0, FakeGuild(0))
+        self.settings = SettingsRegistry(db)
+        self.xp_buffer = XpBuffer(db)
+        self.activity_counter = ActivityCounter(db)
+        self.level_up_queue = LevelUpQueue()
+        self.message_pipeline = MessagePipeline(self)
+        self.latency = 0.0
+        self._never_ready = asyncio.Event()
+
+    async def wait_until_ready(self):
+        # Jamais prêt : les boucles de fond des cogs (tasks.loop) ne démarrent pas pendant la mesure.
+        await self._never_ready.wait()
+
+    # Composants dynamiques (menus de rôles) : aucune interaction pendant la mesure.
+    def add_dynamic_items(self, *items):
+        pass
+
+    def remove_dynamic_items(self, *items):
+        pass
@@ -0,0 +1,184 @@
+# benchmarks/message_handlers.py
+"""
+Débit des étapes du pipeline de messages (XP, compteur d'activité, automod).
+
+Un flux de messages synthétiques (graine fixe) est injecté dans `MessagePipeline.process`
+avec les vrais cogs, de faux objets Discord et une base SQLite temporaire. Pour chaque
+scénario : messages/s (écriture finale des tampons comprise), latence p50/p99 par
+message et nombre de requêtes SQL par message (compteurs de `db.stats`).
+
+    python -m benchmarks.message_handlers --messages 20000 --output rapport.json
+"""
+import argparse
+import asyncio
+import inspect
+import random
+import sys
+import time
+from contextlib import redirect_stdout
+from typing import Dict, List
+
+from benchmarks.common import build_report, summarize, temp_database, write_report
+from benchmarks.fakes import FakeBot, FakeChannel, FakeGuild, FakeMember, FakeMessage
+
+from cogs.automod_cog import AutoModCog
+from cogs.community import Community
+from cogs.leveling import LevelingCog
+
+# Étapes enregistrées par scénario ("pipeline" = configuration réelle du bot).
+SCENARIOS: Dict[str, tuple] = {
+    "xp": ("xp",),
+    "activity": ("activity",),
+    "automod": ("automod",),
+    "pipeline": ("automod", "xp", "activity"),
+}
+COGS = {"xp": LevelingCog, "activity": Community, "automod": AutoModCog}
+
+BANNED_WORDS = ["interdit", "grossier", "insulte"]
+VOCABULARY = (
+    "salut bonjour merci oui non peut-être demain ce soir quelqu'un partie jeu serveur "
+    "musique film anime question réponse idée super génial bizarre vraiment toujours jamais"
+).split()
+
+
+class MessageStream:
+    """Génère toujours la même suite de messages pour une graine donnée."""
+
+    def __init__(self, seed: int, guilds: int, users: int, channels: int, link_rate: float, banned_rate: float):
+        self.rng = random.Random(seed)
+        self.guilds = [FakeGuild(1000 + g) for g in range(guilds)]
+        self.channels = {guild.id: [FakeChannel(guild.id * 100 + c, guild) for c in range(channels)] for guild in self.guilds}
+        self.users_per_guild = max(1, users // guilds)
+        self.link_rate = link_rate
+        self.banned_rate = banned_rate
+        self._next_id = 1
+
+    def _member(self, guild: FakeGuild) -> FakeMember:
+        user_id = 10_000 + self.rng.randrange(self.users_per_guild)
+        member = guild.members.get(user_id)
+        if member is None:
+            member = guild.members[user_id] = FakeMember(user_id, guild)
+        return member
+
+    def next(self) -> FakeMessage:
+        guild = self.rng.choice(self.guilds)
+        words = self.rng.choices(VOCABULARY, k=self.rng.randint(2, 20))
+        if self.rng.random() < self.link_rate:
+            words.append("https://example.com/page")
+        if self.rng.random() < self.banned_rate:
+            words.insert(self.rng.randrange(len(words) + 1), self.rng.choice(BANNED_WORDS))
+        self._next_id += 1
+        return FakeMessage(self._next_id, " ".join(words), self._member(guild), self.rng.choice(self.channels[guild.id]))
+
+
+async def _configure(bot: FakeBot, guilds: List[FakeGuild]):
+    """Leveling activé (paramètres en base) et automod complet (registre partagé) sur chaque serveur."""
+    await bot.settings.load()
+    for guild in guilds:
+        await bot.db.update_guild_setting(guild.id, "leveling_config", {"enabled": True})
+        bot.settings.section(guild.id, "automod_config").update({
+            "enabled": True, "spam_filter_enabled": True, "vulgarity_filter_enabled": True,
+            "banned_words": BANNED_WORDS, "ignored_channels": [],
+        })
+
+
+async def _maybe_await(result):
+    if inspect.isawaitable(result):
+        await result
+
+
+async def run_scenario(name: str, args) -> Dict:
+    async with temp_database(batch_writes=True) as db:
+        bot = FakeBot(db)
+        stream = MessageStream(args.seed, args.guilds, args.users, args.channels, args.link_rate, args.banned_rate)
+        await _configure(bot, stream.guilds)
+        cogs = []
+        for stage in SCENARIOS[name]:
+            cog = COGS[stage](bot, db) if stage == "automod" else COGS[stage](bot)
+            await cog.cog_load()
+            cogs.append(cog)
+        bot.level_up_queue.start()
+        pipeline = bot.message_pipeline
+
+        async def handle(message: FakeMessage, latencies: List[float]):
+            started = time.perf_counter()
+            await pipeline.process(message)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+        async def feed(count: int, latencies: List[float]):
+            for sent in range(0, count, args.concurrency):
+                batch = [stream.next() for _ in range(min(args.concurrency, count - sent))]
+                await asyncio.gather(*(handle(message, latencies) for message in batch))
+
+        try:
+            await feed(args.warmup, [])
+            await bot.xp_buffer.flush()
+            await bot.activity_counter.flush()
+            queries_before = db.stats.total_queries
+            stopped_before = dict(pipeline.stopped)
+
+            latencies: List[float] = []
+            started = time.perf_counter()
+            await feed(args.messages, latencies)
+            flush_started = time.perf_counter()
+            # Les gains d'XP et compteurs d'activité en tampon font partie du coût du traitement.
+            await bot.xp_buffer.flush()
+            await bot.activity_counter.flush()
+            finished = time.perf_counter()
+
+            queries = db.stats.total_queries - queries_before
+            stopped = {reason: count - stopped_before.get(reason, 0) for reason, count in pipeline.stopped.items()}
+            return {
+                "stages": list(SCENARIOS[name]),
+                "messages": len(latencies),
+                "msgs_per_sec": round(len(latencies) / (finished - started), 1),
+                "latency_ms": summarize(latencies),
+                "final_flush_ms": round((finished - flush_started) * 1000, 3),
+                "db_queries": queries,
+                "db_queries_per_message": round(queries / len(latencies), 4),
+                "stopped": {reason: count for reason, count in sorted(stopped.items()) if count},
+                "stage_errors": {stage["name"]: stage["errors"] for stage in pipeline.stats()},
+                "level_ups_submitted": bot.level_up_queue.submitted,
+            }
+        finally:
+            for cog in cogs:
+                await _maybe_await(cog.cog_unload())
+            await bot.level_up_queue.close()
+
+
+async def run(args) -> Dict:
+    results = {}
+    for name in args.scenarios:
+        print(f"[BENCH] Scénario '{name}'...", file=sys.stderr)
+        results[name] = await run_scenario(name, args)
+    params = {key: getattr(args, key) for key in
+              ("messages", "warmup", "guilds", "users", "channels", "concurrency", "link_rate", "banned_rate", "seed")}
+    return build_report("message_handlers", params, results)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Banc d'essai des étapes du pipeline de messages.")
+    parser.add_argument("--messages", type=int, default=20000, help="Messages mesurés par scénario.")
+    parser.add_argument("--warmup", type=int, default=1000, help="Messages non mesurés avant la mesure.")
+    parser.add_argument("--guilds", type=int, default=10)
+    parser.add_argument("--users", type=int, default=5000, help="Membres actifs (répartis entre les serveurs).")
+    parser.add_argument("--channels", type=int, default=5, help="Salons par serveur.")
+    parser.add_argument("--concurrency", type=int, default=1, help="Messages traités simultanément.")
+    parser.add_argument("--link-rate", type=float, default=0.05, help="Part des messages contenant un lien.")
+    parser.add_argument("--banned-rate", type=float, default=0.01, help="Part des messages contenant un mot interdit.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--output", help="Fichier du rapport JSON (sortie standard par défaut).")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    # Les messages du bot (connexion, migrations...) ne doivent pas se mêler au JSON.
+    with redirect_stdout(sys.stderr):
+        report = asyncio.run(run(args))
+    write_report(report, args.output)
+
+
+if __name__ == "__main__":
+    main()
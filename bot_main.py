@@ -8,6 +8,16 @@ import sys
 import json
 import asyncio
 from utils.database import DatabaseManager
+from utils.json_import import import_json_stores
+from utils.json_store import close_all_stores
+from utils.settings_registry import SettingsRegistry
+from utils.xp_buffer import XpBuffer
+from utils.activity_counter import ActivityCounter
+from utils.level_up_queue import LevelUpQueue
+from utils.role_sync import RoleSyncManager
+from utils.message_pipeline import MessagePipeline
+from utils.loop_monitor import LoopMonitor
+from utils.command_metrics import InstrumentedCommandTree
 
 # --- Chargement des Utilitaires ---
 # J'ai retiré les imports redondants ou incorrects pour éviter les erreurs.
@@ -49,11 +59,28 @@ class MyBot(commands.Bot):
         super().__init__(
             command_prefix="!",
             intents=intents,
-            help_command=None
+            help_command=None,
+            # Latence de chaque commande slash (voir /debug-commandes).
+            tree_cls=InstrumentedCommandTree
         )
         
         db_path = os.path.join('data', 'main_database.db')
-        self.db = DatabaseManager(db_path=db_path)
+        # Les écritures (XP, avertissements...) sont validées par lots pour limiter les fsync.
+        self.db = DatabaseManager(db_path=db_path, batch_writes=True)
+        # Paramètres par serveur partagés par tous les cogs (chargés dans setup_hook).
+        self.settings = SettingsRegistry(self.db)
+        # Gains d'XP cumulés en mémoire et écrits par lots (voir cogs/leveling.py).
+        self.xp_buffer = XpBuffer(self.db)
+        # Compteurs de messages en mémoire, écrits par lots dans la table `activity`.
+        self.activity_counter = ActivityCounter(self.db)
+        # Annonces et rôles de level-up exécutés hors du traitement des messages.
+        self.level_up_queue = LevelUpQueue()
+        # Synchronisations des rôles récompenses en cours (reprises après redémarrage).
+        self.role_sync = RoleSyncManager(self, self.db)
+        # Traitement unique des messages : les cogs y enregistrent leurs étapes (automod, XP, activité).
+        self.message_pipeline = MessagePipeline(self)
+        # Retard de la boucle d'évènements et pile du code bloquant (voir /debug-boucle).
+        self.loop_monitor = LoopMonitor()
 
     # ==============================================================================
     # --- CORRECTIONS D'INDENTATION APPLIQUÉES ICI ---
@@ -61,6 +88,7 @@ class MyBot(commands.Bot):
 
     async def setup_hook(self):
         print("--- Démarrage et Configuration du Bot ---")
+        self.loop_monitor.start()
         
         print("Initialisation de la base de données...")
         try:
@@ -68,6 +96,13 @@ class MyBot(commands.Bot):
             # Assurez-vous que votre classe DatabaseManager a une méthode initialize_tables()
             if hasattr(self.db, 'initialize_tables'):
                 await self.db.initialize_tables()
+            # Import unique des anciens fichiers data/*.json (soldes, boutique, activité...)
+            await import_json_stores(self.db)
+            await self.settings.load()
+            self.xp_buffer.start()
+            await self.activity_counter.load()
+            self.activity_counter.start()
+            self.level_up_queue.start()
             print("  [+] Base de données connectée et tables initialisées.")
         except Exception as e:
             print(f"  [!] ERREUR CRITIQUE lors de l'initialisation de la DB.", file=sys.stderr)
@@ -103,17 +138,32 @@ class MyBot(commands.Bot):
 
         print("--- SYNCHRONISATION TERMINÉE ---")
     
+    async def on_message(self, message: discord.Message):
+        """Une seule résolution de config et un seul passage par message, puis les commandes préfixées."""
+        await self.message_pipeline.process(message)
+        await self.process_commands(message)
+
     async def on_ready(self):
         """Événement appelé quand le bot est prêt et connecté."""
         print('-----------------------------------------')
         print(f'Connecté en tant que {self.user.name} ({self.user.id})')
         print(f'Prêt à fonctionner sur {len(self.guilds)} serveur(s).')
         print('-----------------------------------------')
+        # Le cache des membres est prêt : on reprend les synchronisations interrompues.
+        await self.role_sync.resume_all()
         
     async def close(self):
         """Surcharge de la méthode close pour un nettoyage propre."""
         print("\nArrêt du bot détecté. Nettoyage en cours...")
+        # Écrit les fichiers JSON encore en attente de debounce
+        await close_all_stores()
+        self.loop_monitor.stop()
+        await self.level_up_queue.close()
+        self.role_sync.cancel_all()
         if hasattr(self, 'db') and self.db._connection:
+             await self.settings.close()
+             await self.xp_buffer.close()
+             await self.activity_counter.close()
              await self.db.close()
              print("Connexion à la base de données fermée.")
         await super().close()
@@ -6,6 +6,7 @@ from typing import Optional
 
 # --- Dépendances ---
 from utils.database import db
+from utils import level_curve
 
 # --- Classe Cog ---
 class AdminEcoCog(commands.Cog, name="Administration Économie"):
@@ -37,25 +38,16 @@ class AdminEcoCog(commands.Cog, name="Administration Économie"):
             return
 
         try:
-            # Récupérer les données actuelles de l'utilisateur
-            user_data = await self.db.get_user_data(interaction.guild.id, membre.id)
-            current_xp = user_data.get("xp", 0)
-            new_xp = current_xp + montant
-            
-            # Récupérer le Cog de leveling pour recalculer le niveau
-            leveling_cog = self.bot.get_cog("Niveaux & XP") # Assurez-vous que le nom est correct
-            if not leveling_cog:
-                await interaction.response.send_message("❌ Erreur : Le module de leveling n'est pas chargé.", ephemeral=True)
-                return
-                
-            new_level = leveling_cog.calculate_level(new_xp)
-
-            # Mettre à jour la base de données
-            await self.db.update_user_xp(interaction.guild.id, membre.id, new_xp, new_level)
+            # Écrit les gains encore en tampon pour ne pas les perdre (ni écraser cette modification)
+            async with self.bot.xp_buffer.external_write(interaction.guild.id, membre.id):
+                # Ajout atomique : le niveau est recalculé en base par la courbe (utils/level_curve.py)
+                user_data = await self.db.add_xp(interaction.guild.id, membre.id, montant)
+            new_level, new_xp = user_data["level"], user_data["xp"]
+            total_xp = level_curve.to_total(new_level, new_xp)
             
             await interaction.response.send_message(
                 f"✅ **{montant}** ✨ XP ont été ajoutés à {membre.mention}.\n"
-                f"Nouveau total : `{new_xp}` XP (Niveau `{new_level}`).",
+                f"Nouveau total : `{total_xp}` XP (Niveau `{new_level}`, `{new_xp}` XP dans le niveau).",
                 ephemeral=True
             )
 
@@ -87,13 +79,8 @@ class AdminEcoCog(commands.Cog, name="Administration Économie"):
             return
 
         try:
-            # Récupérer les données actuelles
-            user_data = await self.db.get_user_data(interaction.guild.id, membre.id)
-            current_balance = user_data.get("balance", 0)
-            new_balance = current_balance + montant
-            
-            # Mettre à jour la base de données
-            await self.db.update_user_balance(interaction.guild.id, membre.id, new_balance)
+            # Mise à jour atomique du solde (table user_balances)
+            new_balance = await self.db.add_balance(interaction.guild.id, membre.id, montant)
 
             # Récupérer la config pour l'affichage de la monnaie
             # Vous pouvez créer une méthode db.get_economy_config() ou la charger depuis settings.json
@@ -3,51 +3,26 @@ import discord
 from discord import app_commands
 from discord.ext import commands, tasks
 from typing import Optional, List, Dict, Literal
-import json
-import os
 import re
 import time
 import datetime
 import traceback
-from collections import defaultdict
-
-# --- Fonctions Helper (inchangées) ---
-def load_data(filepath):
-    try:
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        with open(filepath, 'r', encoding='utf-8') as f: return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        with open(filepath, 'w', encoding='utf-8') as f: json.dump({}, f)
-        return {}
-    except Exception as e:
-        print(f"Erreur chargement {filepath}: {e}"); traceback.print_exc(); return {}
-
-def save_data(filepath, data):
-    try:
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        temp_filepath = filepath + ".tmp"
-        with open(temp_filepath, 'w', encoding='utf-8') as f: json.dump(data, f, indent=4)
-        os.replace(temp_filepath, filepath)
-    except Exception as e:
-        print(f"Erreur critique sauvegarde {filepath}: {e}"); traceback.print_exc()
-
-# --- Constantes (inchangées) ---
-DATA_DIR = './data'
-SETTINGS_FILE = os.path.join(DATA_DIR, 'settings.json')
-SPAM_TIMEFRAME = 10
-SPAM_MESSAGE_COUNT = 5
+from utils.message_pipeline import MessageContext
 
 # --- Classe Cog ---
 class AutoModCog(commands.Cog, name="Auto-Modération"):
     def __init__(self, bot: commands.Bot, db_manager):
         self.bot = bot
         self.db = db_manager
-        self.settings = load_data(SETTINGS_FILE) 
-        self.spam_tracker = defaultdict(lambda: defaultdict(list))
         self.check_unbans_loop.start()
 
+    async def cog_load(self):
+        # Première étape du pipeline (aussi sur les messages modifiés) : peut stopper XP et activité.
+        self.bot.message_pipeline.register("automod", self.on_automod_message, priority=10, on_edit=True)
+
     def cog_unload(self):
         self.check_unbans_loop.cancel()
+        self.bot.message_pipeline.unregister("automod")
 
     @tasks.loop(minutes=5)
     async def check_unbans_loop(self):
@@ -87,9 +62,7 @@ class AutoModCog(commands.Cog, name="Auto-Modération"):
     # --- CORRECTION 1 : Implémentation de la fonction manquante ---
     def get_guild_automod_config(self, guild_id: int) -> dict:
         """Récupère la configuration de l'automod pour un serveur spécifique."""
-        guild_settings = self.settings.setdefault(str(guild_id), {})
-        automod_config = guild_settings.setdefault("automod_config", {})
-        return automod_config
+        return self.bot.settings.section(guild_id, "automod_config")
     # ==============================================================================
 
     # --- Commandes de Configuration ---
@@ -122,7 +95,7 @@ class AutoModCog(commands.Cog, name="Auto-Modération"):
             config["temp_ban_threshold"] = seuil_ban_temporaire
             config["temp_ban_duration_days"] = duree_ban_temporaire_jours
             config["perm_ban_threshold"] = seuil_ban_permanent
-            save_data(SETTINGS_FILE, self.settings)
+            self.bot.settings.mark_dirty(interaction.guild.id)
 
             embed = discord.Embed(title="⚙️ Sanctions AutoMod Mises à Jour", color=discord.Color.blue())
             embed.add_field(name="Timeout", value=f"{seuil_timeout} warns → {duree_timeout_minutes} min" if seuil_timeout > 0 else "Désactivé", inline=False)
@@ -142,16 +115,16 @@ class AutoModCog(commands.Cog, name="Auto-Modération"):
 
     # ... (vos autres commandes, listeners et fonctions de gestion restent inchangés) ...
     # =============================================
-    # ==          LISTENER ON_MESSAGE            ==
+    # ==       ÉTAPE DU PIPELINE DE MESSAGES     ==
     # =============================================
-    @commands.Cog.listener("on_message")
-    async def on_automod_message(self, message: discord.Message):
-        # ... (votre code inchangé)
+    # Étape "automod" du pipeline de messages (voir cog_load), aussi appelée pour les messages modifiés.
+    async def on_automod_message(self, ctx: MessageContext):
         pass
 
     @commands.Cog.listener("on_message_edit")
     async def on_automod_edit(self, before: discord.Message, after: discord.Message):
-        await self.on_automod_message(after)
+        if before.content != after.content:
+            await self.bot.message_pipeline.process(after, edited=True)
 
     # --- Fonctions de Gestion ---
     async def _handle_nsfw_content(self, message: discord.Message, config: dict):
@@ -1,53 +1,158 @@
 import discord
 from discord import app_commands  # <-- CHANGEMENT 1: Utilisation de app_commands
 from discord.ext import commands
+from utils.message_pipeline import MessageContext
+from utils.purge import purge_channel
 import random
 import asyncio
 import datetime
 import re
-import json
+from typing import Literal, Optional
 
-# --- Les fonctions de gestion de données ne changent pas ---
-def load_data(filename):
-    try:
-        with open(f'data/{filename}', 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return {}
+# --- Données ---
+# Activité (compteurs en mémoire écrits par lots), menus de rôles et infractions sont stockés dans SQLite (tables `activity`,
+# `role_menus`, `infractions`) ; les anciens fichiers JSON sont importés au démarrage.
+
+# --- Menus de rôles ---
+# Les boutons ne sont pas rattachés à une vue enregistrée par menu : un seul gestionnaire
+# dynamique reconnaît leur custom_id "rolemenu:<menu>:<rôle>" (mémoire et démarrage
+# indépendants du nombre de menus, rien à réenregistrer lors des reconnexions).
+async def toggle_menu_role(interaction: discord.Interaction, role_id: int):
+    user = interaction.user
+    role = interaction.guild.get_role(role_id)
+    if role is None:
+        return await interaction.response.send_message("Ce rôle n'existe plus.", ephemeral=True)
+    if interaction.guild.me.top_role <= role:
+        return await interaction.response.send_message("Je ne peux pas gérer ce rôle car il est plus élevé que le mien.", ephemeral=True)
+    if role in user.roles:
+        await user.remove_roles(role, reason="Role Menu")
+        await interaction.response.send_message(f"Le rôle **{role.name}** vous a été retiré.", ephemeral=True)
+    else:
+        await user.add_roles(role, reason="Role Menu")
+        await interaction.response.send_message(f"Vous avez reçu le rôle **{role.name}** !", ephemeral=True)
+
+
+class RoleMenuButton(discord.ui.DynamicItem[discord.ui.Button], template=r"rolemenu:(?P<menu_id>\d+):(?P<role_id>\d+)"):
+    def __init__(self, menu_id: int, role_id: int, label: Optional[str] = None, emoji: Optional[str] = None):
+        super().__init__(discord.ui.Button(
+            label=label, emoji=emoji, style=discord.ButtonStyle.secondary,
+            custom_id=f"rolemenu:{menu_id}:{role_id}"
+        ))
+        self.menu_id = menu_id
+        self.role_id = role_id
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match: re.Match):
+        return cls(int(match["menu_id"]), int(match["role_id"]))
+
+    async def callback(self, interaction: discord.Interaction):
+        await toggle_menu_role(interaction, self.role_id)
+
+
+class LegacyRoleMenuButton(discord.ui.DynamicItem[discord.ui.Button], template=r"(?P<role_id>\d{15,20})"):
+    """Boutons des menus créés avant les custom_id "rolemenu:..." (custom_id = id du rôle seul)."""
+
+    def __init__(self, role_id: int):
+        super().__init__(discord.ui.Button(style=discord.ButtonStyle.secondary, custom_id=str(role_id)))
+        self.role_id = role_id
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match: re.Match):
+        return cls(int(match["role_id"]))
+
+    async def callback(self, interaction: discord.Interaction):
+        await toggle_menu_role(interaction, self.role_id)
 
-def save_data(data, filename):
-    with open(f'data/{filename}', 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=4, ensure_ascii=False)
 
-# --- Les vues interactives ne changent pas ---
 class RoleMenuView(discord.ui.View):
-    def __init__(self, role_buttons_config):
+    """Vue utilisée uniquement pour l'envoi du menu ; les clics passent par RoleMenuButton."""
+
+    def __init__(self, menu_id: int, role_buttons_config):
         super().__init__(timeout=None)
         for config in role_buttons_config:
-            self.add_item(RoleButton(
-                role_id=config['role_id'],
-                label=config['label'],
-                emoji=config.get('emoji')
-            ))
-
-class RoleButton(discord.ui.Button):
-    def __init__(self, role_id: int, label: str, emoji: str = None):
-        super().__init__(label=label, style=discord.ButtonStyle.secondary, custom_id=str(role_id), emoji=emoji)
-        self.role_id = role_id
+            self.add_item(RoleMenuButton(menu_id, config['role_id'], label=config['label'], emoji=config.get('emoji')))
 
-    async def callback(self, interaction: discord.Interaction):
-        user = interaction.user
-        role = interaction.guild.get_role(self.role_id)
-        if role is None:
-            return await interaction.response.send_message("Ce rôle n'existe plus.", ephemeral=True)
-        if interaction.guild.me.top_role <= role:
-            return await interaction.response.send_message("Je ne peux pas gérer ce rôle car il est plus élevé que le mien.", ephemeral=True)
-        if role in user.roles:
-            await user.remove_roles(role, reason="Role Menu")
-            await interaction.response.send_message(f"Le rôle **{role.name}** vous a été retiré.", ephemeral=True)
+# --- Historique de modération ---
+# Pagination par curseur (timestamp, id) : chaque page est une seule lecture de l'index
+# (guild_id, user_id, timestamp), au même coût quelle que soit sa position dans l'historique.
+INFRACTIONS_PER_PAGE = 5
+
+
+class ModProfileView(discord.ui.View):
+    def __init__(self, db, guild: discord.Guild, member: discord.Member, moderator_id: int, total: int, rows):
+        super().__init__(timeout=180.0)
+        self.db = db
+        self.guild = guild
+        self.member = member
+        self.moderator_id = moderator_id
+        self.total = total
+        self.rows = rows
+        self.page = 1
+        self.message: Optional[discord.InteractionMessage] = None
+        self._update_buttons()
+
+    @property
+    def page_count(self) -> int:
+        return max(1, -(-self.total // INFRACTIONS_PER_PAGE))
+
+    def build_embed(self) -> discord.Embed:
+        embed = discord.Embed(title=f"Profil de modération de {self.member.display_name}", color=discord.Color.red())
+        embed.set_thumbnail(url=self.member.display_avatar.url)
+        description = ""
+        for infra in self.rows:
+            moderator = self.guild.get_member(infra['moderator_id'])
+            mod_name = moderator.name if moderator else "ID: " + str(infra['moderator_id'])
+            reason = infra['reason'] or "Aucune raison fournie"
+            if len(reason) > 300:
+                reason = reason[:297] + "..."
+            description += f"**Type :** {infra['type'].capitalize()}\n**Raison :** {reason}\n**Date :** <t:{infra['timestamp']}:f>\n**Modérateur :** {mod_name}\n---\n"
+        embed.description = description or "Aucune infraction sur cette page."
+        embed.set_footer(text=f"Page {self.page}/{self.page_count} — {self.total} infraction(s), de la plus récente à la plus ancienne")
+        return embed
+
+    def _update_buttons(self):
+        self.newer_button.disabled = self.page <= 1
+        self.older_button.disabled = self.page >= self.page_count
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.moderator_id:
+            await interaction.response.send_message("Seul l'auteur de la commande peut parcourir cet historique.", ephemeral=True)
+            return False
+        return True
+
+    async def on_timeout(self):
+        if self.message:
+            for item in self.children:
+                item.disabled = True
+            try:
+                await self.message.edit(view=self)
+            except discord.HTTPException:
+                pass  # Message supprimé ou jeton d'interaction expiré
+
+    async def _show(self, interaction: discord.Interaction, rows, page: int):
+        if rows:
+            self.rows, self.page = rows, page
         else:
-            await user.add_roles(role, reason="Role Menu")
-            await interaction.response.send_message(f"Vous avez reçu le rôle **{role.name}** !", ephemeral=True)
+            # Historique modifié entre-temps (infractions supprimées) : retour au début.
+            self.total = await self.db.count_infractions(self.guild.id, self.member.id)
+            self.rows = await self.db.get_infractions_page(self.guild.id, self.member.id, INFRACTIONS_PER_PAGE)
+            self.page = 1
+        self._update_buttons()
+        await interaction.response.edit_message(embed=self.build_embed(), view=self)
+
+    @discord.ui.button(label="◀ Plus récentes", style=discord.ButtonStyle.secondary)
+    async def newer_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        first = self.rows[0]
+        rows = await self.db.get_infractions_page(self.guild.id, self.member.id, INFRACTIONS_PER_PAGE,
+                                                  after=(first['timestamp'], first['id']))
+        await self._show(interaction, rows, self.page - 1)
+
+    @discord.ui.button(label="Plus anciennes ▶", style=discord.ButtonStyle.secondary)
+    async def older_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        last = self.rows[-1]
+        rows = await self.db.get_infractions_page(self.guild.id, self.member.id, INFRACTIONS_PER_PAGE,
+                                                  before=(last['timestamp'], last['id']))
+        await self._show(interaction, rows, self.page + 1)
 
 # --- Le Cog Principal de la Communauté ---
 # CHANGEMENT 2: Organisation des commandes pour discord.py
@@ -59,27 +164,22 @@ class Community(commands.GroupCog, name="commu"):
 
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self.db = bot.db
         super().__init__()
 
-    @commands.Cog.listener()
-    async def on_ready(self):
-        # Rechargement des vues persistantes
-        role_menus = load_data('role_menus.json')
-        for server_id, menus in role_menus.items():
-            for message_id, menu_data in menus.items():
-                view = RoleMenuView(role_buttons_config=menu_data['roles'])
-                self.bot.add_view(view, message_id=int(message_id))
-        print("-> Cog Communauté : Vues persistantes rechargées.")
-
-    @commands.Cog.listener()
-    async def on_message(self, message):
-        if message.author.bot or not message.guild: return
-        server_id, user_id = str(message.guild.id), str(message.author.id)
-        activity = load_data('activity.json')
-        if server_id not in activity: activity[server_id] = {}
-        if user_id not in activity[server_id]: activity[server_id][user_id] = {'messages': 0}
-        activity[server_id][user_id]['messages'] += 1
-        save_data(activity, 'activity.json')
+    async def cog_load(self):
+        self.bot.message_pipeline.register("activity", self.count_activity, priority=60)
+        # Une seule fois pour tous les menus de rôles (et non à chaque on_ready)
+        self.bot.add_dynamic_items(RoleMenuButton, LegacyRoleMenuButton)
+
+    async def cog_unload(self):
+        self.bot.message_pipeline.unregister("activity")
+        self.bot.remove_dynamic_items(RoleMenuButton, LegacyRoleMenuButton)
+
+    # --- Étape du pipeline de messages : compteur d'activité ---
+    async def count_activity(self, ctx: MessageContext):
+        # Compteur en mémoire, écrit en base par lots (voir utils/activity_counter.py)
+        self.bot.activity_counter.add(ctx.guild.id, ctx.author.id)
 
     # --- COMMANDES DE BASE ---
     @base.command(name="ping", description="Affiche la latence du bot.")
@@ -152,55 +252,59 @@ class Community(commands.GroupCog, name="commu"):
                 return await interaction.followup.send(f"Format invalide pour : `{part}`.")
         
         embed = discord.Embed(title=titre, description=description, color=discord.Color.blurple())
-        view = RoleMenuView(role_buttons_config=role_configs)
+        # L'id de l'interaction (snowflake unique) identifie le menu dans les custom_id de ses boutons.
+        view = RoleMenuView(interaction.id, role_configs)
         menu_message = await interaction.channel.send(embed=embed, view=view)
 
-        all_menus = load_data('role_menus.json')
-        server_id = str(interaction.guild.id)
-        if server_id not in all_menus: all_menus[server_id] = {}
-        all_menus[server_id][str(menu_message.id)] = {"roles": role_configs}
-        save_data(all_menus, 'role_menus.json')
+        await self.db.add_role_menu(interaction.guild.id, menu_message.id, role_configs)
         await interaction.followup.send("Menu de rôles créé !")
 
     # --- COMMANDES AVANCÉES ---
     @avance.command(name="purge", description="Supprime un nombre de messages avec des filtres.")
     @app_commands.checks.has_permissions(manage_messages=True)
-    async def purge(self, interaction: discord.Interaction, nombre: app_commands.Range[int, 1, 100], membre: discord.Member = None, contenant: str = None):
+    async def purge(self, interaction: discord.Interaction, nombre: app_commands.Range[int, 1, 50000], membre: discord.Member = None, contenant: str = None):
         await interaction.response.defer(ephemeral=True)
+        contenant = contenant.lower() if contenant else None
         def check(message):
             if membre and message.author != membre: return False
-            if contenant and contenant.lower() not in message.content.lower(): return False
+            if contenant and contenant not in message.content.lower(): return False
             return True
-        deleted = await interaction.channel.purge(limit=nombre, check=check)
-        await interaction.followup.send(f"✅ {len(deleted)} messages ont été supprimés.")
+
+        async def report(progress):
+            try:
+                await interaction.edit_original_response(content=progress.summary())
+            except discord.HTTPException:
+                pass  # Jeton d'interaction expiré (15 min) : la suppression continue
+
+        try:
+            result = await purge_channel(interaction.channel, nombre, check, on_progress=report)
+        except discord.Forbidden:
+            return await interaction.followup.send("Je n'ai pas la permission de supprimer des messages dans ce salon.", ephemeral=True)
+        await interaction.followup.send(f"✅ {result.deleted} messages ont été supprimés.", ephemeral=True)
 
     @avance.command(name="mod-profile", description="Affiche l'historique de modération d'un membre.")
     @app_commands.checks.has_permissions(kick_members=True)
     async def mod_profile(self, interaction: discord.Interaction, membre: discord.Member):
-        infractions = load_data('infractions.json').get(str(interaction.guild.id), {}).get(str(membre.id), [])
-        if not infractions:
+        rows = await self.db.get_infractions_page(interaction.guild.id, membre.id, INFRACTIONS_PER_PAGE)
+        if not rows:
             return await interaction.response.send_message(f"{membre.mention} n'a aucune infraction enregistrée.", ephemeral=True)
-        embed = discord.Embed(title=f"Profil de modération de {membre.display_name}", color=discord.Color.red())
-        embed.set_thumbnail(url=membre.display_avatar.url)
-        description = ""
-        for infra in infractions[-5:]:
-            moderator = interaction.guild.get_member(infra['moderator_id'])
-            mod_name = moderator.name if moderator else "ID: " + str(infra['moderator_id'])
-            description += f"**Type :** {infra['type'].capitalize()}\n**Raison :** {infra['reason']}\n**Date :** <t:{infra['timestamp']}:f>\n**Modérateur :** {mod_name}\n---\n"
-        embed.description = description
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+        total = await self.db.count_infractions(interaction.guild.id, membre.id)
+        view = ModProfileView(self.db, interaction.guild, membre, interaction.user.id, total, rows)
+        await interaction.response.send_message(embed=view.build_embed(), view=view, ephemeral=True)
+        view.message = await interaction.original_response()
 
     @avance.command(name="leaderboard", description="Affiche le classement d'activité du serveur (basé sur les messages).")
-    async def leaderboard(self, interaction: discord.Interaction):
-        activity = load_data('activity.json').get(str(interaction.guild.id), {})
-        if not activity:
+    @app_commands.describe(periode="Période prise en compte (par défaut : depuis toujours).")
+    async def leaderboard(self, interaction: discord.Interaction, periode: Literal["24h", "7j", "30j", "total"] = "total"):
+        top_users = await self.bot.activity_counter.leaderboard(interaction.guild.id, limit=10, window=periode)
+        if not top_users:
             return await interaction.response.send_message("Aucune donnée d'activité n'a été collectée.", ephemeral=True)
-        sorted_users = sorted(activity.items(), key=lambda item: item[1]['messages'], reverse=True)
-        embed = discord.Embed(title=f"🏆 Classement d'activité de {interaction.guild.name}", color=discord.Color.gold())
+        suffix = "" if periode == "total" else f" ({periode})"
+        embed = discord.Embed(title=f"🏆 Classement d'activité de {interaction.guild.name}{suffix}", color=discord.Color.gold())
         description = ""
         rank_emojis = ["🥇", "🥈", "🥉"]
-        for i, (user_id, data) in enumerate(sorted_users[:10]):
-            member = interaction.guild.get_member(int(user_id))
+        for i, data in enumerate(top_users):
+            member = interaction.guild.get_member(data['user_id'])
             if member:
                 rank = rank_emojis[i] if i < 3 else f"**#{i+1}**"
                 description += f"{rank} {member.mention} - `{data['messages']}` messages\n"
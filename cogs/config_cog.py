@@ -3,49 +3,22 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 from typing import Optional, Literal
-import json
-import os
-import traceback
 
 # --- Constantes et Helpers ---
-DATA_DIR = './data'
-SETTINGS_FILE = os.path.join(DATA_DIR, 'settings.json')
-
+# Les paramètres sont stockés dans le registre partagé `bot.settings` (table guild_config).
 # Helper pour les types de logs, si vous avez une commande de config pour ça
 LogType = Literal[
     "joins", "leaves", "message_edit", "message_delete",
     "mod_actions", "voice_state", "channel_updates", "role_updates", "member_update"
 ]
 
-def load_data(filepath):
-    try:
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        with open(filepath, 'r', encoding='utf-8') as f: return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        with open(filepath, 'w', encoding='utf-8') as f: json.dump({}, f)
-        return {}
-    except Exception as e:
-        print(f"Erreur chargement {filepath}: {e}"); traceback.print_exc(); return {}
-
-def save_data(filepath, data):
-    try:
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        temp_filepath = filepath + ".tmp"
-        with open(temp_filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=4)
-        os.replace(temp_filepath, filepath)
-    except Exception as e:
-        print(f"Erreur critique sauvegarde {filepath}: {e}"); traceback.print_exc()
-
 # ----- Classe Cog -----
 class ConfigCog(commands.Cog, name="Configuration"):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.settings = load_data(SETTINGS_FILE)
 
     def get_guild_settings(self, guild_id: int) -> dict:
-        guild_id_str = str(guild_id)
-        guild_data = self.settings.setdefault(guild_id_str, {})
+        guild_data = self.bot.settings.guild(guild_id)
         # S'assurer que toutes les sous-sections de config existent pour éviter les erreurs
         guild_data.setdefault("suggestions_config", {})
         guild_data.setdefault("ticket_config", {})
@@ -54,7 +27,6 @@ class ConfigCog(commands.Cog, name="Configuration"):
         guild_data.setdefault("automod_config", {})
         guild_data.setdefault("economy_config", {})
         guild_data.setdefault("shop_config", {})
-        guild_data.setdefault("leveling_config", {})
         return guild_data
     
     # =============================================
@@ -86,7 +58,7 @@ class ConfigCog(commands.Cog, name="Configuration"):
         config["review_channel"] = canal_suggestions.id
         config["approved_channel"] = canal_approuvees.id
         config["refused_channel"] = canal_refusees.id
-        save_data(SETTINGS_FILE, self.settings)
+        self.bot.settings.mark_dirty(interaction.guild.id)
         await interaction.response.send_message("✅ Configuration des suggestions mise à jour !", ephemeral=True)
 
     # =============================================
@@ -104,7 +76,7 @@ class ConfigCog(commands.Cog, name="Configuration"):
         config = guild_settings["ticket_config"]
         config["ticket_category_id"] = categorie.id
         config["support_role_id"] = role_support.id
-        save_data(SETTINGS_FILE, self.settings)
+        self.bot.settings.mark_dirty(interaction.guild.id)
         await interaction.response.send_message("✅ Configuration des tickets mise à jour !", ephemeral=True)
 
     # =============================================
@@ -119,7 +91,7 @@ class ConfigCog(commands.Cog, name="Configuration"):
         config = guild_settings["economy_config"]
         config["currency_name"] = nom
         config["currency_emoji"] = emoji
-        save_data(SETTINGS_FILE, self.settings)
+        self.bot.settings.mark_dirty(interaction.guild.id)
         await interaction.response.send_message(f"✅ Monnaie configurée : {emoji} {nom}", ephemeral=True)
         
     @economie_subgroup.command(name="daily", description="Configure les gains de la récompense quotidienne.")
@@ -131,7 +103,7 @@ class ConfigCog(commands.Cog, name="Configuration"):
         config = guild_settings["economy_config"]
         config["daily_min"] = minimum
         config["daily_max"] = maximum
-        save_data(SETTINGS_FILE, self.settings)
+        self.bot.settings.mark_dirty(interaction.guild.id)
         await interaction.response.send_message(f"✅ Daily configuré pour donner entre {minimum} et {maximum}.", ephemeral=True)
 
     # =============================================
@@ -143,13 +115,14 @@ class ConfigCog(commands.Cog, name="Configuration"):
         message_level_up="Message affiché lors d'une montée de niveau. Utilisez {user} et {level}."
     )
     async def config_leveling(self, interaction: discord.Interaction, activer: bool, message_level_up: Optional[str] = None):
-        guild_settings = self.get_guild_settings(interaction.guild.id)
-        config = guild_settings["leveling_config"]
-        config["activated"] = activer
+        # leveling_config est lu par le listener XP depuis la table guild_settings (cache du DatabaseManager)
+        settings = await self.bot.db.get_guild_settings(interaction.guild.id)
+        config = dict(settings.get("leveling_config") or {}) if settings else {}
+        config["enabled"] = activer
         if message_level_up:
             config["level_up_message"] = message_level_up
         
-        save_data(SETTINGS_FILE, self.settings)
+        await self.bot.db.update_guild_setting(interaction.guild.id, "leveling_config", config)
         
         status = "✅ Système de niveaux activé." if activer else "❌ Système de niveaux désactivé."
         if message_level_up:
@@ -165,7 +138,7 @@ class ConfigCog(commands.Cog, name="Configuration"):
         guild_settings = self.get_guild_settings(interaction.guild.id)
         config = guild_settings["shop_config"]
         config["shop_channel_id"] = canal.id
-        save_data(SETTINGS_FILE, self.settings)
+        self.bot.settings.mark_dirty(interaction.guild.id)
         await interaction.response.send_message(f"✅ Le canal de la boutique a été défini sur {canal.mention}.", ephemeral=True)
 
 # =============================================
@@ -2,6 +2,22 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
+from typing import Literal, Optional
+import datetime
+import time
+
+
+async def is_bot_owner(interaction: discord.Interaction) -> bool:
+    """Check pour les commandes slash réservées au propriétaire du bot."""
+    return await interaction.client.is_owner(interaction.user)
+
+
+def _code_block(lines, limit: int = 1000) -> str:
+    text = "\n".join(lines) or "Aucune donnée."
+    if len(text) > limit:
+        text = text[:limit - 3] + "..."
+    return f"```\n{text}\n```"
+
 
 class DebugCog(commands.Cog):
     def __init__(self, bot: commands.Bot):
@@ -12,6 +28,145 @@ class DebugCog(commands.Cog):
     async def debug_hello(self, interaction: discord.Interaction):
         await interaction.response.send_message("Bonjour ! La commande de débogage fonctionne !", ephemeral=True)
 
+    @app_commands.command(name="debug-db", description="[Propriétaire] Statistiques des requêtes SQLite (temps, requêtes lentes).")
+    @app_commands.check(is_bot_owner)
+    @app_commands.describe(
+        tri="Critère de tri des requêtes.",
+        seuil_lent_ms="Nouveau seuil (ms) du journal des requêtes lentes (0 = désactivé).",
+        reinitialiser="Remet les compteurs à zéro après affichage."
+    )
+    async def debug_db(self, interaction: discord.Interaction,
+                       tri: Literal["total", "count", "p99"] = "total",
+                       seuil_lent_ms: Optional[app_commands.Range[float, 0, None]] = None,
+                       reinitialiser: bool = False):
+        stats = self.bot.db.stats
+        if seuil_lent_ms is not None:
+            stats.slow_threshold_ms = seuil_lent_ms
+
+        uptime = datetime.timedelta(seconds=int(time.time() - stats.started_at))
+        total_ms = sum(s.histogram.total for s in stats.shapes.values())
+        embed = discord.Embed(
+            title="🗄️ Statistiques SQLite",
+            description=f"**{stats.total_queries}** requêtes, **{total_ms / 1000:.2f}s** cumulées depuis `{uptime}`.\n"
+                        f"Seuil requêtes lentes : `{stats.slow_threshold_ms:g} ms`",
+            color=discord.Color.dark_teal()
+        )
+
+        lines = []
+        for shape, shape_stats in stats.top_shapes(8, sort_by=tri):
+            h = shape_stats.histogram
+            lines.append(f"[{shape_stats.kind}] n={h.count} tot={h.total:.0f}ms p50={h.percentile(50):g} p99={h.percentile(99):g} err={shape_stats.errors}")
+            lines.append(f"  {shape[:90]}")
+        embed.add_field(name=f"Requêtes (tri : {tri})", value=_code_block(lines), inline=False)
+
+        by_origin = sorted(stats.origins.items(), key=lambda item: item[1].total, reverse=True)
+        embed.add_field(name="Par module appelant", value=_code_block(
+            [f"{origin}: n={h.count} tot={h.total:.0f}ms p99={h.percentile(99):g}ms" for origin, h in by_origin[:10]]
+        ), inline=False)
+
+        slow = [f"{datetime.datetime.fromtimestamp(ts):%H:%M:%S} {ms:.0f}ms {origin} {shape[:60]}" for ts, ms, shape, origin in list(stats.slow_queries)[-8:]]
+        embed.add_field(name="Dernières requêtes lentes", value=_code_block(slow), inline=False)
+
+        cache = self.bot.db.settings_cache_stats()
+        embed.set_footer(text=f"Cache paramètres : {cache['size']} serveurs, {cache['hits']} hits / {cache['misses']} misses")
+
+        if reinitialiser:
+            stats.reset()
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @app_commands.command(name="debug-levelup", description="[Propriétaire] État de la file des passages de niveau et du tampon d'XP.")
+    @app_commands.check(is_bot_owner)
+    async def debug_levelup(self, interaction: discord.Interaction):
+        queue = self.bot.level_up_queue.stats()
+        latency = queue["latency"]
+        buffer = self.bot.xp_buffer.stats()
+        lines = [
+            f"profondeur={queue['depth']} max={queue['max_depth']}",
+            f"soumis={queue['submitted']} fusionnés={queue['coalesced']} rejetés={queue['dropped']}",
+            f"traités={queue['processed']} erreurs={queue['errors']}",
+            f"latence p50={latency['p50']:g}ms p99={latency['p99']:g}ms max={latency['max']:g}ms",
+        ]
+        embed = discord.Embed(title="🎉 Passages de niveau", color=discord.Color.dark_teal())
+        embed.add_field(name="File", value=_code_block(lines), inline=False)
+        embed.add_field(name="Tampon d'XP", value=_code_block(
+            [f"en mémoire={buffer['cached']} en attente={buffer['pending']} écrits={buffer['flushed_rows']}"]
+        ), inline=False)
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @app_commands.command(name="debug-messages", description="[Propriétaire] Temps passé dans chaque étape du pipeline de messages.")
+    @app_commands.check(is_bot_owner)
+    async def debug_messages(self, interaction: discord.Interaction):
+        pipeline = self.bot.message_pipeline
+        lines = [
+            f"[{stage['priority']}] {stage['name']}: n={stage['count']} p50={stage['p50']:g}ms p99={stage['p99']:g}ms err={stage['errors']}"
+            for stage in pipeline.stats()
+        ]
+        stopped = [f"{reason}: {count}" for reason, count in sorted(pipeline.stopped.items(), key=lambda item: item[1], reverse=True)]
+        embed = discord.Embed(
+            title="💬 Pipeline de messages",
+            description=f"**{pipeline.processed}** messages traités.",
+            color=discord.Color.dark_teal()
+        )
+        embed.add_field(name="Étapes", value=_code_block(lines), inline=False)
+        embed.add_field(name="Messages arrêtés", value=_code_block(stopped[:10]), inline=False)
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @app_commands.command(name="debug-commandes", description="[Propriétaire] Latence et erreurs de chaque commande slash.")
+    @app_commands.check(is_bot_owner)
+    @app_commands.describe(tri="Critère de tri des commandes.", reinitialiser="Remet les compteurs à zéro après affichage.")
+    async def debug_commandes(self, interaction: discord.Interaction,
+                              tri: Literal["p99", "count", "errors", "total"] = "p99",
+                              reinitialiser: bool = False):
+        if not self.bot.tree.enabled:
+            await interaction.response.send_message(
+                f"❌ Mesure indisponible avec discord.py {discord.__version__}.", ephemeral=True)
+            return
+        metrics = self.bot.tree.metrics
+        uptime = datetime.timedelta(seconds=int(time.time() - metrics.started_at))
+        lines = []
+        for name, stats in metrics.top(15, sort_by=tri):
+            first, total = stats.first_response, stats.total
+            lines.append(f"/{name}: n={total.count} err={stats.errors} sans_rép={stats.no_response} >3s={stats.late}")
+            lines.append(f"  1re rép p50={first.percentile(50):g} p99={first.percentile(99):g}ms | total p99={total.percentile(99):g} max={total.max:.0f}ms")
+        embed = discord.Embed(
+            title="⌛ Latence des commandes slash",
+            description=f"Depuis `{uptime}` — délai de réponse Discord : 3 s.",
+            color=discord.Color.dark_teal()
+        )
+        embed.add_field(name=f"Commandes (tri : {tri})", value=_code_block(lines), inline=False)
+        if reinitialiser:
+            metrics.reset()
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @app_commands.command(name="debug-boucle", description="[Propriétaire] Retard de la boucle d'évènements et derniers blocages.")
+    @app_commands.check(is_bot_owner)
+    @app_commands.describe(
+        seuil_ms="Nouveau seuil (ms) au-delà duquel la pile du code bloquant est capturée.",
+        reinitialiser="Remet les compteurs à zéro après affichage."
+    )
+    async def debug_boucle(self, interaction: discord.Interaction,
+                           seuil_ms: Optional[app_commands.Range[float, 10, None]] = None,
+                           reinitialiser: bool = False):
+        monitor = self.bot.loop_monitor
+        if seuil_ms is not None:
+            monitor.threshold_ms = seuil_ms
+        lag = monitor.lag.to_dict()
+        embed = discord.Embed(
+            title="⏱️ Boucle d'évènements",
+            description=f"Retard p50=`{lag['p50']:g}ms` p99=`{lag['p99']:g}ms` max=`{lag['max']:g}ms` ({lag['count']} mesures)\n"
+                        f"**{monitor.stall_count}** blocage(s) au-delà de `{monitor.threshold_ms:g} ms`.",
+            color=discord.Color.dark_teal()
+        )
+        for stall in reversed(monitor.recent_stalls(4)):
+            embed.add_field(
+                name=f"{datetime.datetime.fromtimestamp(stall['at']):%H:%M:%S} — {stall['lag_ms']:.0f} ms",
+                value=f"`{stall['origin']}`\n" + _code_block(stall["stack"], limit=700),
+                inline=False
+            )
+        if reinitialiser:
+            monitor.reset()
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
 async def setup(bot: commands.Bot):
     await bot.add_cog(DebugCog(bot))
-    print("[DIAGNOSTIC] Le Cog 'debug_cog.py' a été chargé par le bot.")
\ No newline at end of file
+    print("[DIAGNOSTIC] Le Cog 'debug_cog.py' a été chargé par le bot.")
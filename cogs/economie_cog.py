@@ -3,85 +3,39 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 from typing import Optional, List, Dict
-import json
-import os
-import traceback
 import datetime
 import random
 import time
+from utils.cooldowns import Cooldown
 
 # --- Constantes ---
-DATA_DIR = './data'
-# CORRECTION : Utiliser une seule constante pour le fichier de config principal.
-# Le Cog économie lira la section "economy_config" de ce fichier.
-SETTINGS_FILE = os.path.join(DATA_DIR, 'settings.json')
-USER_BALANCES_FILE = os.path.join(DATA_DIR, 'user_balances.json')
+# La config économie est la section "economy_config" du registre partagé `bot.settings`.
+# Les soldes sont stockés dans la table SQLite `user_balances` (ancien user_balances.json importé au démarrage).
 DAILY_COOLDOWN_HOURS = 22
-
-# --- Fonctions Helper JSON ---
-def load_data(filepath):
-    """Charge les données depuis un fichier JSON, le crée s'il manque."""
-    try:
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        with open(filepath, 'w', encoding='utf-8') as f: json.dump({}, f)
-        return {}
-    except Exception as e:
-        print(f"Erreur chargement {filepath}: {e}"); traceback.print_exc(); return {}
-
-def save_data(filepath, data):
-    """Sauvegarde les données dans un fichier JSON de manière atomique."""
-    try:
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        temp_filepath = filepath + ".tmp"
-        with open(temp_filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=4)
-        os.replace(temp_filepath, filepath)
-    except Exception as e:
-        print(f"Erreur critique sauvegarde {filepath}: {e}"); traceback.print_exc()
+DEFAULT_ECONOMY_CONFIG = {
+    "currency_name": "Points",
+    "currency_emoji": "💰",
+    "daily_min": 50,
+    "daily_max": 250
+}
 
 
 # --- Classe Cog ---
 class EconomieCog(commands.Cog, name="Économie"):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        # CORRECTION : Charger les bons fichiers avec les bons noms
-        self.settings = load_data(SETTINGS_FILE)
-        self.user_balances = load_data(USER_BALANCES_FILE)
+        self.db = bot.db
+        # Devant la vérification en base : un /daily répété ne coûte aucune requête.
+        self.daily_cooldowns = Cooldown(DAILY_COOLDOWN_HOURS * 3600)
 
     # CORRECTION : Implémentation des fonctions helper internes
     def get_guild_config(self, guild_id: int) -> dict:
-        """Récupère ou initialise la config économie depuis le fichier settings global."""
-        guild_id_str = str(guild_id)
-        guild_settings = self.settings.setdefault(guild_id_str, {})
-        eco_config = guild_settings.setdefault("economy_config", {
-            "currency_name": "Points",
-            "currency_emoji": "💰",
-            "daily_min": 50,
-            "daily_max": 250
-        })
-        return eco_config
+        """Récupère ou initialise la config économie depuis le registre de paramètres partagé."""
+        return self.bot.settings.section(guild_id, "economy_config", DEFAULT_ECONOMY_CONFIG)
     
-    def get_user_data(self, guild_id: int, user_id: int) -> dict:
-        """Récupère ou initialise les données d'un utilisateur."""
-        guild_id_str = str(guild_id)
-        user_id_str = str(user_id)
-        
-        guild_balances = self.user_balances.setdefault(guild_id_str, {})
-        user_data = guild_balances.setdefault(user_id_str, {
-            "balance": 0,
-            "inventory": [],
-            "last_daily": None
-        })
-        
-        # S'assurer que toutes les clés par défaut existent pour l'utilisateur
-        user_data.setdefault("balance", 0)
-        user_data.setdefault("inventory", [])
-        user_data.setdefault("last_daily", None)
-        
-        return user_data
+    async def get_user_data(self, guild_id: int, user_id: int) -> dict:
+        """Récupère les données économiques d'un utilisateur (solde, inventaire, dernier daily)."""
+        return await self.db.get_balance(guild_id, user_id)
 
     # =============================================
     # ==        GROUPE COMMANDES ÉCONOMIE        ==
@@ -95,7 +49,7 @@ class EconomieCog(commands.Cog, name="Économie"):
         if target_user.bot:
             await interaction.response.send_message("❌ Les bots n'ont pas de solde.", ephemeral=True); return
 
-        user_data = self.get_user_data(interaction.guild.id, target_user.id)
+        user_data = await self.get_user_data(interaction.guild.id, target_user.id)
         config = self.get_guild_config(interaction.guild.id)
         embed = discord.Embed(
             title=f"💰 Solde de {target_user.display_name}",
@@ -108,24 +62,20 @@ class EconomieCog(commands.Cog, name="Économie"):
     async def economie_classement(self, interaction: discord.Interaction):
         await interaction.response.defer()
         
-        # Recharger les données pour avoir le classement le plus récent
-        self.user_balances = load_data(USER_BALANCES_FILE)
-        
-        guild_balances = self.user_balances.get(str(interaction.guild.id), {})
+        # Top 10 lu dans l'ordre de l'index (guild_id, balance)
+        top_users = await self.db.get_balance_leaderboard(interaction.guild.id, limit=10)
         config = self.get_guild_config(interaction.guild.id)
-        if not guild_balances:
+        if not top_users:
             await interaction.followup.send("ℹ️ Personne n'a encore de monnaie.", ephemeral=True); return
 
-        sorted_users = sorted(guild_balances.items(), key=lambda item: item[1].get("balance", 0), reverse=True)
-        
         embed = discord.Embed(
             title=f"🏆 Classement - {config.get('currency_name', 'Points')}",
             color=discord.Color.gold()
         )
         description = ""
-        for i, (user_id_str, data) in enumerate(sorted_users[:10]):
+        for i, data in enumerate(top_users):
             balance = data.get('balance', 0)
-            description += f"**{i+1}.** <@{user_id_str}> - {balance} {config.get('currency_emoji', '💰')}\n"
+            description += f"**{i+1}.** <@{data['user_id']}> - {balance} {config.get('currency_emoji', '💰')}\n"
         
         embed.description = description if description else "Aucune donnée."
         await interaction.followup.send(embed=embed)
@@ -133,11 +83,17 @@ class EconomieCog(commands.Cog, name="Économie"):
 
     @app_commands.command(name="daily", description="Récupère votre récompense quotidienne.")
     async def daily_claim(self, interaction: discord.Interaction):
+        cooldown_key = (interaction.guild.id, interaction.user.id)
+        now_utc = datetime.datetime.now(datetime.timezone.utc)
+        retry_after = self.daily_cooldowns.retry_after(cooldown_key)
+        if retry_after:
+            next_claim = discord.utils.format_dt(now_utc + datetime.timedelta(seconds=retry_after), style='R')
+            await interaction.response.send_message(f"⏳ Prochain daily disponible {next_claim}.", ephemeral=True); return
+
         config = self.get_guild_config(interaction.guild.id)
-        user_data = self.get_user_data(interaction.guild.id, interaction.user.id)
+        user_data = await self.get_user_data(interaction.guild.id, interaction.user.id)
         
         last_daily_str = user_data.get("last_daily")
-        now_utc = datetime.datetime.now(datetime.timezone.utc)
         
         if last_daily_str:
             try:
@@ -145,6 +101,7 @@ class EconomieCog(commands.Cog, name="Économie"):
                 time_since = now_utc - last_daily_dt
                 if time_since.total_seconds() < DAILY_COOLDOWN_HOURS * 3600:
                     remaining = datetime.timedelta(seconds=(DAILY_COOLDOWN_HOURS * 3600) - time_since.total_seconds())
+                    self.daily_cooldowns.trigger(cooldown_key, duration=remaining.total_seconds())
                     next_claim = discord.utils.format_dt(now_utc + remaining, style='R')
                     await interaction.response.send_message(f"⏳ Prochain daily disponible {next_claim}.", ephemeral=True); return
             except ValueError:
@@ -155,9 +112,11 @@ class EconomieCog(commands.Cog, name="Économie"):
         if max_amount <= min_amount: max_amount = min_amount + 1 
         amount_won = random.randint(min_amount, max_amount)
         
-        user_data["balance"] = user_data.get("balance", 0) + amount_won
-        user_data["last_daily"] = now_utc.isoformat()
-        save_data(USER_BALANCES_FILE, self.user_balances)
+        cutoff = now_utc - datetime.timedelta(hours=DAILY_COOLDOWN_HOURS)
+        new_balance = await self.db.claim_daily(interaction.guild.id, interaction.user.id, amount_won, now_utc.isoformat(), cutoff.isoformat())
+        if new_balance is None:
+            await interaction.response.send_message("⏳ Votre daily vient déjà d'être réclamé.", ephemeral=True); return
+        self.daily_cooldowns.trigger(cooldown_key)
         
         await interaction.response.send_message(f"🎉 Vous avez gagné **{amount_won}** {config.get('currency_emoji', '💰')} !")
 
@@ -1,9 +1,11 @@
 import discord
 from discord import app_commands
 from discord.ext import commands
-import json
 import random
-import time
+from typing import Optional
+from utils.cooldowns import Cooldown
+from utils import level_curve
+from utils.message_pipeline import MessageContext
 
 class LevelingCog(commands.Cog, name="Système de Niveaux"):
     # On crée un groupe de commandes principal /xp
@@ -12,64 +14,64 @@ class LevelingCog(commands.Cog, name="Système de Niveaux"):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self.db = bot.db
-        # Cooldown pour éviter le spam d'XP (par utilisateur)
-        self.cooldowns = {}
+        # Cooldown pour éviter le spam d'XP (par (serveur, utilisateur), entrées expirées purgées)
+        self.cooldowns = Cooldown(60)
 
-    # --- Listener pour donner de l'XP ---
-    @commands.Cog.listener("on_message")
-    async def on_xp_message(self, message: discord.Message):
-        if message.author.bot or not message.guild:
-            return
+    async def cog_load(self):
+        self.bot.message_pipeline.register("xp", self.on_xp_message, priority=50)
+
+    async def cog_unload(self):
+        self.bot.message_pipeline.unregister("xp")
 
+    # --- Étape du pipeline de messages : gain d'XP ---
+    async def on_xp_message(self, ctx: MessageContext):
+        message = ctx.message
         guild_id = message.guild.id
         user_id = message.author.id
 
-        # Récupérer la config du serveur
-        settings = await self.db.get_guild_settings(guild_id)
-        if not settings or not json.loads(settings.get("leveling_config", "{}")).get("enabled", False):
+        # Config du serveur déjà résolue par le pipeline (cache, déjà décodée)
+        leveling_config = ctx.db_settings.get("leveling_config")
+        if not leveling_config or not leveling_config.get("enabled", False):
             return
 
         # Gestion du Cooldown (1 minute par utilisateur)
-        now = time.time()
-        cooldown_key = f"{guild_id}-{user_id}"
-        if cooldown_key in self.cooldowns and now - self.cooldowns[cooldown_key] < 60:
+        if self.cooldowns.hit((guild_id, user_id)):
             return
-        self.cooldowns[cooldown_key] = now
 
-        # Donner de l'XP
+        # Donner de l'XP : appliqué en mémoire (passage de niveau compris), écrit en base par lots
         xp_gain = random.randint(15, 25)
-        user_data = await self.db.get_user_data(guild_id, user_id)
-        
-        current_xp = user_data.get("xp", 0) + xp_gain
-        current_level = user_data.get("level", 1)
-        xp_needed = 5 * (current_level ** 2) + 50 * current_level + 100
-
-        # Vérification du passage de niveau
-        if current_xp >= xp_needed:
-            current_level += 1
-            current_xp -= xp_needed
-            await self.db.update_user_xp(guild_id, user_id, current_xp, current_level)
-
-            # Annonce de level-up
-            leveling_config = json.loads(settings.get("leveling_config", "{}"))
-            announcement_channel_id = leveling_config.get("announcement_channel")
-            if announcement_channel_id:
-                channel = message.guild.get_channel(announcement_channel_id)
-                if channel:
-                    await channel.send(f"🎉 Bravo {message.author.mention}, tu as atteint le niveau **{current_level}** !")
-
-            # Attribution des rôles récompenses
-            role_rewards = leveling_config.get("role_rewards", {})
-            if str(current_level) in role_rewards:
-                role_id = role_rewards[str(current_level)]
-                role = message.guild.get_role(role_id)
-                if role:
-                    try:
-                        await message.author.add_roles(role, reason=f"Récompense de niveau {current_level}")
-                    except discord.Forbidden:
-                        print(f"Permissions manquantes pour donner le rôle {role.name} sur le serveur {message.guild.name}")
-        else:
-            await self.db.update_user_xp(guild_id, user_id, current_xp, current_level)
+        user_data = await self.bot.xp_buffer.add_xp(guild_id, user_id, xp_gain)
+
+        # Annonce et rôles récompenses : mis en file, sans attendre les appels REST
+        if user_data["leveled_up"]:
+            self.bot.level_up_queue.submit(message.author, user_data["previous_level"], user_data["level"], leveling_config)
+
+    # --- Commandes de Consultation ---
+    @xp_group.command(name="rang", description="Affiche votre rang dans le classement XP (ou celui d'un membre).")
+    @app_commands.describe(membre="Le membre dont voir le rang (optionnel).")
+    async def xp_rang(self, interaction: discord.Interaction, membre: Optional[discord.Member] = None):
+        target = membre or interaction.user
+        # Position à jour du membre prise dans le tampon d'XP (sans flush) ; les autres membres
+        # sont lus en base, au plus un intervalle de flush en retard.
+        position = self.bot.xp_buffer.peek(interaction.guild.id, target.id)
+        # Rang + 2 voisins de chaque côté, sans charger tout le classement du serveur.
+        window = await self.db.get_leaderboard_window(interaction.guild.id, target.id, radius=2, position=position)
+        if not window:
+            return await interaction.response.send_message(f"ℹ️ {target.mention} n'a pas encore gagné d'XP.", ephemeral=True)
+
+        me = next(row for row in window if row["user_id"] == target.id)
+        xp_needed = level_curve.xp_threshold(me["level"])
+        embed = discord.Embed(
+            title=f"🏅 Rang de {target.display_name}",
+            description=f"**#{me['rank']}** — Niveau **{me['level']}** (`{me['xp']}/{xp_needed}` XP)",
+            color=discord.Color.gold()
+        ).set_thumbnail(url=target.display_avatar.url)
+        lines = []
+        for row in window:
+            marker = "➤ " if row["user_id"] == target.id else ""
+            lines.append(f"{marker}`#{row['rank']}` <@{row['user_id']}> — Niv. {row['level']} ({row['xp']} XP)")
+        embed.add_field(name="Autour dans le classement", value="\n".join(lines), inline=False)
+        await interaction.response.send_message(embed=embed, allowed_mentions=discord.AllowedMentions.none())
 
     # --- Commandes de Configuration ---
     @xp_group.command(name="config-annonces", description="[Admin] Définit le salon pour les annonces de passage de niveau.")
@@ -77,7 +79,7 @@ class LevelingCog(commands.Cog, name="Système de Niveaux"):
     async def config_announcements(self, interaction: discord.Interaction, salon: discord.TextChannel):
         await interaction.response.defer(ephemeral=True)
         settings = await self.db.get_guild_settings(interaction.guild.id)
-        config = json.loads(settings.get("leveling_config", "{}")) if settings else {}
+        config = dict(settings.get("leveling_config") or {}) if settings else {}
         
         config["announcement_channel"] = salon.id
         await self.db.update_guild_setting(interaction.guild.id, "leveling_config", config)
@@ -93,22 +95,40 @@ class LevelingCog(commands.Cog, name="Système de Niveaux"):
             return await interaction.followup.send("❌ Je ne peux pas attribuer ce rôle car il est plus élevé que le mien dans la hiérarchie.", ephemeral=True)
 
         settings = await self.db.get_guild_settings(interaction.guild.id)
-        config = json.loads(settings.get("leveling_config", "{}")) if settings else {}
-        
-        if "role_rewards" not in config:
-            config["role_rewards"] = {}
+        config = dict(settings.get("leveling_config") or {}) if settings else {}
         
+        config["role_rewards"] = dict(config.get("role_rewards", {}))
         config["role_rewards"][str(niveau)] = role.id
         await self.db.update_guild_setting(interaction.guild.id, "leveling_config", config)
 
-        await interaction.followup.send(f"✅ Le rôle {role.mention} sera maintenant donné au niveau **{niveau}**.", ephemeral=True)
+        await interaction.followup.send(
+            f"✅ Le rôle {role.mention} sera maintenant donné au niveau **{niveau}**.\n"
+            f"Utilisez `/xp synchro-roles` pour le donner aux membres ayant déjà dépassé ce niveau.",
+            ephemeral=True
+        )
+
+    @xp_group.command(name="synchro-roles", description="[Admin] Donne les rôles récompenses manquants aux membres ayant déjà le niveau requis.")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def sync_roles(self, interaction: discord.Interaction):
+        settings = await self.db.get_guild_settings(interaction.guild.id)
+        role_rewards = (settings.get("leveling_config") or {}).get("role_rewards") if settings else None
+        if not role_rewards:
+            return await interaction.response.send_message("ℹ️ Aucun rôle récompense n'est configuré.", ephemeral=True)
+        if self.bot.role_sync.is_running(interaction.guild.id):
+            return await interaction.response.send_message("⏳ Une synchronisation est déjà en cours sur ce serveur.", ephemeral=True)
+
+        # Message public : il sert de barre de progression, y compris après un redémarrage du bot.
+        await interaction.response.send_message("⏳ Synchronisation des rôles récompenses : préparation...")
+        progress_message = await interaction.original_response()
+        if not await self.bot.role_sync.start(interaction.guild, role_rewards, progress_message):
+            await interaction.edit_original_response(content="⏳ Une synchronisation est déjà enregistrée pour ce serveur.")
 
     @xp_group.command(name="config-activer", description="[Admin] Active ou désactive le système de niveaux sur le serveur.")
     @app_commands.checks.has_permissions(administrator=True)
     async def config_toggle(self, interaction: discord.Interaction, statut: bool):
         await interaction.response.defer(ephemeral=True)
         settings = await self.db.get_guild_settings(interaction.guild.id)
-        config = json.loads(settings.get("leveling_config", "{}")) if settings else {}
+        config = dict(settings.get("leveling_config") or {}) if settings else {}
 
         config["enabled"] = statut
         await self.db.update_guild_setting(interaction.guild.id, "leveling_config", config)
@@ -8,7 +8,9 @@ import traceback
 import re # Ajout pour l'autocomplétion
 
 # --- Dépendances ---
-from utils.database import db
+from utils.cooldowns import Cooldown
+
+PROPOSAL_COOLDOWN = 60 # Secondes entre deux demandes d'un même membre
 
 # --- Vue pour la Demande en Mariage (Modifiée) ---
 class MarriageProposalView(discord.ui.View):
@@ -40,7 +42,7 @@ class MarriageProposalView(discord.ui.View):
         
         try:
             # Ajouter le mariage à la base de données
-            await db.add_marriage(interaction.guild.id, self.author.id, self.target.id)
+            await self.cog.db.add_marriage(interaction.guild.id, self.author.id, self.target.id)
             
             response_embed = discord.Embed(
                 title="🎉 Mariage Accepté ! 🎉",
@@ -91,6 +93,7 @@ class MarriageCog(commands.Cog, name="Système de Mariage"):
     def __init__(self, bot: commands.Bot, db_manager):
         self.bot = bot
         self.db = db_manager
+        self.proposal_cooldowns = Cooldown(PROPOSAL_COOLDOWN)
 
     # --- Autocomplétion pour la commande /divorce (Inchangée) ---
     async def divorce_autocomplete(self, interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
@@ -129,6 +132,10 @@ class MarriageCog(commands.Cog, name="Système de Mariage"):
         if are_already_married:
             await interaction.response.send_message(f"ℹ️ Vous êtes déjà marié(e) avec {membre.mention} !", ephemeral=True); return
         
+        retry_after = self.proposal_cooldowns.hit((guild.id, author.id))
+        if retry_after:
+            await interaction.response.send_message(f"⏳ Attendez encore {retry_after:.0f}s avant une nouvelle demande.", ephemeral=True); return
+
         view = MarriageProposalView(author, membre, self)
 
         embed = discord.Embed(
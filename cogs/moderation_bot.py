@@ -5,7 +5,7 @@ from typing import Optional
 import os
 from dotenv import load_dotenv
 import asyncio
-import datetime # <-- AJOUT NÉCESSAIRE pour la gestion des messages anciens
+from utils.purge import purge_channel
 
 # Je commente ces lignes car elles semblent causer des confusions ou des erreurs
 # from cogs.utility import is_not_maintenance 
@@ -137,8 +137,6 @@ async def clear(ctx, amount: int, member: Optional[discord.Member] = None):
     # On supprime d'abord le message de commande
     await ctx.message.delete()
     
-    deleted_count = 0
-    
     try:
         # On définit le filtre
         def check(message):
@@ -146,37 +144,18 @@ async def clear(ctx, amount: int, member: Optional[discord.Member] = None):
                 return True # Si aucun membre, on supprime tout
             return message.author == member # Sinon, on filtre par auteur
 
-        # La méthode `purge` avec `bulk=False` gère les messages anciens,
-        # mais est plus lente. On utilise une méthode hybride.
-        
-        fourteen_days_ago = discord.utils.utcnow() - datetime.timedelta(days=14)
-        
-        # Messages récents (peuvent être supprimés en masse)
-        recent_messages = []
-        # Messages anciens (doivent être supprimés un par un)
-        old_messages = []
-        
-        async for message in ctx.channel.history(limit=amount * 2): # On scanne plus large pour le filtre
-            if len(recent_messages) + len(old_messages) >= amount:
-                break
-            
-            if check(message):
-                if message.created_at > fourteen_days_ago:
-                    recent_messages.append(message)
-                else:
-                    old_messages.append(message)
-
-        # Suppression optimisée
-        if recent_messages:
-            deleted_recent = await ctx.channel.purge(limit=len(recent_messages), check=lambda m: m in recent_messages)
-            deleted_count += len(deleted_recent)
-        
-        if old_messages:
-            for msg in old_messages:
-                await msg.delete()
-                deleted_count += 1
-        
-        await ctx.send(f"🗑️ **{deleted_count}** messages ont été supprimés.", delete_after=5.0)
+        # Un seul parcours de l'historique : messages récents par lots de 100,
+        # messages de plus de 14 jours un par un en arrière-plan (voir utils/purge.py).
+        status = await ctx.send("⏳ Suppression en cours...")
+
+        async def report(progress):
+            try:
+                await status.edit(content=progress.summary())
+            except discord.HTTPException:
+                pass
+
+        result = await purge_channel(ctx.channel, amount, check, scan_limit=amount * 2, before=status, on_progress=report)
+        await status.edit(content=f"🗑️ **{result.deleted}** messages ont été supprimés.", delete_after=5.0)
 
     except discord.Forbidden:
         await ctx.send("Je n'ai pas la permission de supprimer des messages dans ce salon.", delete_after=10.0)
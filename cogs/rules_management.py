@@ -1,20 +1,10 @@
 import discord
 from discord import app_commands
 from discord.ext import commands
-import json
-import os
 
-# --- Fonctions de gestion de données ---
-def load_config_data():
-    try:
-        with open('data/server_config.json', 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return {}
-
-def save_config_data(data):
-    with open('data/server_config.json', 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=4, ensure_ascii=False)
+# --- Données ---
+# L'emplacement du message du règlement est stocké dans la table SQLite `rules_config`
+# (ancien data/server_config.json importé au démarrage).
 
 # --- Classe du Cog de gestion du règlement ---
 class RulesManagement(commands.Cog, name="Gestion du Règlement"):
@@ -24,6 +14,7 @@ class RulesManagement(commands.Cog, name="Gestion du Règlement"):
 
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self.db = bot.db
 
     # --- Commande pour créer le message de règlement ---
     @rules_group.command(name="creer", description="[Admin] Crée le message du règlement dans un salon.")
@@ -53,16 +44,7 @@ class RulesManagement(commands.Cog, name="Gestion du Règlement"):
             rules_message = await salon.send(embed=embed)
             
             # On sauvegarde l'ID du salon et du message
-            config = load_config_data()
-            server_id = str(interaction.guild.id)
-            if server_id not in config:
-                config[server_id] = {}
-            
-            config[server_id]["rules_config"] = {
-                "channel_id": salon.id,
-                "message_id": rules_message.id
-            }
-            save_config_data(config)
+            await self.db.set_rules_config(interaction.guild.id, salon.id, rules_message.id)
             
             await interaction.followup.send(f"✅ Message du règlement créé avec succès dans {salon.mention} !", ephemeral=True)
 
@@ -84,9 +66,7 @@ class RulesManagement(commands.Cog, name="Gestion du Règlement"):
     async def edit_rule(self, interaction: discord.Interaction, numero: app_commands.Range[int, 1, 25], nouveau_titre: str, nouvelle_description: str):
         await interaction.response.defer(ephemeral=True)
 
-        config = load_config_data()
-        server_id = str(interaction.guild.id)
-        rules_config = config.get(server_id, {}).get("rules_config")
+        rules_config = await self.db.get_rules_config(interaction.guild.id)
 
         if not rules_config:
             return await interaction.followup.send("❌ Le message du règlement n'a pas été créé. Utilisez d'abord `/regles creer`.", ephemeral=True)
@@ -3,48 +3,17 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 from typing import Optional, Dict
-import json
-import os
-import traceback
 import datetime
 
-# --- Dépendances et Helpers ---
-DATA_DIR = './data'
-SHOP_DATA_FILE = os.path.join(DATA_DIR, 'shop_data.json')
-# Note : Pour l'achat, ce cog aura besoin de l'objet 'db' de utils.database
-# Assurez-vous que l'import est correct si vous l'utilisez
-# from utils.database import db
-
-def load_data(filepath):
-    try:
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        with open(filepath, 'r', encoding='utf-8') as f: return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        with open(filepath, 'w', encoding='utf-8') as f: json.dump({}, f); return {}
-    except Exception as e:
-        print(f"Erreur chargement {filepath}: {e}"); traceback.print_exc(); return {}
-
-def save_data(filepath, data):
-    try:
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        temp_filepath = filepath + ".tmp"
-        with open(temp_filepath, 'w', encoding='utf-8') as f: json.dump(data, f, indent=4)
-        os.replace(temp_filepath, filepath)
-    except Exception as e:
-        print(f"Erreur critique sauvegarde {filepath}: {e}"); traceback.print_exc()
+# --- Dépendances ---
+# Le catalogue est stocké dans les tables SQLite `shop_config` et `shop_items`
+# (ancien data/shop_data.json importé au démarrage, voir utils/json_import.py).
 
 # --- Classe Cog ---
 class ShopCog(commands.Cog, name="Boutique"):
-    def __init__(self, bot: commands.Bot): # Retiré db_manager pour l'instant car non utilisé
+    def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.shop_data = load_data(SHOP_DATA_FILE)
-
-    def get_guild_shop_data(self, guild_id: int) -> dict:
-        guild_id_str = str(guild_id)
-        guild_data = self.shop_data.setdefault(guild_id_str, {})
-        guild_data.setdefault("config", {"currency_name": "Points", "currency_emoji": "💰"})
-        guild_data.setdefault("items", {})
-        return guild_data
+        self.db = bot.db
 
     # =============================================
     # ==          GROUPE COMMANDES BOUTIQUE      ==
@@ -53,19 +22,17 @@ class ShopCog(commands.Cog, name="Boutique"):
 
     @boutique_group.command(name="voir", description="Affiche les articles disponibles dans la boutique.")
     async def boutique_voir(self, interaction: discord.Interaction):
-        guild_data = self.get_guild_shop_data(interaction.guild.id)
-        items = guild_data.get("items", {})
-        config = guild_data.get("config", {})
+        items = await self.db.get_shop_items(interaction.guild.id)
+        config = await self.db.get_shop_config(interaction.guild.id)
         
         if not items:
             await interaction.response.send_message("ℹ️ La boutique est actuellement vide.", ephemeral=True); return
 
         embed = discord.Embed(title=f"🛍️ Boutique de {interaction.guild.name}", color=discord.Color.gold())
         description = ""
-        sorted_items = sorted(items.items(), key=lambda item: (item[1].get('price', 0), item[1].get('xp_cost', 0)))
-
-        for item_key, item_data in sorted_items:
-            name = item_data.get('display_name', item_key)
+        # Les articles arrivent déjà triés par prix puis coût en XP.
+        for item_data in items:
+            name = item_data.get('display_name') or item_data['item_key']
             price = item_data.get('price', 0)
             xp_cost = item_data.get('xp_cost', 0)
             desc = item_data.get('description', 'N/A')
@@ -111,11 +78,7 @@ class ShopCog(commands.Cog, name="Boutique"):
         emoji_monnaie="L'emoji pour la monnaie (ex: 💰)."
     )
     async def boutique_configurer(self, interaction: discord.Interaction, nom_monnaie: str, emoji_monnaie: str):
-        guild_data = self.get_guild_shop_data(interaction.guild.id)
-        config = guild_data["config"]
-        config["currency_name"] = nom_monnaie
-        config["currency_emoji"] = emoji_monnaie
-        save_data(SHOP_DATA_FILE, self.shop_data)
+        await self.db.set_shop_config(interaction.guild.id, nom_monnaie, emoji_monnaie)
         await interaction.response.send_message(f"✅ La monnaie de la boutique a été définie sur : {emoji_monnaie} {nom_monnaie}", ephemeral=True)
 
     @boutique_group.command(name="créer-item", description="Crée un nouvel article pour la boutique.")
@@ -147,25 +110,20 @@ class ShopCog(commands.Cog, name="Boutique"):
         if not role_recompense and xp_gain_val <= 0:
             await interaction.response.send_message("❌ L'article doit avoir une récompense ! Spécifiez un `role_recompense` ou `xp_a_donner`.", ephemeral=True); return
 
-        guild_data = self.get_guild_shop_data(interaction.guild.id)
-        items = guild_data["items"]
         item_key = nom.lower().strip()
 
-        if item_key in items:
-            await interaction.response.send_message(f"❌ Un article nommé `{nom}` existe déjà.", ephemeral=True); return
-
         if role_recompense and role_recompense >= interaction.guild.me.top_role:
             await interaction.response.send_message(f"❌ Je ne peux pas gérer le rôle {role_recompense.mention}.", ephemeral=True); return
 
-        items[item_key] = {
+        item = {
             "display_name": nom, "description": description, "price": prix_val, "xp_cost": xp_val,
             "role_id": role_recompense.id if role_recompense else None, "xp_gain": xp_gain_val,
             "quantity": quantite, "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat()
         }
-        
-        save_data(SHOP_DATA_FILE, self.shop_data)
+        if not await self.db.add_shop_item(interaction.guild.id, item_key, item):
+            await interaction.response.send_message(f"❌ Un article nommé `{nom}` existe déjà.", ephemeral=True); return
 
-        config = guild_data.get("config", {}); currency_emoji = config.get('currency_emoji', '💰')
+        config = await self.db.get_shop_config(interaction.guild.id); currency_emoji = config.get('currency_emoji', '💰')
         cost_parts = []
         if prix_val > 0: cost_parts.append(f"{prix_val}{currency_emoji}")
         if xp_val > 0: cost_parts.append(f"{xp_val}✨ XP")
@@ -185,22 +143,15 @@ class ShopCog(commands.Cog, name="Boutique"):
     @app_commands.checks.has_permissions(manage_guild=True)
     @app_commands.describe(article="Le nom de l'article à supprimer.")
     async def boutique_supprimer_item(self, interaction: discord.Interaction, article: str):
-        guild_data = self.get_guild_shop_data(interaction.guild.id)
-        items = guild_data["items"]
         item_key_to_delete = article.lower().strip()
 
-        if item_key_to_delete not in items:
+        display_name = await self.db.remove_shop_item(interaction.guild.id, item_key_to_delete)
+        if display_name is None:
             await interaction.response.send_message(f"❌ L'article `{article}` n'a pas été trouvé.", ephemeral=True); return
-            
-        display_name = items[item_key_to_delete].get("display_name", article)
-        del items[item_key_to_delete]
-        save_data(SHOP_DATA_FILE, self.shop_data)
         
         await interaction.response.send_message(f"🗑️ L'article `{display_name}` a été supprimé de la boutique.", ephemeral=True)
 
 # --- Setup du Cog ---
 async def setup(bot: commands.Bot):
-    # CORRECTION : Le __init__ de ShopCog n'a pas besoin de db_manager pour l'instant
-    # Si la commande /acheter est implémentée, il faudra le passer comme pour les autres cogs.
     await bot.add_cog(ShopCog(bot))
     print("Cog Boutique (corrigé) chargé.")
\ No newline at end of file
@@ -2,36 +2,11 @@
 import discord
 from discord import app_commands
 from discord.ext import commands
-import json
-import os
 import traceback
 import datetime
 from typing import Optional
 import io
 
-# --- Fonctions Helper (inchangées) ---
-DATA_DIR = './data'
-SETTINGS_FILE = os.path.join(DATA_DIR, 'settings.json')
-
-def load_data(filepath):
-    try:
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        with open(filepath, 'r', encoding='utf-8') as f: return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        with open(filepath, 'w', encoding='utf-8') as f: json.dump({}, f)
-        return {}
-    except Exception as e:
-        print(f"Erreur chargement {filepath}: {e}"); traceback.print_exc(); return {}
-
-def save_data(filepath, data):
-    try:
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        temp_filepath = filepath + ".tmp"
-        with open(temp_filepath, 'w', encoding='utf-8') as f: json.dump(data, f, indent=4)
-        os.replace(temp_filepath, filepath)
-    except Exception as e:
-        print(f"Erreur critique sauvegarde {filepath}: {e}"); traceback.print_exc()
-
 # --- Vues Persistantes (inchangées) ---
 class TicketPanelView(discord.ui.View):
     def __init__(self): super().__init__(timeout=None)
@@ -47,13 +22,11 @@ class TicketCloseView(discord.ui.View):
 class SuggestionsTicketsCog(commands.Cog, name="Suggestions & Tickets"):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.settings = load_data(SETTINGS_FILE)
         self.bot.add_view(TicketPanelView())
         self.bot.add_view(TicketCloseView())
 
     def get_guild_settings(self, guild_id: int) -> dict:
-        guild_id_str = str(guild_id)
-        guild_data = self.settings.setdefault(guild_id_str, {})
+        guild_data = self.bot.settings.guild(guild_id)
         guild_data.setdefault("suggestions_config", {})
         guild_data.setdefault("ticket_config", {})
         return guild_data
@@ -74,7 +47,7 @@ class SuggestionsTicketsCog(commands.Cog, name="Suggestions & Tickets"):
             config = guild_settings["ticket_config"]
             config["ticket_category_id"] = categorie.id
             config["support_role_id"] = role_support.id
-            save_data(SETTINGS_FILE, self.settings)
+            self.bot.settings.mark_dirty(interaction.guild.id)
 
             await interaction.followup.send(
                 f"✅ Configuration des tickets enregistrée !\n"
@@ -119,7 +92,6 @@ class SuggestionsTicketsCog(commands.Cog, name="Suggestions & Tickets"):
         # ==============================================================================
         # --- CORRECTION APPLIQUÉE ICI ---
         try:
-            self.settings = load_data(SETTINGS_FILE)
             guild_settings = self.get_guild_settings(interaction.guild.id)
             config = guild_settings.get("ticket_config", {})
             category_id = config.get("ticket_category_id")
@@ -159,7 +131,6 @@ class SuggestionsTicketsCog(commands.Cog, name="Suggestions & Tickets"):
             # La réponse doit être faite avant toute opération potentiellement lente
             await interaction.response.defer(ephemeral=True)
             
-            self.settings = load_data(SETTINGS_FILE)
             guild_settings = self.get_guild_settings(interaction.guild.id)
             config = guild_settings.get("ticket_config", {})
             support_role = interaction.guild.get_role(config.get("support_role_id"))
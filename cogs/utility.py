@@ -4,19 +4,17 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 from typing import Optional, List, Literal, Dict
-import json
 import os
 import datetime
 import traceback
 import asyncio
+from utils.json_store import get_store
 
 # =====================================================================
 # == 1. CONSTANTES ET CONFIGURATION                                ==
 # =====================================================================
 DATA_DIR = './data'
-SETTINGS_FILE = os.path.join(DATA_DIR, 'settings.json')
 MAINTENANCE_BACKUP_FILE = os.path.join(DATA_DIR, 'maintenance_perms_backup.json')
-SHOP_DATA_FILE = os.path.join(DATA_DIR, 'shop_data.json') 
 
 # Permissions à verrouiller pour les non-administrateurs en mode maintenance
 LOCKDOWN_PERMISSIONS = {
@@ -34,42 +32,14 @@ LOCKDOWN_PERMISSIONS = {
     "request_to_speak": False,
 }
 
-# --- Fonctions Helper JSON ---
-def load_data(filepath):
-    try:
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        # Crée un fichier vide s'il n'existe pas ou s'il est mal formé
-        with open(filepath, 'w', encoding='utf-8') as f: json.dump({}, f)
-        return {}
-    except Exception as e:
-        print(f"Erreur chargement {filepath}: {e}"); traceback.print_exc(); return {}
-
-def save_data(filepath, data):
-    try:
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        temp_filepath = filepath + ".tmp"
-        with open(temp_filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=4)
-        os.replace(temp_filepath, filepath)
-    except Exception as e:
-        print(f"Erreur critique sauvegarde {filepath}: {e}"); traceback.print_exc()
-
 # =====================================================================
 # == 2. CHECKS ET UTILS                                            ==
 # =====================================================================
 
 async def is_not_maintenance(interaction: discord.Interaction) -> bool:
     """Check si le serveur n'est pas en maintenance OU si l'utilisateur est admin."""
-    # Note: Utilise SETTINGS_FILE pour la vérification
-    try:
-        settings = load_data(SETTINGS_FILE)
-    except:
-        settings = {}
-        
-    guild_settings = settings.get(str(interaction.guild_id), {})
+    # Lecture du registre partagé en mémoire (aucun accès disque)
+    guild_settings = interaction.client.settings.get(interaction.guild_id)
     in_maintenance = guild_settings.get("maintenance_mode", False) # S'appuie sur une clé 'maintenance_mode'
 
     if not in_maintenance:
@@ -90,12 +60,11 @@ async def is_not_maintenance(interaction: discord.Interaction) -> bool:
 class UtilityCog(commands.Cog, name="Utilitaires Serveur"):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.settings = load_data(SETTINGS_FILE)
-        self.maintenance_backup = load_data(MAINTENANCE_BACKUP_FILE) # Chargement des données de maintenance
+        self.backup_store = get_store(MAINTENANCE_BACKUP_FILE)
+        self.maintenance_backup = self.backup_store.data # Chargement des données de maintenance
 
     def get_guild_settings(self, guild_id: int) -> dict:
-        guild_id_str = str(guild_id)
-        return self.settings.setdefault(guild_id_str, {})
+        return self.bot.settings.guild(guild_id)
     
     # =============================================
     # ==      COMMANDES MAINTENANCE SERVEUR      ==
@@ -182,7 +151,9 @@ class UtilityCog(commands.Cog, name="Utilitaires Serveur"):
                     "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
                     "original_perms": original_perms_backup
                 }
-                save_data(MAINTENANCE_BACKUP_FILE, self.maintenance_backup)
+                # Écriture immédiate : sans ce backup, les permissions ne pourraient pas être restaurées.
+                self.backup_store.mark_dirty()
+                await self.backup_store.flush()
                 print("MAINTENANCE: Backup de permissions créé.")
             
             # --- FIN DE LA LOGIQUE D'ACTIVATION OPTIMISÉE ---
@@ -225,8 +196,6 @@ class UtilityCog(commands.Cog, name="Utilitaires Serveur"):
         guild = interaction.guild
         guild_id_str = str(guild.id)
         
-        self.maintenance_backup = load_data(MAINTENANCE_BACKUP_FILE)
-        
         if guild_id_str not in self.maintenance_backup or not self.maintenance_backup[guild_id_str].get("active", False):
             await interaction.response.send_message("ℹ️ Le mode maintenance n'est pas actif.", ephemeral=True)
             return
@@ -238,7 +207,7 @@ class UtilityCog(commands.Cog, name="Utilitaires Serveur"):
 
         if not original_perms_to_restore:
             del self.maintenance_backup[guild_id_str]
-            save_data(MAINTENANCE_BACKUP_FILE, self.maintenance_backup)
+            self.backup_store.mark_dirty()
             await interaction.followup.send("⚠️ Aucune donnée à restaurer. Mode maintenance désactivé.", ephemeral=True)
             return
 
@@ -271,7 +240,7 @@ class UtilityCog(commands.Cog, name="Utilitaires Serveur"):
             await asyncio.sleep(0.05) # Réduction du délai ici aussi pour accélérer la désactivation
 
         del self.maintenance_backup[guild_id_str]
-        save_data(MAINTENANCE_BACKUP_FILE, self.maintenance_backup)
+        self.backup_store.mark_dirty()
 
         final_message = f"✅ Mode maintenance désactivé ! ({total_to_restore} salons traités)."
         if permission_errors > 0: final_message += f"\n⚠️ {permission_errors} erreur(s) lors de la restauration."
@@ -299,9 +268,5 @@ class UtilityCog(commands.Cog, name="Utilitaires Serveur"):
 # ==          SETUP DU COG                   ==
 # =============================================
 async def setup(bot: commands.Bot):
-    # NOUVEAU : S'assurer que les fichiers de données sont créés/chargés
-    load_data(SHOP_DATA_FILE)
-    load_data(SETTINGS_FILE) 
-    
     await bot.add_cog(UtilityCog(bot))
     print("Cog Utility (avec commandes de maintenance) chargé avec succès.")
@@ -0,0 +1,211 @@
+# utils/activity_counter.py
+"""
+Compteurs d'activité (messages par membre) en mémoire.
+
+Chaque message incrémente un compteur local, sans accès disque ; les compteurs en
+attente sont ajoutés par lots (un seul COMMIT) toutes les `flush_interval` secondes,
+ainsi qu'à l'arrêt du bot, à la table `activity` (total) et à `activity_daily`
+(un agrégat par membre et par jour UTC, conservé RETENTION_DAYS jours).
+
+Fenêtres des classements :
+- "7j" / "30j" : somme de la plage de jours dans `activity_daily` + compteurs en attente ;
+- "24h" : anneau de 24 compteurs horaires par membre actif, en mémoire (sauvegardé à
+  l'arrêt dans `activity_hourly` et rechargé au démarrage) ;
+- "total" : table `activity` + compteurs en attente.
+"""
+import asyncio
+import heapq
+import time
+import traceback
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from utils.database import DatabaseManager
+
+FLUSH_INTERVAL = 10.0
+HOURS = 24
+RETENTION_DAYS = 35
+# Fenêtre -> nombre de jours (aujourd'hui compris) ; "24h" est servie par les anneaux horaires.
+WINDOW_DAYS = {"7j": 7, "30j": 30}
+
+Key = Tuple[int, int]
+
+
+def current_hour() -> int:
+    """Heures écoulées depuis l'epoch (UTC)."""
+    return int(time.time() // 3600)
+
+
+class HourRing:
+    """Messages des 24 dernières heures d'un membre : un compteur par heure, réutilisés en anneau."""
+    __slots__ = ("counts", "hour")
+
+    def __init__(self, hour: int):
+        self.counts = array("I", bytes(4 * HOURS))
+        self.hour = hour  # Heure du dernier décalage
+
+    def advance(self, hour: int):
+        """Remet à zéro les cases des heures écoulées depuis le dernier décalage."""
+        elapsed = hour - self.hour
+        if elapsed <= 0:
+            return
+        if elapsed >= HOURS:
+            self.counts = array("I", bytes(4 * HOURS))
+        else:
+            for h in range(self.hour + 1, hour + 1):
+                self.counts[h % HOURS] = 0
+        self.hour = hour
+
+    def add(self, hour: int, count: int = 1):
+        self.advance(hour)
+        self.counts[hour % HOURS] += count
+
+    def total(self, hour: int) -> int:
+        self.advance(hour)
+        return sum(self.counts)
+
+    def buckets(self, hour: int):
+        """(heure, messages) des cases non vides, après décalage."""
+        self.advance(hour)
+        for h in range(hour - HOURS + 1, hour + 1):
+            if self.counts[h % HOURS]:
+                yield h, self.counts[h % HOURS]
+
+
+class ActivityCounter:
+    def __init__(self, db: DatabaseManager, flush_interval: float = FLUSH_INTERVAL):
+        self.db = db
+        self.flush_interval = flush_interval
+        # (guild_id, user_id) -> messages pas encore écrits, au total et par jour
+        self._pending: Dict[Key, int] = {}
+        self._pending_days: Dict[Tuple[int, int, int], int] = {}
+        # (guild_id, user_id) -> anneau horaire (membres actifs dans les dernières 24 h)
+        self._hours: Dict[Key, HourRing] = {}
+        self._flush_lock = asyncio.Lock()
+        self._task = None
+        self._pruned_day: Optional[int] = None
+        self.flushed_rows = 0
+
+    async def load(self):
+        """Recharge l'instantané horaire sauvegardé au dernier arrêt."""
+        hour = current_hour()
+        for row in await self.db.get_activity_hours(hour - HOURS + 1):
+            key = (row["guild_id"], row["user_id"])
+            ring = self._hours.get(key)
+            if ring is None:
+                ring = self._hours[key] = HourRing(hour)
+            ring.counts[row["hour"] % HOURS] += row["messages"]
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def close(self):
+        """Arrête la tâche de fond, écrit ce qui reste en attente et sauvegarde les anneaux horaires."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        hour = current_hour()
+        await self.db.save_activity_hours([
+            (g, u, h, count) for (g, u), ring in self._hours.items() for h, count in ring.buckets(hour)
+        ])
+
+    def add(self, guild_id: int, user_id: int, count: int = 1):
+        """Compte un message (synchrone : aucune attente dans le pipeline de messages)."""
+        key = (guild_id, user_id)
+        hour = current_hour()
+        self._pending[key] = self._pending.get(key, 0) + count
+        day_key = (guild_id, user_id, hour // HOURS)
+        self._pending_days[day_key] = self._pending_days.get(day_key, 0) + count
+        ring = self._hours.get(key)
+        if ring is None:
+            ring = self._hours[key] = HourRing(hour)
+        ring.add(hour, count)
+
+    async def flush(self):
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, {}
+            pending_days, self._pending_days = self._pending_days, {}
+            try:
+                await self.db.add_activity_counts(
+                    [(g, u, count) for (g, u), count in pending.items()],
+                    [(g, u, day, count) for (g, u, day), count in pending_days.items()],
+                )
+                self.flushed_rows += len(pending)
+            except Exception:
+                # On réintègre les compteurs pour le prochain essai.
+                for key, count in pending.items():
+                    self._pending[key] = self._pending.get(key, 0) + count
+                for key, count in pending_days.items():
+                    self._pending_days[key] = self._pending_days.get(key, 0) + count
+                raise
+
+    async def _maintenance(self):
+        """Une fois par jour : purge des jours expirés. À chaque passage : anneaux vides retirés."""
+        hour = current_hour()
+        for key in [k for k, ring in self._hours.items() if hour - ring.hour >= HOURS]:
+            del self._hours[key]
+        today = hour // HOURS
+        if self._pruned_day != today:
+            self._pruned_day = today
+            await self.db.prune_activity_daily(today - RETENTION_DAYS + 1)
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+                await self._maintenance()
+            except Exception as e:
+                print(f"ERREUR lors de l'écriture des compteurs d'activité : {e}")
+                traceback.print_exc()
+
+    # --- Classements ---
+    async def leaderboard(self, guild_id: int, limit: int = 10, window: str = "total") -> List[Dict]:
+        """
+        Classement à jour sur `window` ("24h", "7j", "30j" ou "total") : le top `limit` en base,
+        complété par les membres ayant des messages en attente (seuls eux peuvent avoir dépassé
+        un membre du top).
+        """
+        if window == "24h":
+            hour = current_hour()
+            totals = {u: ring.total(hour) for (g, u), ring in self._hours.items() if g == guild_id}
+            return self._rank(totals, limit)
+
+        days = WINDOW_DAYS.get(window)
+        # Verrou de flush : les compteurs en attente ne peuvent pas être écrits pendant la lecture (double comptage).
+        async with self._flush_lock:
+            if days is None:
+                pending = {u: count for (g, u), count in self._pending.items() if g == guild_id}
+                top = await self.db.get_activity_leaderboard(guild_id, limit)
+            else:
+                since_day = current_hour() // HOURS - days + 1
+                pending = {}
+                for (g, u, day), count in self._pending_days.items():
+                    if g == guild_id and day >= since_day:
+                        pending[u] = pending.get(u, 0) + count
+                top = await self.db.get_activity_window_leaderboard(guild_id, since_day, limit)
+            totals = {row["user_id"]: row["messages"] for row in top}
+            missing = [u for u in pending if u not in totals]
+            if days is None:
+                stored = await self.db.get_activity_counts(guild_id, missing)
+            else:
+                stored = await self.db.get_activity_window_counts(guild_id, since_day, missing)
+        for user_id, count in pending.items():
+            totals[user_id] = totals.get(user_id, stored.get(user_id, 0)) + count
+        return self._rank(totals, limit)
+
+    @staticmethod
+    def _rank(totals: Dict[int, int], limit: int) -> List[Dict]:
+        ranked = heapq.nlargest(limit, ((u, n) for u, n in totals.items() if n), key=lambda item: (item[1], item[0]))
+        return [{"user_id": user_id, "messages": messages} for user_id, messages in ranked]
+
+    def stats(self) -> Dict[str, int]:
+        return {"pending": len(self._pending), "active_24h": len(self._hours), "flushed_rows": self.flushed_rows}
@@ -0,0 +1,128 @@
+# utils/command_metrics.py
+"""
+Latence des commandes slash, par commande (nom qualifié : "xp rang", "boutique acheter"...).
+
+`InstrumentedCommandTree` mesure chaque interaction traitée par l'arbre :
+- délai avant la première réponse (send_message, defer, modal...), à comparer au délai
+  de 3 secondes imposé par Discord ;
+- durée totale du handler ;
+- erreurs (exceptions et `command_failed`) et interactions restées sans réponse.
+
+La mesure repose sur des attributs privés de discord.py (`CommandTree._call`,
+`Interaction._cs_response`, `InteractionResponse._response_type`), vérifiés sur la 2.7
+(version épinglée dans requirements.txt). S'ils disparaissent, l'arbre se comporte comme
+un `CommandTree` ordinaire et n'enregistre rien.
+"""
+import time
+from typing import Dict, List, Optional, Tuple
+
+import discord
+from discord import app_commands
+
+from utils.metrics import Histogram
+
+# Délai de réponse imposé par Discord (ms) : au-delà, l'interaction a échoué côté client.
+RESPONSE_DEADLINE_MS = 3000.0
+
+
+def _instrumentation_supported() -> bool:
+    """True si la version installée de discord.py expose les attributs privés utilisés."""
+    return (
+        callable(getattr(app_commands.CommandTree, "_call", None))
+        and "_cs_response" in getattr(discord.Interaction, "__slots__", ())
+        and "_response_type" in getattr(discord.InteractionResponse, "__slots__", ())
+    )
+
+
+class _TimedResponse(discord.InteractionResponse):
+    """InteractionResponse qui note l'instant de la première réponse."""
+    __slots__ = ("_type", "responded_at")
+
+    def __init__(self, parent: discord.Interaction):
+        self.responded_at: Optional[float] = None
+        super().__init__(parent)
+
+    # Toutes les méthodes de réponse passent par `_response_type` : on intercepte son affectation.
+    @property
+    def _response_type(self):
+        return self._type
+
+    @_response_type.setter
+    def _response_type(self, value):
+        self._type = value
+        if value is not None and self.responded_at is None:
+            self.responded_at = time.perf_counter()
+
+
+class CommandStats:
+    __slots__ = ("first_response", "total", "errors", "no_response", "late")
+
+    def __init__(self):
+        self.first_response = Histogram()
+        self.total = Histogram()
+        self.errors = 0
+        self.no_response = 0
+        self.late = 0
+
+
+class CommandMetrics:
+    def __init__(self):
+        self.commands: Dict[str, CommandStats] = {}
+        self.started_at = time.time()
+
+    def record(self, name: str, first_response_ms: Optional[float], total_ms: float, failed: bool):
+        stats = self.commands.get(name)
+        if stats is None:
+            stats = self.commands[name] = CommandStats()
+        stats.total.observe(total_ms)
+        if first_response_ms is None:
+            stats.no_response += 1
+        else:
+            stats.first_response.observe(first_response_ms)
+            if first_response_ms >= RESPONSE_DEADLINE_MS:
+                stats.late += 1
+        if failed:
+            stats.errors += 1
+
+    def top(self, limit: int = 15, sort_by: str = "p99") -> List[Tuple[str, CommandStats]]:
+        keys = {
+            "p99": lambda item: item[1].first_response.percentile(99),
+            "count": lambda item: item[1].total.count,
+            "errors": lambda item: item[1].errors,
+            "total": lambda item: item[1].total.total,
+        }
+        return sorted(self.commands.items(), key=keys.get(sort_by, keys["p99"]), reverse=True)[:limit]
+
+    def reset(self):
+        self.commands.clear()
+        self.started_at = time.time()
+
+
+class InstrumentedCommandTree(app_commands.CommandTree):
+    """CommandTree qui enregistre la latence de chaque commande dans `self.metrics`."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = CommandMetrics()
+        self.enabled = _instrumentation_supported()
+        if not self.enabled:
+            print(f"AVERTISSEMENT : discord.py {discord.__version__} non pris en charge, latence des commandes non mesurée.")
+
+    async def _call(self, interaction: discord.Interaction):
+        if not self.enabled:
+            return await super()._call(interaction)
+        # Même technique que la bibliothèque : on pré-remplit le slot de `interaction.response`.
+        response = interaction._cs_response = _TimedResponse(interaction)
+        started = time.perf_counter()
+        failed = True
+        try:
+            await super()._call(interaction)
+            failed = interaction.command_failed
+        finally:
+            finished = time.perf_counter()
+            command = interaction.command
+            name = command.qualified_name if command is not None else interaction.data.get("name", "inconnue")
+            if interaction.type is discord.InteractionType.autocomplete:
+                name += " (autocomplétion)"
+            first_response = (response.responded_at - started) * 1000 if response.responded_at else None
+            self.metrics.record(name, first_response, (finished - started) * 1000, failed)
@@ -0,0 +1,91 @@
+# utils/cooldowns.py
+"""
+Cooldowns en mémoire, à clés tuples d'entiers (ex. (guild_id, user_id)) : délai fixe après
+chaque déclenchement (XP par message, /daily, demandes en mariage).
+
+Les entrées expirées sont retirées au fil de l'eau grâce à un tas trié par date
+d'expiration : la mémoire reste proportionnelle aux clés actives, pas à l'uptime.
+"""
+import asyncio
+import heapq
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Hashable, List, Optional, Tuple
+
+
+class _ExpiringKeys(ABC):
+    """Base commune : tas (expiration, clé) avec suppression paresseuse des entrées périmées."""
+
+    def __init__(self):
+        self._heap: List[Tuple[float, Hashable]] = []
+
+    @abstractmethod
+    def _expiry(self, key: Hashable) -> Optional[float]:
+        """Date d'expiration actuelle de `key` (None si la clé n'existe plus)."""
+
+    @abstractmethod
+    def _drop(self, key: Hashable):
+        """Retire `key`, expirée."""
+
+    def _schedule(self, key: Hashable, expires_at: float):
+        heapq.heappush(self._heap, (expires_at, key))
+
+    def _evict(self, now: float):
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            expires_at, key = heapq.heappop(heap)
+            # Entrée du tas obsolète si la clé a été prolongée depuis.
+            current = self._expiry(key)
+            if current is not None and current <= now:
+                self._drop(key)
+
+
+class Cooldown(_ExpiringKeys):
+    def __init__(self, per: float):
+        super().__init__()
+        self.per = per
+        self._until: Dict[Hashable, float] = {}
+
+    def _expiry(self, key):
+        return self._until.get(key)
+
+    def _drop(self, key):
+        del self._until[key]
+
+    def retry_after(self, key: Hashable, now: Optional[float] = None) -> float:
+        """Secondes restantes avant la fin du cooldown (0.0 s'il n'y en a pas)."""
+        now = time.monotonic() if now is None else now
+        self._evict(now)
+        until = self._until.get(key)
+        return until - now if until is not None and until > now else 0.0
+
+    def trigger(self, key: Hashable, duration: Optional[float] = None, now: Optional[float] = None):
+        """Démarre (ou redémarre) le cooldown de `key` pour `duration` secondes (défaut : `per`)."""
+        now = time.monotonic() if now is None else now
+        until = now + (self.per if duration is None else duration)
+        self._until[key] = until
+        self._schedule(key, until)
+
+    async def reserve(self, key: Hashable, interval: Optional[float] = None):
+        """
+        Attend le prochain créneau libre de `key` et le réserve : les appels successifs sur une
+        même clé sont espacés d'au moins `interval` secondes (défaut : `per`), même simultanés.
+        """
+        delay = self.retry_after(key)
+        self.trigger(key, duration=delay + (self.per if interval is None else interval))
+        if delay:
+            await asyncio.sleep(delay)
+
+    def hit(self, key: Hashable, now: Optional[float] = None) -> float:
+        """Déclenche le cooldown s'il est libre et retourne 0.0, sinon retourne le temps restant."""
+        now = time.monotonic() if now is None else now
+        remaining = self.retry_after(key, now)
+        if not remaining:
+            self.trigger(key, now=now)
+        return remaining
+
+    def reset(self, key: Hashable):
+        self._until.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._until)
@@ -1,32 +1,125 @@
 # utils/database.py
 import aiosqlite
+import asyncio
 import os
 import traceback
 import json
-from typing import Optional, Dict, List, Any
+import time
+from urllib.request import pathname2url
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Optional, Dict, List, Any, Tuple
 from datetime import datetime, timezone
 
+from utils.migrations import apply_migrations, check_query_plans, LATEST_VERSION
+from utils.metrics import QueryStats, caller_origin, SLOW_QUERY_THRESHOLD_MS
+from utils import level_curve, queries
+
 # --- Configuration du chemin de la base de données ---
 DATA_DIR = './data'
 DB_PATH = os.path.join(DATA_DIR, 'database.db')
 
+# --- Regroupement des écritures (group commit) ---
+# Délai maximal (en secondes) pendant lequel une écriture attend d'autres écritures
+# avant le COMMIT commun, et taille maximale d'un lot.
+BATCH_INTERVAL = 0.005
+BATCH_MAX_SIZE = 100
+
+# --- Profil SQLite ---
+# Journal WAL : les lecteurs ne bloquent plus l'écrivain (et inversement).
+# synchronous=NORMAL est sûr en WAL : un crash du bot ne perd aucune transaction validée.
+CONNECTION_PRAGMAS = (
+    "PRAGMA foreign_keys = ON;",
+    "PRAGMA busy_timeout = 5000;",
+    "PRAGMA synchronous = NORMAL;",
+    "PRAGMA temp_store = MEMORY;",
+    "PRAGMA cache_size = -16000;",   # ~16 Mo de cache de pages par connexion
+    "PRAGMA mmap_size = 134217728;",  # 128 Mo
+)
+# Nombre de connexions en lecture seule utilisées par fetch_one/fetch_all.
+READ_POOL_SIZE = 4
+
+# --- Cache des paramètres de serveur ---
+# Colonnes JSON de guild_settings, décodées une seule fois à la mise en cache.
+GUILD_SETTINGS_JSON_KEYS = ("suggestions_config", "ticket_config", "automod_config", "leveling_config")
+# Une entrée non consultée depuis ce délai (secondes) est évincée du cache.
+SETTINGS_CACHE_IDLE_TTL = 600
+SETTINGS_CACHE_SWEEP_INTERVAL = 60
+
+# Type d'infraction des avertissements (ancienne table `warnings`, fusionnée dans `infractions`).
+WARNING_TYPE = "avertissement"
+
+# Transaction explicite en cours pour la tâche courante (voir DatabaseManager.transaction).
+_active_transaction: ContextVar[Optional["DatabaseManager"]] = ContextVar("_active_transaction", default=None)
+
+
+class _QueryTimer:
+    """Mesure la durée d'une requête et l'enregistre dans les statistiques."""
+    __slots__ = ("stats", "kind", "query", "started")
+
+    def __init__(self, stats: QueryStats, kind: str, query: str):
+        self.stats = stats
+        self.kind = kind
+        self.query = query
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed_ms = (time.perf_counter() - self.started) * 1000
+        self.stats.record(self.kind, self.query, elapsed_ms, exc_type is not None, caller_origin())
+        return False
+
 
 class DatabaseManager:
     """
     Gère toutes les interactions avec la base de données SQLite de manière asynchrone.
     """
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, batch_writes: bool = False,
+                 batch_interval: float = BATCH_INTERVAL, batch_max_size: int = BATCH_MAX_SIZE,
+                 read_pool_size: int = READ_POOL_SIZE,
+                 slow_query_threshold_ms: float = SLOW_QUERY_THRESHOLD_MS):
         self.db_path = db_path
+        # Temps passé dans SQLite par forme de requête et par cog (voir /debug-db).
+        self.stats = QueryStats(slow_threshold_ms=slow_query_threshold_ms)
         self._connection: Optional[aiosqlite.Connection] = None
+        # Connexions en lecture seule (une par thread aiosqlite), l'écrivain reste unique.
+        self.read_pool_size = read_pool_size if db_path != ":memory:" else 0
+        self._readers: List[aiosqlite.Connection] = []
+        self._read_pool: Optional[asyncio.Queue] = None
+        # Une seule écriture (ou transaction) à la fois sur la connexion.
+        self._write_lock = asyncio.Lock()
+        # Mode "write-behind" : les écritures sont mises en file et validées par lots.
+        self.batch_writes = batch_writes
+        self.batch_interval = batch_interval
+        self.batch_max_size = batch_max_size
+        self._write_queue: List[Tuple[str, tuple, asyncio.Future, bool]] = []
+        self._write_pending = asyncio.Event()
+        self._batch_full = asyncio.Event()
+        self._writer_task: Optional[asyncio.Task] = None
+        self._writer_stopping = False
+        # Cache des paramètres de serveur décodés : guild_id -> [paramètres, dernier accès].
+        self._settings_cache: Dict[int, list] = {}
+        self._settings_generation: Dict[int, int] = {}
+        self._settings_last_sweep = time.monotonic()
+        self.settings_cache_hits = 0
+        self.settings_cache_misses = 0
+        self.settings_cache_evictions = 0
 
     async def connect(self):
-        """Établit la connexion à la base de données."""
-        """Établit la connexion à la base de données."""
+        """Établit la connexion d'écriture, passe en WAL et ouvre le pool de lecture."""
         try:
             os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
             self._connection = await aiosqlite.connect(self.db_path)
             self._connection.row_factory = aiosqlite.Row
-            await self._connection.execute("PRAGMA foreign_keys = ON;")
+            await self._connection.execute("PRAGMA journal_mode = WAL;")
+            for pragma in CONNECTION_PRAGMAS:
+                await self._connection.execute(pragma)
+            await self._register_functions()
+            await self._open_read_pool()
+            if self.batch_writes:
+                self._writer_task = asyncio.create_task(self._batch_writer())
             print(f"Connexion à la base de données '{self.db_path}' réussie.")
             # L'initialisation des tables sera maintenant gérée explicitement depuis main.py
             # L'initialisation des tables sera maintenant gérée explicitement depuis main.py
@@ -36,145 +129,243 @@ class DatabaseManager:
             self._connection = None
             raise e
 
-    # ==============================================================================
-    # --- MODIFICATION 1 : RENOMMAGE ET AJOUT DE LA TABLE ---
-    # Renommé en "initialize_tables" pour être plus clair et public.
+    async def _register_functions(self):
+        """Fonctions SQL de la courbe de niveaux (utils/level_curve.py), pour les écritures d'XP."""
+        await self._connection.create_function("xp_total", 2, level_curve.to_total, deterministic=True)
+        await self._connection.create_function("level_of_total", 1, level_curve.level_for_total, deterministic=True)
+        await self._connection.create_function("xp_in_level", 1, level_curve.xp_in_level, deterministic=True)
+
+    async def _open_read_pool(self):
+        """Ouvre `read_pool_size` connexions en lecture seule sur le même fichier."""
+        if self.read_pool_size <= 0:
+            return
+        uri = f"file:{pathname2url(os.path.abspath(self.db_path))}?mode=ro"
+        self._read_pool = asyncio.Queue()
+        for _ in range(self.read_pool_size):
+            reader = await aiosqlite.connect(uri, uri=True)
+            reader.row_factory = aiosqlite.Row
+            for pragma in CONNECTION_PRAGMAS:
+                await reader.execute(pragma)
+            await reader.execute("PRAGMA query_only = ON;")
+            self._readers.append(reader)
+            self._read_pool.put_nowait(reader)
+
+    @asynccontextmanager
+    async def _reader(self):
+        """
+        Emprunte une connexion de lecture au pool.
+        Dans une transaction explicite, on lit sur l'écrivain pour voir ses propres écritures.
+        """
+        if self._read_pool is None or _active_transaction.get() is self:
+            yield self._connection
+            return
+        reader = await self._read_pool.get()
+        try:
+            yield reader
+        finally:
+            self._read_pool.put_nowait(reader)
+
     async def initialize_tables(self):
-    # ==============================================================================
-    # ==============================================================================
-    # --- MODIFICATION 1 : RENOMMAGE ET AJOUT DE LA TABLE ---
-    # Renommé en "initialize_tables" pour être plus clair et public.
-        async def initialize_tables(self):
-    # ==============================================================================
-            """Crée les tables nécessaires si elles n'existent pas."""
+        """
+        Met le schéma à jour via les migrations versionnées (voir utils/migrations.py),
+        puis vérifie que les requêtes fréquentes utilisent bien leurs index.
+        """
         if not self._connection:
             print("ERREUR: Impossible d'initialiser les tables, pas de connexion DB.")
             return
 
-        sql_schema = """
-        BEGIN TRANSACTION;
-
-        CREATE TABLE IF NOT EXISTS warnings (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            guild_id INTEGER NOT NULL,
-            user_id INTEGER NOT NULL,
-            moderator_id INTEGER NOT NULL,
-            reason TEXT,
-            timestamp TEXT NOT NULL
-        );
-
-        CREATE TABLE IF NOT EXISTS guild_settings (
-            guild_id INTEGER PRIMARY KEY,
-            log_channel_id INTEGER,
-            suggestions_config TEXT,
-            feedback_channel_id INTEGER,
-            birthday_channel_id INTEGER,
-            ticket_config TEXT,
-            automod_config TEXT
-        );
-        
-        CREATE TABLE IF NOT EXISTS temp_bans (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            guild_id INTEGER NOT NULL,
-            user_id INTEGER NOT NULL,
-            unban_timestamp REAL NOT NULL
-        );
-
-        CREATE TABLE IF NOT EXISTS marriages (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            guild_id INTEGER NOT NULL,
-            user1_id INTEGER NOT NULL, -- Stocke toujours le plus petit ID
-            user2_id INTEGER NOT NULL, -- Stocke toujours le plus grand ID
-            marriage_timestamp TEXT NOT NULL,
-            UNIQUE (guild_id, user1_id, user2_id)
-        );
-
-        CREATE TABLE IF NOT EXISTS prison (
-            guild_id INTEGER NOT NULL,
-            user_id INTEGER NOT NULL,
-            prison_channel_id INTEGER NOT NULL,
-            moderator_id INTEGER NOT NULL,
-            reason TEXT,
-            timestamp TEXT NOT NULL,
-            saved_roles TEXT, -- Sera NULL pour les non-admins
-            PRIMARY KEY (guild_id, user_id)
-        );
-
-        -- ==============================================================================
-        -- MODIFICATION 2 : AJOUT DE LA TABLE MANQUANTE POUR LE LEVELING ET L'ÉCONOMIE
-        CREATE TABLE IF NOT EXISTS user_data (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            guild_id INTEGER NOT NULL,
-            user_id INTEGER NOT NULL,
-            xp INTEGER DEFAULT 0,
-            level INTEGER DEFAULT 1,
-            money INTEGER DEFAULT 0,
-            UNIQUE(guild_id, user_id)
-        );
-        -- ==============================================================================
-
-        -- ==============================================================================
-        -- MODIFICATION 2 : AJOUT DE LA TABLE MANQUANTE POUR LE LEVELING ET L'ÉCONOMIE
-        CREATE TABLE IF NOT EXISTS user_data (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            guild_id INTEGER NOT NULL,
-            user_id INTEGER NOT NULL,
-            xp INTEGER DEFAULT 0,
-            level INTEGER DEFAULT 1,
-            money INTEGER DEFAULT 0,
-            UNIQUE(guild_id, user_id)
-        );
-        -- ==============================================================================
-
-        COMMIT;
-        """
         try:
-            await self._connection.executescript(sql_schema)
-            print("Schéma de la base de données complet vérifié/initialisé.")
+            async with self._write_lock:
+                await apply_migrations(self._connection)
+                problems = await check_query_plans(self._connection)
+            print(f"Schéma de la base de données vérifié/initialisé (v{LATEST_VERSION}).")
+            for problem in problems:
+                print(f"ATTENTION (plan d'exécution) : {problem}")
         except Exception as e:
             print(f"ERREUR lors de l'initialisation des tables : {e}")
             traceback.print_exc()
 
     async def close(self):
         """Ferme la connexion à la base de données."""
+        if self._writer_task:
+            # Arrêt en douceur (sans annulation) : la tâche termine le lot en cours, vide la file puis s'arrête.
+            self._writer_stopping = True
+            self._write_pending.set()
+            self._batch_full.set()
+            await self._writer_task
+            self._writer_task = None
+            self._writer_stopping = False
         if self._connection:
+            # On valide les écritures encore en file avant de fermer.
+            await self._flush_batch()
+            for reader in self._readers:
+                await reader.close()
+            self._readers = []
+            self._read_pool = None
             await self._connection.close()
+            self._connection = None
             print("Connexion à la base de données fermée.")
 
     # --- Méthodes Génériques ---
     async def execute(self, query: str, params: tuple = ()):
+        """
+        Exécute une écriture et attend qu'elle soit validée (COMMIT).
+        Dans un bloc `transaction()`, la validation est reportée à la fin du bloc.
+        En mode `batch_writes`, l'écriture rejoint le prochain lot.
+        """
+        await self._write(query, params, fetch=False)
+
+    async def execute_returning(self, query: str, params: tuple = ()) -> List[Dict]:
+        """Comme `execute`, pour une écriture avec clause RETURNING : retourne les lignes produites."""
+        return await self._write(query, params, fetch=True)
+
+    async def executemany(self, query: str, params_seq: List[tuple]):
+        """Exécute la même écriture pour chaque jeu de paramètres, avec un seul COMMIT."""
+        if not self._connection: raise ConnectionError("La base de données n'est pas connectée.")
+        if not params_seq:
+            return
+        with _QueryTimer(self.stats, "write", query):
+            if _active_transaction.get() is self:
+                await self._connection.executemany(query, params_seq)
+                return
+            # Déjà un lot en soi : on ne passe pas par la file d'écritures groupées.
+            async with self._write_lock:
+                await self._connection.executemany(query, params_seq)
+                await self._connection.commit()
+
+    async def _write(self, query: str, params: tuple, fetch: bool):
+        if not self._connection: raise ConnectionError("La base de données n'est pas connectée.")
+        with _QueryTimer(self.stats, "write", query):
+            if _active_transaction.get() is self:
+                return await self._run_statement(query, params, fetch)
+            if self.batch_writes:
+                return await self.submit_write(query, params, fetch=fetch)
+            async with self._write_lock:
+                rows = await self._run_statement(query, params, fetch)
+                await self._connection.commit()
+                return rows
+
+    async def _run_statement(self, query: str, params: tuple, fetch: bool) -> Optional[List[Dict]]:
+        """Exécute une instruction sur l'écrivain, sans COMMIT."""
+        async with self._connection.execute(query, params) as cursor:
+            if fetch:
+                return [dict(row) for row in await cursor.fetchall()]
+        return None
+
+    def submit_write(self, query: str, params: tuple = (), fetch: bool = False) -> asyncio.Future:
+        """
+        Met une écriture en file pour le prochain lot et retourne immédiatement
+        un awaitable résolu une fois l'écriture validée sur disque.
+        """
         if not self._connection: raise ConnectionError("La base de données n'est pas connectée.")
-        async with self._connection.cursor() as cursor:
-            await cursor.execute(query, params)
-            await self._connection.commit()
+        if not self.batch_writes:
+            return asyncio.ensure_future(self._write(query, params, fetch))
+        future = asyncio.get_running_loop().create_future()
+        self._write_queue.append((query, params, future, fetch))
+        if len(self._write_queue) >= self.batch_max_size:
+            self._batch_full.set()
+        self._write_pending.set()
+        return future
+
+    @asynccontextmanager
+    async def transaction(self):
+        """
+        Regroupe plusieurs écritures dans une seule transaction (un seul COMMIT).
+        Usage : `async with db.transaction(): await db.execute(...); ...`
+        En cas d'exception, tout est annulé (ROLLBACK).
+        """
+        if not self._connection: raise ConnectionError("La base de données n'est pas connectée.")
+        if _active_transaction.get() is self:
+            # Transaction imbriquée : on réutilise la transaction englobante.
+            yield self
+            return
+        async with self._write_lock:
+            token = _active_transaction.set(self)
+            try:
+                yield self
+            except BaseException:
+                await self._connection.rollback()
+                raise
+            else:
+                await self._connection.commit()
+            finally:
+                _active_transaction.reset(token)
+
+    async def _batch_writer(self):
+        """Tâche de fond : valide les écritures en file par lots."""
+        while True:
+            await self._write_pending.wait()
+            self._write_pending.clear()
+            # On laisse le lot se remplir pendant `batch_interval`, sauf s'il est déjà plein (ou à l'arrêt).
+            if not self._writer_stopping and len(self._write_queue) < self.batch_max_size:
+                try:
+                    await asyncio.wait_for(self._batch_full.wait(), timeout=self.batch_interval)
+                except asyncio.TimeoutError:
+                    pass
+            self._batch_full.clear()
+            try:
+                await self._flush_batch()
+            except Exception as e:
+                print(f"ERREUR lors de la validation d'un lot d'écritures : {e}")
+                traceback.print_exc()
+            if self._writer_stopping:
+                if not self._write_queue:
+                    return
+                self._write_pending.set()
+
+    async def _flush_batch(self):
+        """Exécute toutes les écritures en file puis les valide avec un seul COMMIT."""
+        if not self._write_queue:
+            return
+        batch, self._write_queue = self._write_queue, []
+        results = []
+        async with self._write_lock:
+            for query, params, future, fetch in batch:
+                try:
+                    rows = await self._run_statement(query, params, fetch)
+                    results.append((future, rows, None))
+                except Exception as e:
+                    # SQLite n'annule que l'instruction fautive, le reste du lot est conservé.
+                    results.append((future, None, e))
+            try:
+                await self._connection.commit()
+            except Exception as e:
+                await self._connection.rollback()
+                results = [(future, None, e) for future, _, _ in results]
+        for future, rows, error in results:
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(rows)
 
     async def fetch_one(self, query: str, params: tuple = ()):
         if not self._connection: raise ConnectionError("La base de données n'est pas connectée.")
-        async with self._connection.cursor() as cursor:
-            await cursor.execute(query, params)
-            row = await cursor.fetchone()
-            return dict(row) if row else None
+        with _QueryTimer(self.stats, "read", query):
+            async with self._reader() as connection:
+                async with connection.cursor() as cursor:
+                    await cursor.execute(query, params)
+                    row = await cursor.fetchone()
+                    return dict(row) if row else None
 
     async def fetch_all(self, query: str, params: tuple = ()):
         if not self._connection: raise ConnectionError("La base de données n'est pas connectée.")
-        async with self._connection.cursor() as cursor:
-            await cursor.execute(query, params)
-            rows = await cursor.fetchall()
-            return [dict(row) for row in rows]
+        with _QueryTimer(self.stats, "read", query):
+            async with self._reader() as connection:
+                async with connection.cursor() as cursor:
+                    await cursor.execute(query, params)
+                    rows = await cursor.fetchall()
+                    return [dict(row) for row in rows]
 
     # --- Warnings ---
+    # Les avertissements sont des infractions de type "avertissement" (migration v9).
     async def add_warning(self, guild_id: int, user_id: int, moderator_id: int, reason: str):
-        query = "INSERT INTO warnings (guild_id, user_id, moderator_id, reason, timestamp) VALUES (?, ?, ?, ?, ?)"
-        timestamp_str = datetime.now(timezone.utc).isoformat()
-        await self.execute(query, (guild_id, user_id, moderator_id, reason, timestamp_str))
-
-    async def get_warnings(self, guild_id: int, user_id: int) -> List[Dict]:
-        query = "SELECT id, moderator_id, reason, timestamp FROM warnings WHERE guild_id = ? AND user_id = ?"
-        return await self.fetch_all(query, (guild_id, user_id))
+        await self.add_infraction(guild_id, user_id, moderator_id, WARNING_TYPE, reason)
 
     async def clear_warnings(self, guild_id: int, user_id: int):
-        query = "DELETE FROM warnings WHERE guild_id = ? AND user_id = ?"
-        await self.execute(query, (guild_id, user_id))
+        query = "DELETE FROM infractions WHERE guild_id = ? AND user_id = ? AND type = ?"
+        await self.execute(query, (guild_id, user_id, WARNING_TYPE))
 
     # --- Bans Temporaires ---
     async def add_temp_ban(self, guild_id: int, user_id: int, unban_timestamp: float):
@@ -182,8 +373,7 @@ class DatabaseManager:
         await self.execute(query, (guild_id, user_id, unban_timestamp))
 
     async def get_expired_bans(self, current_timestamp: float) -> List[Dict]:
-        query = "SELECT id, guild_id, user_id FROM temp_bans WHERE unban_timestamp <= ?"
-        return await self.fetch_all(query, (current_timestamp,))
+        return await self.fetch_all(queries.EXPIRED_BANS, (current_timestamp,))
 
     async def remove_temp_ban(self, ban_id: int):
         query = "DELETE FROM temp_bans WHERE id = ?"
@@ -191,12 +381,7 @@ class DatabaseManager:
 
     # --- Mariages ---
     async def get_partners(self, guild_id: int, user_id: int) -> list:
-        query = """
-            SELECT user2_id as partner_id FROM marriages WHERE guild_id = ? AND user1_id = ?
-            UNION
-            SELECT user1_id as partner_id FROM marriages WHERE guild_id = ? AND user2_id = ?
-        """
-        rows = await self.fetch_all(query, (guild_id, user_id, guild_id, user_id))
+        rows = await self.fetch_all(queries.PARTNERS, (guild_id, user_id, guild_id, user_id))
         return [row['partner_id'] for row in rows]
 
     async def are_married(self, guild_id: int, user1_id: int, user2_id: int) -> bool:
@@ -248,26 +433,85 @@ class DatabaseManager:
 
     # --- Guild Settings ---
     async def get_guild_settings(self, guild_id: int) -> Optional[Dict]:
+        """
+        Retourne les paramètres du serveur, colonnes JSON déjà décodées (None si aucun).
+        Le résultat est servi depuis le cache : le traiter en lecture seule et passer par
+        `update_guild_setting` pour toute modification.
+        """
+        now = time.monotonic()
+        if now - self._settings_last_sweep >= SETTINGS_CACHE_SWEEP_INTERVAL:
+            self._sweep_settings_cache(now)
+
+        entry = self._settings_cache.get(guild_id)
+        if entry is not None:
+            entry[1] = now
+            self.settings_cache_hits += 1
+            return entry[0]
+
+        self.settings_cache_misses += 1
+        generation = self._settings_generation.get(guild_id, 0)
         query = "SELECT * FROM guild_settings WHERE guild_id = ?"
         settings = await self.fetch_one(query, (guild_id,))
         if settings:
-            for key in ["suggestions_config", "ticket_config", "automod_config"]:
-                if settings.get(key) and isinstance(settings[key], str):
-                    try:
-                        settings[key] = json.loads(settings[key])
-                    except json.JSONDecodeError:
-                        settings[key] = {}
+            for key in GUILD_SETTINGS_JSON_KEYS:
+                settings[key] = self._decode_setting(settings.get(key))
+        # Si une écriture a eu lieu pendant la lecture, on ne met pas en cache une valeur périmée.
+        if self._settings_generation.get(guild_id, 0) == generation:
+            self._settings_cache[guild_id] = [settings, now]
         return settings
+
+    @staticmethod
+    def _decode_setting(value: Any) -> Dict:
+        if isinstance(value, dict):
+            return value
+        if not value:
+            return {}
+        try:
+            return json.loads(value)
+        except (TypeError, json.JSONDecodeError):
+            return {}
+
+    def _sweep_settings_cache(self, now: float):
+        """Évince les serveurs dont les paramètres n'ont pas été lus récemment."""
+        self._settings_last_sweep = now
+        idle = [gid for gid, (_, last_access) in self._settings_cache.items() if now - last_access >= SETTINGS_CACHE_IDLE_TTL]
+        for guild_id in idle:
+            del self._settings_cache[guild_id]
+        self.settings_cache_evictions += len(idle)
+
+    def settings_cache_stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._settings_cache),
+            "hits": self.settings_cache_hits,
+            "misses": self.settings_cache_misses,
+            "evictions": self.settings_cache_evictions,
+        }
         
     async def update_guild_setting(self, guild_id: int, key: str, value: Any):
-        if isinstance(value, dict):
-            value = json.dumps(value)
+        """Écrit un paramètre puis met à jour le cache (write-through)."""
+        stored = json.dumps(value) if isinstance(value, dict) else value
         query = f"""
             INSERT INTO guild_settings (guild_id, {key})
             VALUES (?, ?)
             ON CONFLICT(guild_id) DO UPDATE SET {key} = excluded.{key}
         """
-        await self.execute(query, (guild_id, value))
+        self._settings_generation[guild_id] = self._settings_generation.get(guild_id, 0) + 1
+        try:
+            await self.execute(query, (guild_id, stored))
+        except Exception:
+            self._settings_cache.pop(guild_id, None)
+            raise
+        entry = self._settings_cache.get(guild_id)
+        if entry is None:
+            return
+        if entry[0] is None:
+            # La ligne vient d'être créée : on la relira entièrement au prochain accès.
+            del self._settings_cache[guild_id]
+        elif key in GUILD_SETTINGS_JSON_KEYS:
+            # Copie décodée : le cache ne partage pas le dict de l'appelant.
+            entry[0][key] = self._decode_setting(stored)
+        else:
+            entry[0][key] = value
 
     # --- Méthodes pour le Leveling et les Données Utilisateur ---
     async def get_user_data(self, guild_id: int, user_id: int) -> Dict:
@@ -279,11 +523,9 @@ class DatabaseManager:
         user_data = await self.fetch_one(query, (guild_id, user_id))
 
         if not user_data:
-            insert_query = "INSERT OR IGNORE INTO user_data (guild_id, user_id) VALUES (?, ?)"
             insert_query = "INSERT OR IGNORE INTO user_data (guild_id, user_id) VALUES (?, ?)"
             await self.execute(insert_query, (guild_id, user_id))
             return await self.fetch_one(query, (guild_id, user_id))
-            return await self.fetch_one(query, (guild_id, user_id))
         
         return user_data
 
@@ -292,23 +534,315 @@ class DatabaseManager:
         query = """
             UPDATE user_data SET xp = ?, level = ?
             WHERE guild_id = ? AND user_id = ?
-            UPDATE user_data SET xp = ?, level = ?
-            WHERE guild_id = ? AND user_id = ?
         """
         await self.execute(query, (new_xp, new_level, guild_id, user_id))
-        await self.execute(query, (new_xp, new_level, guild_id, user_id))
+
+    async def add_xp(self, guild_id: int, user_id: int, delta: int) -> Dict:
+        """
+        Ajoute `delta` XP de façon atomique, en une seule instruction (crée la ligne si besoin).
+        Les passages de niveau, même multiples, sont résolus dans la même requête via les
+        fonctions SQL de utils/level_curve.py (`xp` étant l'XP accumulée dans le niveau courant).
+        Retourne {"xp", "level", "leveled_up"}.
+        """
+        query = """
+            INSERT INTO user_data (guild_id, user_id, xp, level)
+            VALUES (:guild_id, :user_id, xp_in_level(:delta), level_of_total(:delta))
+            ON CONFLICT(guild_id, user_id) DO UPDATE SET
+                level = level_of_total(xp_total(level, xp) + :delta),
+                xp = xp_in_level(xp_total(level, xp) + :delta)
+            RETURNING xp, level
+        """
+        params = {"guild_id": guild_id, "user_id": user_id, "delta": delta}
+        row = (await self.execute_returning(query, params))[0]
+        # L'XP d'un niveau reste sous son seuil : si le nouveau reste est inférieur au gain,
+        # c'est qu'un seuil a été franchi pendant cette mise à jour.
+        row["leveled_up"] = delta > 0 and row["xp"] < delta
+        return row
     
     async def get_leaderboard(self, guild_id: int, limit: int = 10) -> List[Dict]:
-        """Récupère le classement des utilisateurs par XP."""
+        """Récupère le classement des utilisateurs par XP (lu directement dans l'ordre de l'index)."""
+        return await self.fetch_all(queries.XP_LEADERBOARD, (guild_id, limit))
+
+    async def get_rank(self, guild_id: int, user_id: int, position: Optional[Tuple[int, int]] = None) -> Optional[Dict]:
+        """
+        Retourne {"user_id", "xp", "level", "rank"} pour un membre (None s'il n'a pas d'XP).
+        Le rang est un comptage sur l'index du classement, sans charger la population du serveur.
+        `position` : (level, xp) déjà connus (ex. tampon d'XP), utilisés à la place de la ligne en base.
+        """
+        if position is not None:
+            user = {"user_id": user_id, "xp": position[1], "level": position[0]}
+        else:
+            user = await self.fetch_one(
+                "SELECT user_id, xp, level FROM user_data WHERE guild_id = ? AND user_id = ?",
+                (guild_id, user_id)
+            )
+            if not user:
+                return None
+        row = await self.fetch_one(queries.XP_RANK, (guild_id, user["level"], user["xp"], user_id))
+        user["rank"] = row["above"] + 1
+        return user
+
+    async def get_leaderboard_window(self, guild_id: int, user_id: int, radius: int = 2,
+                                     position: Optional[Tuple[int, int]] = None) -> List[Dict]:
+        """
+        Retourne le membre et jusqu'à `radius` voisins de chaque côté dans le classement,
+        chaque ligne portant son rang. Liste vide si le membre n'a pas d'XP.
+        `position` : (level, xp) à jour du membre, voir `get_rank`.
+        """
+        user = await self.get_rank(guild_id, user_id, position)
+        if not user:
+            return []
+        # Une ligne de plus en dessous : l'ancienne ligne en base du membre peut s'y trouver.
+        position = (guild_id, user["level"], user["xp"], user_id, radius + 1)
+        above = await self.fetch_all(queries.XP_WINDOW_ABOVE, position)
+        below = await self.fetch_all(queries.XP_WINDOW_BELOW, position)
+        above = [row for row in above if row["user_id"] != user_id][:radius]
+        below = [row for row in below if row["user_id"] != user_id][:radius]
+        window = list(reversed(above)) + [user] + below
+        first_rank = user["rank"] - len(above)
+        for offset, row in enumerate(window):
+            row["rank"] = first_rank + offset
+        return window
+    
+    # --- Économie (soldes, inventaires, daily) ---
+    async def get_balance(self, guild_id: int, user_id: int) -> Dict:
+        """Retourne {"balance", "inventory", "last_daily"} (valeurs par défaut si le membre n'a rien)."""
+        query = "SELECT balance, inventory, last_daily FROM user_balances WHERE guild_id = ? AND user_id = ?"
+        row = await self.fetch_one(query, (guild_id, user_id))
+        if not row:
+            return {"balance": 0, "inventory": [], "last_daily": None}
+        try:
+            row["inventory"] = json.loads(row["inventory"] or "[]")
+        except json.JSONDecodeError:
+            row["inventory"] = []
+        return row
+
+    async def add_balance(self, guild_id: int, user_id: int, delta: int) -> int:
+        """Ajoute `delta` (éventuellement négatif) au solde, de façon atomique. Retourne le nouveau solde."""
         query = """
-            SELECT user_id, xp, level 
-            FROM user_data 
-            WHERE guild_id = ? 
-            ORDER BY level DESC, xp DESC 
-            ORDER BY level DESC, xp DESC 
-            LIMIT ?
-        """
-        return await self.fetch_all(query, (guild_id, limit))
+            INSERT INTO user_balances (guild_id, user_id, balance) VALUES (?, ?, ?)
+            ON CONFLICT(guild_id, user_id) DO UPDATE SET balance = balance + excluded.balance
+            RETURNING balance
+        """
+        rows = await self.execute_returning(query, (guild_id, user_id, delta))
+        return rows[0]["balance"]
+
+    async def claim_daily(self, guild_id: int, user_id: int, amount: int, claimed_at: str, not_after: str) -> Optional[int]:
+        """
+        Crédite la récompense quotidienne et enregistre sa date, seulement si le dernier daily
+        est antérieur à `not_after` (dates ISO UTC). Retourne le nouveau solde, ou None si
+        le daily a déjà été réclamé (deux /daily simultanés ne créditent qu'une fois).
+        """
+        query = """
+            INSERT INTO user_balances (guild_id, user_id, balance, last_daily) VALUES (?, ?, ?, ?)
+            ON CONFLICT(guild_id, user_id) DO UPDATE SET
+                balance = balance + excluded.balance,
+                last_daily = excluded.last_daily
+            WHERE user_balances.last_daily IS NULL OR user_balances.last_daily <= ?
+            RETURNING balance
+        """
+        rows = await self.execute_returning(query, (guild_id, user_id, amount, claimed_at, not_after))
+        return rows[0]["balance"] if rows else None
+
+    async def get_balance_leaderboard(self, guild_id: int, limit: int = 10) -> List[Dict]:
+        return await self.fetch_all(queries.BALANCE_LEADERBOARD, (guild_id, limit))
+
+    # --- Boutique ---
+    async def get_shop_config(self, guild_id: int) -> Dict:
+        query = "SELECT currency_name, currency_emoji FROM shop_config WHERE guild_id = ?"
+        return await self.fetch_one(query, (guild_id,)) or {"currency_name": "Points", "currency_emoji": "💰"}
+
+    async def set_shop_config(self, guild_id: int, currency_name: str, currency_emoji: str):
+        query = """
+            INSERT INTO shop_config (guild_id, currency_name, currency_emoji) VALUES (?, ?, ?)
+            ON CONFLICT(guild_id) DO UPDATE SET
+                currency_name = excluded.currency_name,
+                currency_emoji = excluded.currency_emoji
+        """
+        await self.execute(query, (guild_id, currency_name, currency_emoji))
+
+    async def get_shop_items(self, guild_id: int) -> List[Dict]:
+        query = "SELECT * FROM shop_items WHERE guild_id = ? ORDER BY price, xp_cost"
+        return await self.fetch_all(query, (guild_id,))
+
+    async def get_shop_item(self, guild_id: int, item_key: str) -> Optional[Dict]:
+        query = "SELECT * FROM shop_items WHERE guild_id = ? AND item_key = ?"
+        return await self.fetch_one(query, (guild_id, item_key))
+
+    async def add_shop_item(self, guild_id: int, item_key: str, item: Dict) -> bool:
+        """Ajoute un article. Retourne False si un article porte déjà cette clé."""
+        query = """
+            INSERT INTO shop_items (guild_id, item_key, display_name, description, price, xp_cost,
+                                    role_id, xp_gain, quantity, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(guild_id, item_key) DO NOTHING
+            RETURNING item_key
+        """
+        params = (
+            guild_id, item_key, item["display_name"], item.get("description"), item.get("price", 0),
+            item.get("xp_cost", 0), item.get("role_id"), item.get("xp_gain", 0), item.get("quantity", -1),
+            item.get("created_at") or datetime.now(timezone.utc).isoformat(),
+        )
+        return bool(await self.execute_returning(query, params))
+
+    async def remove_shop_item(self, guild_id: int, item_key: str) -> Optional[str]:
+        """Supprime un article et retourne son nom affiché (None s'il n'existait pas)."""
+        query = "DELETE FROM shop_items WHERE guild_id = ? AND item_key = ? RETURNING display_name"
+        rows = await self.execute_returning(query, (guild_id, item_key))
+        return rows[0]["display_name"] if rows else None
+
+    # --- Activité (messages) ---
+    async def get_activity_leaderboard(self, guild_id: int, limit: int = 10) -> List[Dict]:
+        return await self.fetch_all(queries.ACTIVITY_LEADERBOARD, (guild_id, limit))
+
+    async def add_activity_counts(self, rows: List[Tuple[int, int, int]], daily_rows: List[Tuple[int, int, int, int]]):
+        """
+        Ajoute en une seule transaction les compteurs (guild_id, user_id, messages) et leur
+        répartition par jour (guild_id, user_id, day, messages) (voir utils/activity_counter.py).
+        """
+        async with self.transaction():
+            await self.executemany("""
+                INSERT INTO activity (guild_id, user_id, messages) VALUES (?, ?, ?)
+                ON CONFLICT(guild_id, user_id) DO UPDATE SET messages = messages + excluded.messages
+            """, rows)
+            await self.executemany("""
+                INSERT INTO activity_daily (guild_id, user_id, day, messages) VALUES (?, ?, ?, ?)
+                ON CONFLICT(guild_id, day, user_id) DO UPDATE SET messages = messages + excluded.messages
+            """, daily_rows)
+
+    async def get_activity_window_leaderboard(self, guild_id: int, since_day: int, limit: int = 10) -> List[Dict]:
+        """Classement sur les jours >= since_day : agrégation de la seule plage (guild_id, day) de l'index."""
+        query = """
+            SELECT user_id, SUM(messages) AS messages FROM activity_daily
+            WHERE guild_id = ? AND day >= ?
+            GROUP BY user_id ORDER BY messages DESC, user_id DESC LIMIT ?
+        """
+        return await self.fetch_all(query, (guild_id, since_day, limit))
+
+    async def get_activity_window_counts(self, guild_id: int, since_day: int, user_ids: List[int]) -> Dict[int, int]:
+        if not user_ids:
+            return {}
+        rows = await self.fetch_all("""
+            SELECT user_id, SUM(messages) AS messages FROM activity_daily
+            WHERE guild_id = ? AND day >= ? AND user_id IN (SELECT value FROM json_each(?))
+            GROUP BY user_id
+        """, (guild_id, since_day, json.dumps(user_ids)))
+        return {row["user_id"]: row["messages"] for row in rows}
+
+    async def prune_activity_daily(self, before_day: int):
+        await self.execute("DELETE FROM activity_daily WHERE day < ?", (before_day,))
+
+    async def save_activity_hours(self, rows: List[Tuple[int, int, int, int]]):
+        """Remplace l'instantané horaire (guild_id, user_id, hour, messages)."""
+        async with self.transaction():
+            await self.execute("DELETE FROM activity_hourly")
+            await self.executemany(
+                "INSERT INTO activity_hourly (guild_id, user_id, hour, messages) VALUES (?, ?, ?, ?)", rows
+            )
+
+    async def get_activity_hours(self, since_hour: int) -> List[Dict]:
+        return await self.fetch_all(
+            "SELECT guild_id, user_id, hour, messages FROM activity_hourly WHERE hour >= ?", (since_hour,)
+        )
+
+    async def get_activity_counts(self, guild_id: int, user_ids: List[int]) -> Dict[int, int]:
+        """Compteurs enregistrés de quelques membres : user_id -> messages."""
+        if not user_ids:
+            return {}
+        rows = await self.fetch_all(
+            "SELECT user_id, messages FROM activity WHERE guild_id = ? AND user_id IN (SELECT value FROM json_each(?))",
+            (guild_id, json.dumps(user_ids))
+        )
+        return {row["user_id"]: row["messages"] for row in rows}
+
+    # --- Infractions ---
+    async def add_infraction(self, guild_id: int, user_id: int, moderator_id: int, infraction_type: str,
+                             reason: Optional[str], timestamp: Optional[int] = None):
+        query = "INSERT INTO infractions (guild_id, user_id, moderator_id, type, reason, timestamp) VALUES (?, ?, ?, ?, ?, ?)"
+        if timestamp is None:
+            timestamp = int(datetime.now(timezone.utc).timestamp())
+        await self.execute(query, (guild_id, user_id, moderator_id, infraction_type, reason, timestamp))
+
+    async def get_infractions_page(self, guild_id: int, user_id: int, limit: int = 5,
+                                   before: Optional[Tuple[int, int]] = None,
+                                   after: Optional[Tuple[int, int]] = None) -> List[Dict]:
+        """
+        Une page de l'historique d'un membre, de la plus récente à la plus ancienne infraction.
+        Curseur (timestamp, id) : `before` donne la page suivante (plus anciennes), `after` la
+        précédente (plus récentes). Coût constant quelle que soit la page, grâce à l'index
+        (guild_id, user_id, timestamp).
+        """
+        if after is not None:
+            rows = await self.fetch_all(queries.INFRACTIONS_NEWER, (guild_id, user_id, *after, limit))
+            return list(reversed(rows))
+        if before is not None:
+            return await self.fetch_all(queries.INFRACTIONS_OLDER, (guild_id, user_id, *before, limit))
+        return await self.fetch_all(queries.INFRACTIONS_FIRST_PAGE, (guild_id, user_id, limit))
+
+    async def count_infractions(self, guild_id: int, user_id: int) -> int:
+        row = await self.fetch_one(queries.INFRACTIONS_COUNT, (guild_id, user_id))
+        return row["total"] if row else 0
+
+    # --- Menus de rôles ---
+    async def add_role_menu(self, guild_id: int, message_id: int, roles: List[Dict]):
+        query = """
+            INSERT INTO role_menus (message_id, guild_id, roles) VALUES (?, ?, ?)
+            ON CONFLICT(message_id) DO UPDATE SET roles = excluded.roles
+        """
+        await self.execute(query, (message_id, guild_id, json.dumps(roles)))
+
+    # --- Synchronisation des rôles récompenses ---
+    async def count_role_reward_targets(self, guild_id: int, min_level: int) -> int:
+        row = await self.fetch_one(
+            "SELECT COUNT(*) AS n FROM user_data WHERE guild_id = ? AND level >= ?", (guild_id, min_level)
+        )
+        return row["n"]
+
+    async def get_role_reward_targets(self, guild_id: int, rewards_json: str, after_user_id: int, limit: int) -> List[Dict]:
+        """
+        Jointure des niveaux avec la table des récompenses ({niveau: role_id} en JSON) :
+        retourne [{"user_id", "role_ids": [..]}] par user_id croissant, après `after_user_id`.
+        """
+        rows = await self.fetch_all(queries.ROLE_REWARD_TARGETS, (rewards_json, guild_id, after_user_id, limit))
+        for row in rows:
+            row["role_ids"] = [int(role_id) for role_id in row["role_ids"].split(",")]
+        return rows
+
+    async def create_role_sync_job(self, guild_id: int, rewards_json: str, total: int,
+                                   channel_id: Optional[int], message_id: Optional[int]) -> bool:
+        """Crée la tâche du serveur. Retourne False si une synchronisation est déjà en cours."""
+        query = """
+            INSERT INTO role_sync_jobs (guild_id, rewards, total, channel_id, message_id, started_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(guild_id) DO NOTHING
+            RETURNING guild_id
+        """
+        params = (guild_id, rewards_json, total, channel_id, message_id, datetime.now(timezone.utc).isoformat())
+        return bool(await self.execute_returning(query, params))
+
+    async def get_role_sync_jobs(self) -> List[Dict]:
+        return await self.fetch_all("SELECT * FROM role_sync_jobs")
+
+    async def update_role_sync_job(self, guild_id: int, last_user_id: int, done: int, edited: int):
+        query = "UPDATE role_sync_jobs SET last_user_id = ?, done = ?, edited = ? WHERE guild_id = ?"
+        await self.execute(query, (last_user_id, done, edited, guild_id))
+
+    async def delete_role_sync_job(self, guild_id: int):
+        await self.execute("DELETE FROM role_sync_jobs WHERE guild_id = ?", (guild_id,))
+
+    # --- Règlement ---
+    async def get_rules_config(self, guild_id: int) -> Optional[Dict]:
+        query = "SELECT channel_id, message_id FROM rules_config WHERE guild_id = ?"
+        return await self.fetch_one(query, (guild_id,))
+
+    async def set_rules_config(self, guild_id: int, channel_id: int, message_id: int):
+        query = """
+            INSERT INTO rules_config (guild_id, channel_id, message_id) VALUES (?, ?, ?)
+            ON CONFLICT(guild_id) DO UPDATE SET
+                channel_id = excluded.channel_id,
+                message_id = excluded.message_id
+        """
+        await self.execute(query, (guild_id, channel_id, message_id))
     
 # --- Instance Globale ---
 # La bonne pratique est de créer cette instance uniquement dans main.py.
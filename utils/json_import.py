@@ -0,0 +1,140 @@
+# utils/json_import.py
+"""
+Import unique des anciens fichiers data/*.json vers les tables SQLite.
+
+Chaque fichier est importé dans sa propre transaction, qui enregistre aussi son nom
+dans `json_imports` : un fichier déjà importé n'est jamais relu, et un import
+interrompu est simplement rejoué au démarrage suivant. Les fichiers JSON ne sont
+pas supprimés (ils servent de sauvegarde).
+"""
+import json
+import os
+import traceback
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+from utils.database import DATA_DIR, DatabaseManager
+
+
+def _read_json(path: str):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+async def _import_balances(db: DatabaseManager, data: Dict) -> int:
+    count = 0
+    for guild_id, users in data.items():
+        for user_id, user in users.items():
+            await db.execute(
+                "INSERT OR IGNORE INTO user_balances (guild_id, user_id, balance, inventory, last_daily) VALUES (?, ?, ?, ?, ?)",
+                (int(guild_id), int(user_id), int(user.get("balance", 0)),
+                 json.dumps(user.get("inventory", [])), user.get("last_daily"))
+            )
+            count += 1
+    return count
+
+
+async def _import_shop(db: DatabaseManager, data: Dict) -> int:
+    count = 0
+    for guild_id, guild_data in data.items():
+        config = guild_data.get("config", {})
+        await db.execute(
+            "INSERT OR IGNORE INTO shop_config (guild_id, currency_name, currency_emoji) VALUES (?, ?, ?)",
+            (int(guild_id), config.get("currency_name", "Points"), config.get("currency_emoji", "💰"))
+        )
+        for item_key, item in guild_data.get("items", {}).items():
+            item.setdefault("display_name", item_key)
+            await db.add_shop_item(int(guild_id), item_key, item)
+            count += 1
+    return count
+
+
+async def _import_activity(db: DatabaseManager, data: Dict) -> int:
+    count = 0
+    for guild_id, users in data.items():
+        for user_id, user in users.items():
+            await db.execute(
+                "INSERT OR IGNORE INTO activity (guild_id, user_id, messages) VALUES (?, ?, ?)",
+                (int(guild_id), int(user_id), int(user.get("messages", 0)))
+            )
+            count += 1
+    return count
+
+
+async def _import_infractions(db: DatabaseManager, data: Dict) -> int:
+    count = 0
+    for guild_id, users in data.items():
+        for user_id, infractions in users.items():
+            for infra in infractions:
+                await db.add_infraction(
+                    int(guild_id), int(user_id), int(infra.get("moderator_id", 0)),
+                    infra.get("type", "inconnu"), infra.get("reason"), int(infra.get("timestamp", 0))
+                )
+                count += 1
+    return count
+
+
+async def _import_role_menus(db: DatabaseManager, data: Dict) -> int:
+    count = 0
+    for guild_id, menus in data.items():
+        for message_id, menu in menus.items():
+            await db.add_role_menu(int(guild_id), int(message_id), menu.get("roles", []))
+            count += 1
+    return count
+
+
+async def _import_rules(db: DatabaseManager, data: Dict) -> int:
+    count = 0
+    for guild_id, guild_config in data.items():
+        rules = guild_config.get("rules_config")
+        if rules:
+            await db.set_rules_config(int(guild_id), rules["channel_id"], rules["message_id"])
+            count += 1
+    return count
+
+
+async def _import_settings(db: DatabaseManager, data: Dict) -> int:
+    count = 0
+    for guild_id, guild_settings in data.items():
+        await db.execute(
+            "INSERT OR IGNORE INTO guild_config (guild_id, data) VALUES (?, ?)",
+            (int(guild_id), json.dumps(guild_settings))
+        )
+        count += 1
+    return count
+
+
+JSON_IMPORTERS: List[Tuple[str, Callable[[DatabaseManager, Dict], Awaitable[int]]]] = [
+    ("user_balances.json", _import_balances),
+    ("shop_data.json", _import_shop),
+    ("activity.json", _import_activity),
+    ("infractions.json", _import_infractions),
+    ("role_menus.json", _import_role_menus),
+    ("server_config.json", _import_rules),
+    ("settings.json", _import_settings),
+]
+
+
+async def import_json_stores(db: DatabaseManager, data_dir: str = DATA_DIR):
+    """Importe les fichiers JSON pas encore importés. Sans effet aux démarrages suivants."""
+    done = {row["filename"] for row in await db.fetch_all("SELECT filename FROM json_imports")}
+    for filename, importer in JSON_IMPORTERS:
+        if filename in done:
+            continue
+        data = _read_json(os.path.join(data_dir, filename))
+        if data is None:
+            continue
+        try:
+            async with db.transaction():
+                count = await importer(db, data)
+                await db.execute(
+                    "INSERT INTO json_imports (filename, imported_at) VALUES (?, ?)",
+                    (filename, datetime.now(timezone.utc).isoformat())
+                )
+            print(f"  [DB] {filename} importé ({count} entrée(s)).")
+        except Exception as e:
+            print(f"ERREUR lors de l'import de {filename} : {e}")
+            traceback.print_exc()
@@ -0,0 +1,132 @@
+# utils/json_store.py
+"""
+Fichiers JSON partagés entre les cogs (settings.json, sauvegarde de maintenance...).
+
+Chaque fichier n'a qu'une seule copie en mémoire, obtenue via `get_store(chemin)` :
+les cogs modifient `store.data` puis appellent `store.mark_dirty()`. Les écritures
+rapprochées sont regroupées (debounce). La sérialisation se fait sur la boucle (copie
+cohérente de `data`), seuls l'écriture et le fsync partent dans un thread : aucun
+handler n'attend le disque.
+"""
+import asyncio
+import json
+import os
+import traceback
+from typing import Dict, Optional
+
+DEFAULT_DEBOUNCE = 2.0
+
+
+def _write_atomic(filepath: str, payload: str):
+    """Écrit via un fichier temporaire + fsync + os.replace (jamais de fichier à moitié écrit)."""
+    directory = os.path.dirname(filepath) or "."
+    os.makedirs(directory, exist_ok=True)
+    temp_filepath = filepath + ".tmp"
+    with open(temp_filepath, 'w', encoding='utf-8') as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_filepath, filepath)
+    if hasattr(os, "O_DIRECTORY"):
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+class JsonStore:
+    def __init__(self, filepath: str, debounce: float = DEFAULT_DEBOUNCE):
+        self.filepath = filepath
+        self.debounce = debounce
+        self.data: Dict = self._load()
+        self._dirty = False
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self.writes = 0
+
+    def _load(self) -> Dict:
+        try:
+            with open(self.filepath, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except FileNotFoundError:
+            return {}
+        except json.JSONDecodeError as e:
+            # On garde le fichier illisible de côté plutôt que de l'écraser à la prochaine sauvegarde.
+            print(f"Erreur chargement {self.filepath}: {e} (copie conservée en .corrompu)")
+            os.replace(self.filepath, self.filepath + ".corrompu")
+            return {}
+
+    def guild(self, guild_id: int) -> Dict:
+        """Section d'un serveur (créée si absente)."""
+        return self.data.setdefault(str(guild_id), {})
+
+    # --- Écriture ---
+    def mark_dirty(self):
+        """Signale une modification de `data` ; l'écriture se fera après le délai de debounce."""
+        self._dirty = True
+        if self._flush_handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Hors boucle (scripts, setup synchrone) : écriture immédiate.
+            self._write_now()
+            return
+        self._flush_handle = loop.call_later(self.debounce, self._schedule_flush)
+
+    def _schedule_flush(self):
+        self._flush_handle = None
+        self._flush_task = asyncio.create_task(self.flush())
+
+    def _write_now(self):
+        self._dirty = False
+        _write_atomic(self.filepath, json.dumps(self.data, indent=4))
+        self.writes += 1
+
+    async def flush(self):
+        """Écrit le fichier maintenant s'il a été modifié (à attendre avant un arrêt ou une donnée critique)."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            if not self._dirty:
+                return
+            self._dirty = False
+            loop = asyncio.get_running_loop()
+            try:
+                payload = json.dumps(self.data, indent=4)
+                await loop.run_in_executor(None, _write_atomic, self.filepath, payload)
+                self.writes += 1
+            except Exception as e:
+                print(f"Erreur critique sauvegarde {self.filepath}: {e}"); traceback.print_exc()
+                self.mark_dirty()
+
+    async def close(self):
+        """Attend l'écriture programmée en cours, puis écrit ce qui reste en attente."""
+        if self._flush_task is not None:
+            await self._flush_task
+            self._flush_task = None
+        await self.flush()
+
+
+# --- Registre : une instance (donc une copie en mémoire) par fichier ---
+_stores: Dict[str, JsonStore] = {}
+
+
+def get_store(filepath: str) -> JsonStore:
+    key = os.path.abspath(filepath)
+    store = _stores.get(key)
+    if store is None:
+        store = _stores[key] = JsonStore(filepath)
+    return store
+
+
+async def close_all_stores():
+    """À appeler à l'arrêt du bot pour écrire les modifications encore en attente."""
+    for store in list(_stores.values()):
+        await store.close()
@@ -0,0 +1,65 @@
+# utils/level_curve.py
+"""
+Courbe de niveaux : passer du niveau L au niveau L+1 coûte 5*L² + 50*L + 100 XP.
+
+En base, un membre est stocké sous la forme (level, xp), `xp` étant l'XP accumulée dans
+le niveau courant. Les conversions passent par l'XP totale depuis le niveau 1 :
+table cumulée précalculée + bisect jusqu'à MAX_TABLE_LEVEL, formule fermée au-delà
+(gains énormes, ex. articles de boutique à 1e14 XP). Aucune boucle par niveau.
+"""
+import bisect
+from typing import List, Tuple
+
+MAX_TABLE_LEVEL = 1000
+
+
+def xp_threshold(level: int) -> int:
+    """XP nécessaire pour passer du niveau `level` au suivant."""
+    return 5 * level * level + 50 * level + 100
+
+
+def total_for_level(level: int) -> int:
+    """XP totale nécessaire pour atteindre `level` depuis le niveau 1 (somme fermée des seuils)."""
+    n = level - 1
+    return 5 * n * (n + 1) * (2 * n + 1) // 6 + 25 * n * (n + 1) + 100 * n
+
+
+# CUMULATIVE[i] = XP totale pour atteindre le niveau i + 1
+CUMULATIVE: List[int] = [total_for_level(level) for level in range(1, MAX_TABLE_LEVEL + 1)]
+
+
+def level_for_total(total: int) -> int:
+    """Niveau atteint avec `total` XP cumulée (niveau 1 pour 0 XP ou moins)."""
+    if total <= 0:
+        return 1
+    if total < CUMULATIVE[-1]:
+        return bisect.bisect_right(CUMULATIVE, total)
+    # Formule fermée : total_for_level(L) ≈ 5L³/3, puis correction de l'arrondi flottant.
+    level = max(MAX_TABLE_LEVEL, int((3 * total / 5) ** (1 / 3)))
+    while total_for_level(level) > total:
+        level -= 1
+    while total_for_level(level + 1) <= total:
+        level += 1
+    return level
+
+
+def to_total(level: int, xp: int) -> int:
+    """(level, xp dans le niveau) -> XP totale."""
+    return total_for_level(level) + xp
+
+
+def from_total(total: int) -> Tuple[int, int]:
+    """XP totale -> (level, xp dans le niveau)."""
+    total = max(total, 0)
+    level = level_for_total(total)
+    return level, total - total_for_level(level)
+
+
+def xp_in_level(total: int) -> int:
+    """XP totale -> XP accumulée dans le niveau atteint."""
+    return from_total(total)[1]
+
+
+def add_xp(level: int, xp: int, delta: int) -> Tuple[int, int]:
+    """Applique un gain (ou une perte) d'XP et retourne le nouveau (level, xp), sur autant de niveaux que nécessaire."""
+    return from_total(to_total(level, xp) + delta)
@@ -0,0 +1,143 @@
+# utils/level_up_queue.py
+"""
+File des effets de bord des passages de niveau (annonce + rôles récompenses).
+
+`on_xp_message` se contente de `submit()` (non bloquant) ; des workers exécutent les
+appels REST en arrière-plan. Plusieurs passages de niveau d'un même membre encore en
+attente sont fusionnés en un seul évènement, et chaque route (salon d'annonce, rôles
+d'un serveur) est espacée d'un intervalle minimal pour rester sous les rate limits.
+"""
+import asyncio
+import time
+import traceback
+from typing import Dict, Optional, Set, Tuple
+
+import discord
+
+from utils.cooldowns import Cooldown
+from utils.metrics import Histogram
+
+QUEUE_MAX_SIZE = 1000
+WORKER_COUNT = 2
+# Espacement minimal entre deux appels sur une même route (secondes).
+ANNOUNCE_INTERVAL = 1.0   # par salon (Discord : 5 messages / 5 s)
+ROLES_INTERVAL = 0.5      # par serveur
+
+
+class LevelUpEvent:
+    __slots__ = ("member", "from_level", "to_level", "config", "queued_at")
+
+    def __init__(self, member: discord.Member, from_level: int, to_level: int, config: Dict):
+        self.member = member
+        self.from_level = from_level
+        self.to_level = to_level
+        self.config = config
+        self.queued_at = time.perf_counter()
+
+
+class LevelUpQueue:
+    def __init__(self, max_size: int = QUEUE_MAX_SIZE, workers: int = WORKER_COUNT):
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_size)
+        # Évènements en attente, par membre : la file ne contient que les clés.
+        self._pending: Dict[Tuple[int, int], LevelUpEvent] = {}
+        # Membres dont l'évènement est en cours de traitement par un worker.
+        self._in_flight: Set[Tuple[int, int]] = set()
+        self._routes = Cooldown(0)
+        self._worker_count = workers
+        self._workers = []
+        # --- Métriques ---
+        self.submitted = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.processed = 0
+        self.errors = 0
+        self.max_depth = 0
+        self.latency = Histogram()  # ms entre submit() et la fin des appels REST
+
+    def start(self):
+        if not self._workers:
+            self._workers = [asyncio.create_task(self._worker()) for _ in range(self._worker_count)]
+
+    async def close(self, timeout: float = 5.0):
+        """Laisse `timeout` secondes pour vider la file, puis arrête les workers."""
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            print(f"AVERTISSEMENT : {self._queue.qsize()} passage(s) de niveau non traité(s) à l'arrêt.")
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def is_pending(self, guild_id: int, user_id: int) -> bool:
+        """True si un passage de niveau du membre est en attente ou en cours de traitement."""
+        key = (guild_id, user_id)
+        return key in self._pending or key in self._in_flight
+
+    def submit(self, member: discord.Member, from_level: int, to_level: int, config: Dict) -> bool:
+        """Planifie l'annonce et les rôles d'un passage de niveau. Retourne False si la file est pleine."""
+        self.submitted += 1
+        key = (member.guild.id, member.id)
+        pending = self._pending.get(key)
+        if pending is not None:
+            # Fusion : une seule annonce (au niveau le plus haut), tous les rôles des niveaux franchis.
+            pending.to_level = max(pending.to_level, to_level)
+            pending.member, pending.config = member, config
+            self.coalesced += 1
+            return True
+        try:
+            self._queue.put_nowait(key)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+        self._pending[key] = LevelUpEvent(member, from_level, to_level, config)
+        self.max_depth = max(self.max_depth, self._queue.qsize())
+        return True
+
+    async def _worker(self):
+        while True:
+            key = await self._queue.get()
+            event: Optional[LevelUpEvent] = self._pending.pop(key, None)
+            self._in_flight.add(key)
+            try:
+                if event is not None:
+                    await self._process(event)
+                    self.processed += 1
+                    self.latency.observe((time.perf_counter() - event.queued_at) * 1000)
+            except Exception as e:
+                self.errors += 1
+                print(f"ERREUR lors du traitement d'un passage de niveau : {e}")
+                traceback.print_exc()
+            finally:
+                self._in_flight.discard(key)
+                self._queue.task_done()
+
+    async def _process(self, event: LevelUpEvent):
+        member, guild, config = event.member, event.member.guild, event.config
+
+        # Annonce de level-up
+        announcement_channel_id = config.get("announcement_channel")
+        channel = guild.get_channel(announcement_channel_id) if announcement_channel_id else None
+        if channel:
+            await self._routes.reserve(("announce", channel.id), ANNOUNCE_INTERVAL)
+            await channel.send(f"🎉 Bravo {member.mention}, tu as atteint le niveau **{event.to_level}** !")
+
+        # Attribution des rôles récompenses de tous les niveaux franchis
+        role_rewards = config.get("role_rewards", {})
+        roles = [
+            role for level in range(event.from_level + 1, event.to_level + 1)
+            if str(level) in role_rewards and (role := guild.get_role(role_rewards[str(level)])) and role not in member.roles
+        ]
+        if roles:
+            await self._routes.reserve(("roles", guild.id), ROLES_INTERVAL)
+            try:
+                await member.add_roles(*roles, reason=f"Récompense de niveau {event.to_level}")
+            except discord.Forbidden:
+                print(f"Permissions manquantes pour donner {', '.join(r.name for r in roles)} sur le serveur {guild.name}")
+
+    def stats(self) -> Dict:
+        return {
+            "depth": self._queue.qsize(), "max_depth": self.max_depth, "submitted": self.submitted,
+            "coalesced": self.coalesced, "dropped": self.dropped, "processed": self.processed,
+            "errors": self.errors, "latency": self.latency.to_dict(),
+        }
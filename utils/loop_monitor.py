@@ -0,0 +1,121 @@
+# utils/loop_monitor.py
+"""
+Surveillance de la boucle d'évènements.
+
+Une tâche asyncio se réveille toutes les `interval` secondes et mesure son retard (lag)
+dans un histogramme. Un thread de surveillance vérifie en parallèle que ces réveils ont
+bien lieu : si la boucle est bloquée depuis plus de `threshold_ms`, il capture la pile du
+thread de la boucle (`sys._current_frames`) pendant le blocage, ce qui désigne le code
+synchrone fautif (lecture de fichier, calcul lourd...) avant que le heartbeat ne décroche.
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+from utils.metrics import Histogram
+
+PROBE_INTERVAL = 0.1
+BLOCKED_THRESHOLD_MS = 250.0
+STALL_LOG_SIZE = 20
+STACK_DEPTH = 8
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _origin(stack: traceback.StackSummary) -> str:
+    """Frame la plus profonde d'un cog (à défaut du projet) : c'est elle qui a bloqué."""
+    fallback = None
+    for frame in reversed(stack):
+        path = os.path.abspath(frame.filename)
+        if not path.startswith(_PROJECT_ROOT) or "site-packages" in path:
+            continue
+        label = f"{os.path.relpath(path, _PROJECT_ROOT)}:{frame.lineno} ({frame.name})"
+        if os.sep + "cogs" + os.sep in path:
+            return label
+        fallback = fallback or label
+    return fallback or (f"{stack[-1].filename}:{stack[-1].lineno}" if stack else "inconnu")
+
+
+class LoopMonitor:
+    def __init__(self, interval: float = PROBE_INTERVAL, threshold_ms: float = BLOCKED_THRESHOLD_MS,
+                 log_size: int = STALL_LOG_SIZE):
+        self.interval = interval
+        self.threshold_ms = threshold_ms
+        self.lag = Histogram()
+        self.stalls: Deque[Dict] = deque(maxlen=log_size)
+        self.stall_count = 0
+        self._last_beat = time.monotonic()
+        self._current_stall: Optional[Dict] = None
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._probe())
+        self._thread = threading.Thread(target=self._watch, name="surveillance-boucle", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    # --- Côté boucle : mesure du retard ---
+    async def _probe(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag_ms = max(0.0, now - expected) * 1000
+            self.lag.observe(lag_ms)
+            self._last_beat = now
+            stall = self._current_stall
+            if stall is not None:
+                # Fin du blocage : durée réelle, connue seulement maintenant.
+                self._current_stall = None
+                stall["lag_ms"] = round(lag_ms, 1)
+                print(f"[BOUCLE] Boucle d'évènements bloquée {lag_ms:.0f} ms — {stall['origin']}")
+
+    # --- Côté thread : capture de la pile pendant un blocage ---
+    def _watch(self):
+        while not self._stop.wait(self.interval / 2):
+            blocked_ms = (time.monotonic() - self._last_beat - self.interval) * 1000
+            if blocked_ms < self.threshold_ms or self._current_stall is not None:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stack = traceback.extract_stack(frame)
+            stall = {
+                "at": time.time(),
+                "lag_ms": round(blocked_ms, 1),
+                "origin": _origin(stack),
+                "stack": [f"{os.path.basename(f.filename)}:{f.lineno} {f.name}" for f in stack[-STACK_DEPTH:]],
+            }
+            self._current_stall = stall
+            self.stalls.append(stall)
+            self.stall_count += 1
+
+    # --- Consultation ---
+    def recent_stalls(self, limit: int = 5) -> List[Dict]:
+        return list(self.stalls)[-limit:]
+
+    def reset(self):
+        self.lag = Histogram()
+        self.stalls.clear()
+        self.stall_count = 0
+
+    def stats(self) -> Dict:
+        return {"threshold_ms": self.threshold_ms, "stalls": self.stall_count, "lag": self.lag.to_dict()}
@@ -0,0 +1,100 @@
+# utils/message_pipeline.py
+"""
+Pipeline unique de traitement des messages (automod, XP, activité...).
+
+`MyBot.on_message` appelle `process()` une seule fois par message : les filtres communs
+(bots, messages privés) et la lecture des paramètres du serveur sont faits une fois,
+dans un `MessageContext` partagé, puis les étapes enregistrées par les cogs s'exécutent
+par priorité croissante. Une étape peut appeler `ctx.stop()` pour que les suivantes
+(XP, activité) ne voient pas le message.
+"""
+import time
+import traceback
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import discord
+
+from utils.metrics import Histogram
+
+
+class MessageContext:
+    """Tout ce que les étapes ont besoin de savoir sur un message, calculé une seule fois."""
+
+    def __init__(self, message: discord.Message, db_settings: Dict, edited: bool):
+        self.message = message
+        self.guild = message.guild
+        self.author = message.author
+        self.edited = edited
+        # Paramètres en base du serveur (cache du DatabaseManager)
+        self.db_settings = db_settings
+        # --- Contrôle du flux ---
+        self.stopped_by: Optional[str] = None
+
+    @property
+    def stopped(self) -> bool:
+        return self.stopped_by is not None
+
+    def stop(self, reason: str):
+        """Interrompt le pipeline : les étapes suivantes ne verront pas ce message."""
+        self.stopped_by = reason
+
+
+Stage = Callable[[MessageContext], Awaitable[None]]
+
+
+class _RegisteredStage:
+    __slots__ = ("name", "func", "priority", "on_edit", "timings", "errors")
+
+    def __init__(self, name: str, func: Stage, priority: int, on_edit: bool):
+        self.name = name
+        self.func = func
+        self.priority = priority
+        self.on_edit = on_edit
+        self.timings = Histogram()
+        self.errors = 0
+
+
+class MessagePipeline:
+    def __init__(self, bot):
+        self.bot = bot
+        self._stages: List[_RegisteredStage] = []
+        self.processed = 0
+        self.stopped: Dict[str, int] = {}
+
+    def register(self, name: str, func: Stage, priority: int, on_edit: bool = False):
+        """Ajoute (ou remplace) une étape. Priorité basse = exécutée en premier."""
+        self.unregister(name)
+        self._stages.append(_RegisteredStage(name, func, priority, on_edit))
+        self._stages.sort(key=lambda stage: stage.priority)
+
+    def unregister(self, name: str):
+        self._stages = [stage for stage in self._stages if stage.name != name]
+
+    async def process(self, message: discord.Message, edited: bool = False):
+        if message.author.bot or not message.guild:
+            return
+        stages = [stage for stage in self._stages if stage.on_edit] if edited else self._stages
+        if not stages:
+            return
+        db_settings = await self.bot.db.get_guild_settings(message.guild.id) or {}
+        ctx = MessageContext(message, db_settings, edited)
+        self.processed += 1
+        for stage in stages:
+            started = time.perf_counter()
+            try:
+                await stage.func(ctx)
+            except Exception as e:
+                stage.errors += 1
+                print(f"ERREUR dans l'étape '{stage.name}' du pipeline de messages : {e}")
+                traceback.print_exc()
+            finally:
+                stage.timings.observe((time.perf_counter() - started) * 1000)
+            if ctx.stopped:
+                self.stopped[ctx.stopped_by] = self.stopped.get(ctx.stopped_by, 0) + 1
+                break
+
+    def stats(self) -> List[Dict]:
+        return [
+            {"name": stage.name, "priority": stage.priority, "errors": stage.errors, **stage.timings.to_dict()}
+            for stage in self._stages
+        ]
@@ -0,0 +1,154 @@
+# utils/metrics.py
+"""
+Métriques en mémoire : histogrammes à seaux fixes et statistiques de requêtes SQL.
+Tout est O(1) par mesure et de taille bornée, pour pouvoir rester actif en production.
+"""
+import bisect
+import re
+import sys
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+
+# Bornes supérieures des seaux, en millisecondes.
+DEFAULT_BUCKETS_MS: Tuple[float, ...] = (
+    0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000,
+)
+
+
+class Histogram:
+    """Histogramme à seaux fixes (le dernier seau compte tout ce qui dépasse la dernière borne)."""
+    __slots__ = ("bounds", "counts", "count", "total", "max")
+
+    def __init__(self, bounds: Sequence[float] = DEFAULT_BUCKETS_MS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, q: float) -> float:
+        """Borne supérieure du seau contenant le q-ième centile (0 < q <= 100)."""
+        if not self.count:
+            return 0.0
+        rank = q / 100 * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return self.bounds[index] if index < len(self.bounds) else self.max
+        return self.max
+
+    def to_dict(self) -> Dict:
+        return {
+            "count": self.count,
+            "mean": round(self.mean, 3),
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": round(self.max, 3),
+            "buckets": {str(bound): n for bound, n in zip(self.bounds + ("inf",), self.counts) if n},
+        }
+
+
+# ==============================================================================
+# --- STATISTIQUES DES REQUÊTES SQL ---
+# ==============================================================================
+_WHITESPACE = re.compile(r"\s+")
+SLOW_QUERY_THRESHOLD_MS = 100.0
+SLOW_QUERY_LOG_SIZE = 50
+
+
+class QueryShapeStats:
+    __slots__ = ("kind", "histogram", "errors", "origins")
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.histogram = Histogram()
+        self.errors = 0
+        self.origins: Dict[str, int] = {}
+
+
+class QueryStats:
+    """
+    Compteurs par "forme" de requête (le texte SQL paramétré, espaces normalisés),
+    temps cumulé par cog appelant et journal des requêtes lentes.
+    """
+
+    def __init__(self, slow_threshold_ms: float = SLOW_QUERY_THRESHOLD_MS, slow_log_size: int = SLOW_QUERY_LOG_SIZE):
+        self.slow_threshold_ms = slow_threshold_ms
+        self.shapes: Dict[str, QueryShapeStats] = {}
+        self.origins: Dict[str, Histogram] = {}
+        self.slow_queries: Deque[Tuple[float, float, str, str]] = deque(maxlen=slow_log_size)
+        self.started_at = time.time()
+        self._shape_cache: Dict[str, str] = {}
+
+    def _shape(self, query: str) -> str:
+        shape = self._shape_cache.get(query)
+        if shape is None:
+            shape = _WHITESPACE.sub(" ", query).strip()
+            if len(self._shape_cache) < 1000:
+                self._shape_cache[query] = shape
+        return shape
+
+    def record(self, kind: str, query: str, elapsed_ms: float, error: bool, origin: str):
+        shape = self._shape(query)
+        stats = self.shapes.get(shape)
+        if stats is None:
+            stats = self.shapes[shape] = QueryShapeStats(kind)
+        stats.histogram.observe(elapsed_ms)
+        stats.origins[origin] = stats.origins.get(origin, 0) + 1
+        if error:
+            stats.errors += 1
+        origin_histogram = self.origins.get(origin)
+        if origin_histogram is None:
+            origin_histogram = self.origins[origin] = Histogram()
+        origin_histogram.observe(elapsed_ms)
+
+        if self.slow_threshold_ms and elapsed_ms >= self.slow_threshold_ms:
+            self.slow_queries.append((time.time(), elapsed_ms, shape, origin))
+            print(f"[DB LENTE] {elapsed_ms:.1f} ms ({origin}) : {shape[:200]}")
+
+    @property
+    def total_queries(self) -> int:
+        return sum(stats.histogram.count for stats in self.shapes.values())
+
+    def top_shapes(self, limit: int = 10, sort_by: str = "total") -> List[Tuple[str, QueryShapeStats]]:
+        keys = {
+            "total": lambda item: item[1].histogram.total,
+            "count": lambda item: item[1].histogram.count,
+            "p99": lambda item: item[1].histogram.percentile(99),
+        }
+        return sorted(self.shapes.items(), key=keys.get(sort_by, keys["total"]), reverse=True)[:limit]
+
+    def reset(self):
+        self.shapes.clear()
+        self.origins.clear()
+        self.slow_queries.clear()
+        self.started_at = time.time()
+
+
+def caller_origin(skip: int = 2, depth: int = 12) -> str:
+    """Nom du premier module `cogs.*` (ou à défaut du premier module hors utils) dans la pile d'appel."""
+    frame: Optional[object] = sys._getframe(skip)
+    fallback = None
+    while frame is not None and depth > 0:
+        module = frame.f_globals.get("__name__", "")
+        if module.startswith("cogs."):
+            return module
+        if fallback is None and not module.startswith(("utils.", "asyncio", "contextlib")):
+            fallback = module
+        frame = frame.f_back
+        depth -= 1
+    return fallback or "inconnu"
@@ -0,0 +1,331 @@
+# utils/migrations.py
+"""
+Migrations versionnées du schéma SQLite.
+
+La version appliquée est stockée dans `PRAGMA user_version`. Chaque migration
+est exécutée une seule fois, dans l'ordre, dans sa propre transaction (le
+changement de user_version en fait partie). Les étapes restent idempotentes
+(IF NOT EXISTS, ajout de colonne conditionnel) pour pouvoir être rejouées sur
+une base créée par l'ancien `initialize_tables`.
+"""
+import aiosqlite
+from dataclasses import dataclass
+from typing import Awaitable, Callable, List, Optional, Sequence, Tuple, Union
+
+from utils import queries
+
+Step = Union[str, Callable[[aiosqlite.Connection], Awaitable[None]]]
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    description: str
+    steps: Sequence[Step]
+
+
+async def _add_column_if_missing(connection: aiosqlite.Connection, table: str, column: str, declaration: str):
+    async with connection.execute(f"PRAGMA table_info({table})") as cursor:
+        columns = {row[1] for row in await cursor.fetchall()}
+    if column not in columns:
+        await connection.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+
+
+def add_column(table: str, column: str, declaration: str) -> Step:
+    """Étape : ajoute une colonne seulement si elle n'existe pas encore."""
+    async def step(connection: aiosqlite.Connection):
+        await _add_column_if_missing(connection, table, column, declaration)
+    return step
+
+
+# ==============================================================================
+# --- LISTE ORDONNÉE DES MIGRATIONS ---
+# Ne jamais modifier une migration déjà publiée : en ajouter une nouvelle.
+# ==============================================================================
+MIGRATIONS: List[Migration] = [
+    Migration(1, "Schéma initial", (
+        """CREATE TABLE IF NOT EXISTS warnings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            moderator_id INTEGER NOT NULL,
+            reason TEXT,
+            timestamp TEXT NOT NULL
+        )""",
+        """CREATE TABLE IF NOT EXISTS guild_settings (
+            guild_id INTEGER PRIMARY KEY,
+            log_channel_id INTEGER,
+            suggestions_config TEXT,
+            feedback_channel_id INTEGER,
+            birthday_channel_id INTEGER,
+            ticket_config TEXT,
+            automod_config TEXT
+        )""",
+        """CREATE TABLE IF NOT EXISTS temp_bans (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            unban_timestamp REAL NOT NULL
+        )""",
+        """CREATE TABLE IF NOT EXISTS marriages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            user1_id INTEGER NOT NULL, -- Stocke toujours le plus petit ID
+            user2_id INTEGER NOT NULL, -- Stocke toujours le plus grand ID
+            marriage_timestamp TEXT NOT NULL,
+            UNIQUE (guild_id, user1_id, user2_id)
+        )""",
+        """CREATE TABLE IF NOT EXISTS prison (
+            guild_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            prison_channel_id INTEGER NOT NULL,
+            moderator_id INTEGER NOT NULL,
+            reason TEXT,
+            timestamp TEXT NOT NULL,
+            saved_roles TEXT, -- Sera NULL pour les non-admins
+            PRIMARY KEY (guild_id, user_id)
+        )""",
+        """CREATE TABLE IF NOT EXISTS user_data (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            xp INTEGER DEFAULT 0,
+            level INTEGER DEFAULT 1,
+            money INTEGER DEFAULT 0,
+            UNIQUE(guild_id, user_id)
+        )""",
+    )),
+    Migration(2, "Index des requêtes fréquentes", (
+        # get_warnings : index couvrant (l'id est le rowid, inclus d'office).
+        """CREATE INDEX IF NOT EXISTS idx_warnings_guild_user
+            ON warnings (guild_id, user_id, timestamp, moderator_id, reason)""",
+        # get_expired_bans : parcours par date d'expiration, couvrant.
+        """CREATE INDEX IF NOT EXISTS idx_temp_bans_unban
+            ON temp_bans (unban_timestamp, guild_id, user_id)""",
+        # get_partners : la moitié user1_id est couverte par la contrainte UNIQUE.
+        """CREATE INDEX IF NOT EXISTS idx_marriages_user2
+            ON marriages (guild_id, user2_id, user1_id)""",
+    )),
+    Migration(3, "Colonne leveling_config de guild_settings", (
+        add_column("guild_settings", "leveling_config", "TEXT"),
+    )),
+    Migration(4, "Index du classement XP", (
+        # Ordre total du classement : (level, xp, user_id) décroissants.
+        # Couvre get_leaderboard, get_rank et get_leaderboard_window sans tri ni lecture de table.
+        """CREATE INDEX IF NOT EXISTS idx_user_data_rank
+            ON user_data (guild_id, level, xp, user_id)""",
+    )),
+    Migration(5, "Tables remplaçant les fichiers JSON (économie, boutique, activité, modération, menus, règlement)", (
+        """CREATE TABLE IF NOT EXISTS user_balances (
+            guild_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            balance INTEGER NOT NULL DEFAULT 0,
+            inventory TEXT NOT NULL DEFAULT '[]', -- Liste JSON
+            last_daily TEXT,
+            PRIMARY KEY (guild_id, user_id)
+        )""",
+        """CREATE INDEX IF NOT EXISTS idx_user_balances_rank
+            ON user_balances (guild_id, balance, user_id)""",
+        """CREATE TABLE IF NOT EXISTS shop_config (
+            guild_id INTEGER PRIMARY KEY,
+            currency_name TEXT NOT NULL DEFAULT 'Points',
+            currency_emoji TEXT NOT NULL DEFAULT '💰'
+        )""",
+        """CREATE TABLE IF NOT EXISTS shop_items (
+            guild_id INTEGER NOT NULL,
+            item_key TEXT NOT NULL,
+            display_name TEXT NOT NULL,
+            description TEXT,
+            price INTEGER NOT NULL DEFAULT 0,
+            xp_cost INTEGER NOT NULL DEFAULT 0,
+            role_id INTEGER,
+            xp_gain INTEGER NOT NULL DEFAULT 0,
+            quantity INTEGER NOT NULL DEFAULT -1, -- -1 = infini
+            created_at TEXT,
+            PRIMARY KEY (guild_id, item_key)
+        )""",
+        """CREATE TABLE IF NOT EXISTS activity (
+            guild_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            messages INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (guild_id, user_id)
+        )""",
+        """CREATE INDEX IF NOT EXISTS idx_activity_rank
+            ON activity (guild_id, messages, user_id)""",
+        """CREATE TABLE IF NOT EXISTS infractions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            moderator_id INTEGER NOT NULL,
+            type TEXT NOT NULL,
+            reason TEXT,
+            timestamp INTEGER NOT NULL -- Timestamp Unix (secondes)
+        )""",
+        """CREATE INDEX IF NOT EXISTS idx_infractions_user
+            ON infractions (guild_id, user_id)""",
+        """CREATE TABLE IF NOT EXISTS role_menus (
+            message_id INTEGER PRIMARY KEY,
+            guild_id INTEGER NOT NULL,
+            roles TEXT NOT NULL -- Liste JSON de {role_id, label, emoji}
+        )""",
+        """CREATE TABLE IF NOT EXISTS rules_config (
+            guild_id INTEGER PRIMARY KEY,
+            channel_id INTEGER NOT NULL,
+            message_id INTEGER NOT NULL
+        )""",
+        # Fichiers data/*.json déjà importés (voir utils/json_import.py).
+        """CREATE TABLE IF NOT EXISTS json_imports (
+            filename TEXT PRIMARY KEY,
+            imported_at TEXT NOT NULL
+        )""",
+    )),
+    Migration(6, "Sections de configuration par serveur (ancien settings.json)", (
+        # Une ligne par serveur : seules les lignes des serveurs modifiés sont réécrites.
+        """CREATE TABLE IF NOT EXISTS guild_config (
+            guild_id INTEGER PRIMARY KEY,
+            data TEXT NOT NULL DEFAULT '{}' -- Objet JSON {section: {...}}
+        )""",
+    )),
+    Migration(7, "Tâches de synchronisation des rôles récompenses (reprises après redémarrage)", (
+        """CREATE TABLE IF NOT EXISTS role_sync_jobs (
+            guild_id INTEGER PRIMARY KEY,
+            rewards TEXT NOT NULL, -- Copie JSON de role_rewards au lancement {niveau: role_id}
+            last_user_id INTEGER NOT NULL DEFAULT 0, -- Point de reprise (membres traités par user_id croissant)
+            total INTEGER NOT NULL DEFAULT 0,
+            done INTEGER NOT NULL DEFAULT 0,
+            edited INTEGER NOT NULL DEFAULT 0,
+            channel_id INTEGER, -- Message de progression
+            message_id INTEGER,
+            started_at TEXT NOT NULL
+        )""",
+    )),
+    Migration(8, "Historique d'activité par jour (classements 7j/30j) et instantané horaire (24h)", (
+        # Clé (guild_id, day, user_id) : une fenêtre de jours est une plage de l'index,
+        # agrégée sans lire les jours plus anciens.
+        """CREATE TABLE IF NOT EXISTS activity_daily (
+            guild_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            day INTEGER NOT NULL, -- Jours depuis l'epoch (UTC)
+            messages INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (guild_id, day, user_id)
+        )""",
+        # Compteurs horaires des dernières 24 h, sauvegardés à l'arrêt et rechargés au démarrage.
+        """CREATE TABLE IF NOT EXISTS activity_hourly (
+            guild_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            hour INTEGER NOT NULL, -- Heures depuis l'epoch (UTC)
+            messages INTEGER NOT NULL,
+            PRIMARY KEY (guild_id, user_id, hour)
+        )""",
+    )),
+    Migration(9, "Historique de modération unifié (avertissements dans infractions) et index de pagination", (
+        # Les avertissements rejoignent l'historique des infractions (date ISO -> timestamp Unix).
+        """INSERT INTO infractions (guild_id, user_id, moderator_id, type, reason, timestamp)
+            SELECT guild_id, user_id, moderator_id, 'avertissement', reason,
+                   COALESCE(CAST(strftime('%s', timestamp) AS INTEGER), 0)
+            FROM warnings ORDER BY id""",
+        "DROP TABLE IF EXISTS warnings",
+        # Pagination par curseur (timestamp, id) : l'id est le rowid, inclus d'office dans l'index.
+        """CREATE INDEX IF NOT EXISTS idx_infractions_history
+            ON infractions (guild_id, user_id, timestamp)""",
+        "DROP INDEX IF EXISTS idx_infractions_user",
+    )),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+async def get_schema_version(connection: aiosqlite.Connection) -> int:
+    async with connection.execute("PRAGMA user_version") as cursor:
+        row = await cursor.fetchone()
+    return row[0] if row else 0
+
+
+async def apply_migrations(connection: aiosqlite.Connection) -> List[int]:
+    """Applique les migrations manquantes et retourne la liste des versions appliquées."""
+    current = await get_schema_version(connection)
+    applied = []
+    for migration in MIGRATIONS:
+        if migration.version <= current:
+            continue
+        # sqlite3 n'ouvre pas de transaction implicite pour le DDL : on la gère nous-mêmes.
+        await connection.commit()
+        await connection.execute("BEGIN")
+        try:
+            for step in migration.steps:
+                if isinstance(step, str):
+                    await connection.execute(step)
+                else:
+                    await step(connection)
+            await connection.execute(f"PRAGMA user_version = {int(migration.version)}")
+            await connection.commit()
+        except Exception:
+            await connection.rollback()
+            raise
+        print(f"  [DB] Migration v{migration.version} appliquée : {migration.description}")
+        applied.append(migration.version)
+    return applied
+
+
+# ==============================================================================
+# --- VÉRIFICATION DES PLANS D'EXÉCUTION ---
+# Chaque requête chaude doit utiliser l'index attendu. Une régression (retour à un
+# SCAN complet de la table) est signalée au démarrage et par `python -m utils.migrations`.
+# Les requêtes sont celles que DatabaseManager exécute (utils/queries.py).
+# ==============================================================================
+QUERY_PLAN_CHECKS: List[Tuple[str, str, tuple, str]] = [
+    ("get_infractions_page (première page)", queries.INFRACTIONS_FIRST_PAGE, (0, 0, 5), "idx_infractions_history"),
+    ("get_infractions_page (plus anciennes)", queries.INFRACTIONS_OLDER, (0, 0, 0, 0, 5), "idx_infractions_history"),
+    ("get_infractions_page (plus récentes)", queries.INFRACTIONS_NEWER, (0, 0, 0, 0, 5), "idx_infractions_history"),
+    ("count_infractions", queries.INFRACTIONS_COUNT, (0, 0), "idx_infractions_history"),
+    ("get_expired_bans", queries.EXPIRED_BANS, (0.0,), "idx_temp_bans_unban"),
+    ("get_partners", queries.PARTNERS, (0, 0, 0, 0), "idx_marriages_user2"),
+    ("get_leaderboard", queries.XP_LEADERBOARD, (0, 10), "idx_user_data_rank"),
+    ("get_rank", queries.XP_RANK, (0, 1, 0, 0), "idx_user_data_rank"),
+    ("get_leaderboard_window (au-dessus)", queries.XP_WINDOW_ABOVE, (0, 1, 0, 0, 5), "idx_user_data_rank"),
+    ("get_leaderboard_window (en dessous)", queries.XP_WINDOW_BELOW, (0, 1, 0, 0, 5), "idx_user_data_rank"),
+    ("get_role_reward_targets", queries.ROLE_REWARD_TARGETS, ('{"5": 1}', 0, 0, 50), "sqlite_autoindex_user_data_1"),
+    ("get_balance_leaderboard", queries.BALANCE_LEADERBOARD, (0, 10), "idx_user_balances_rank"),
+    ("get_activity_leaderboard", queries.ACTIVITY_LEADERBOARD, (0, 10), "idx_activity_rank"),
+]
+
+
+async def check_query_plans(connection: aiosqlite.Connection) -> List[str]:
+    """Retourne la liste des problèmes détectés (vide si tous les plans sont bons)."""
+    problems = []
+    for name, query, params, expected_index in QUERY_PLAN_CHECKS:
+        async with connection.execute(f"EXPLAIN QUERY PLAN {query}", params) as cursor:
+            details = [row[3] for row in await cursor.fetchall()]
+        scans = [d for d in details if d.startswith("SCAN") and "INDEX" not in d]
+        if scans:
+            problems.append(f"{name} : parcours complet ({'; '.join(scans)})")
+        if any("TEMP B-TREE FOR ORDER BY" in d for d in details):
+            problems.append(f"{name} : tri en mémoire au lieu de l'ordre de l'index")
+        if not any(expected_index in d for d in details):
+            problems.append(f"{name} : l'index '{expected_index}' n'est pas utilisé ({'; '.join(details)})")
+    return problems
+
+
+if __name__ == "__main__":
+    # Usage : python -m utils.migrations [chemin_db]
+    # Applique les migrations sur une base (temporaire par défaut) et vérifie les plans.
+    import asyncio
+    import os
+    import sys
+    import tempfile
+
+    async def _main(path: Optional[str]) -> int:
+        with tempfile.TemporaryDirectory() as tmp:
+            connection = await aiosqlite.connect(path or os.path.join(tmp, "plans.db"))
+            try:
+                await apply_migrations(connection)
+                problems = await check_query_plans(connection)
+            finally:
+                await connection.close()
+        for problem in problems:
+            print(f"ÉCHEC : {problem}")
+        if not problems:
+            print(f"OK : {len(QUERY_PLAN_CHECKS)} plans d'exécution vérifiés (schéma v{LATEST_VERSION}).")
+        return 1 if problems else 0
+
+    sys.exit(asyncio.run(_main(sys.argv[1] if len(sys.argv) > 1 else None)))
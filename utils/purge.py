@@ -0,0 +1,141 @@
+# utils/purge.py
+"""
+Moteur de suppression de messages en masse, partagé par `!clear` et `/commu avance purge`.
+
+L'historique du salon est parcouru une seule fois (du plus récent au plus ancien) :
+- les messages de moins de 14 jours sont supprimés par lots de 100 (`delete_messages`) ;
+- les plus anciens, que Discord refuse en suppression groupée, sont confiés à quelques
+  workers qui les suppriment un par un, espacés d'un intervalle minimal par salon.
+La file des messages anciens est bornée : la mémoire reste constante, même pour des
+dizaines de milliers de messages, et la lecture de l'historique attend les workers.
+"""
+import asyncio
+import datetime
+import time
+from typing import Awaitable, Callable, List, Optional
+
+import discord
+
+from utils.cooldowns import Cooldown
+
+BULK_SIZE = 100
+# Limite de Discord pour la suppression groupée (avec une marge d'une minute).
+BULK_MAX_AGE = datetime.timedelta(days=14) - datetime.timedelta(minutes=1)
+OLD_DELETE_WORKERS = 2
+OLD_DELETE_INTERVAL = 1.0   # Espacement minimal entre deux suppressions unitaires d'un même salon (secondes)
+OLD_QUEUE_SIZE = 200
+PROGRESS_INTERVAL = 5.0
+
+# Partagé entre les purges simultanées d'un même salon.
+_routes = Cooldown(OLD_DELETE_INTERVAL)
+
+
+class PurgeProgress:
+    __slots__ = ("scanned", "matched", "bulk_deleted", "single_deleted", "failed", "started_at", "finished")
+
+    def __init__(self):
+        self.scanned = 0
+        self.matched = 0
+        self.bulk_deleted = 0
+        self.single_deleted = 0
+        self.failed = 0
+        self.started_at = time.monotonic()
+        self.finished = False
+
+    @property
+    def deleted(self) -> int:
+        return self.bulk_deleted + self.single_deleted
+
+    def summary(self) -> str:
+        state = "✅ Suppression terminée" if self.finished else "⏳ Suppression en cours"
+        text = f"{state} : **{self.deleted}**/{self.matched} message(s) supprimé(s) ({self.scanned} parcourus)"
+        if self.failed:
+            text += f", {self.failed} échec(s)"
+        return text + "."
+
+
+ProgressCallback = Callable[[PurgeProgress], Awaitable[None]]
+
+
+async def _old_message_worker(channel_id: int, queue: asyncio.Queue, progress: PurgeProgress):
+    while True:
+        message = await queue.get()
+        try:
+            if message is None:
+                return
+            await _routes.reserve(channel_id)
+            await message.delete()
+            progress.single_deleted += 1
+        except discord.NotFound:
+            pass  # Déjà supprimé entre-temps
+        except discord.HTTPException:
+            progress.failed += 1
+        finally:
+            queue.task_done()
+
+
+async def purge_channel(channel: discord.abc.Messageable, limit: int,
+                        check: Optional[Callable[[discord.Message], bool]] = None, *,
+                        scan_limit: Optional[int] = None,
+                        before: Optional[discord.abc.Snowflake] = None,
+                        on_progress: Optional[ProgressCallback] = None,
+                        progress_interval: float = PROGRESS_INTERVAL) -> PurgeProgress:
+    """
+    Supprime jusqu'à `limit` messages de `channel` vérifiant `check`, en parcourant au plus
+    `scan_limit` messages (par défaut `limit`) antérieurs à `before`.
+    `on_progress` est appelé au plus toutes les `progress_interval` secondes, puis à la fin.
+    """
+    progress = PurgeProgress()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=OLD_QUEUE_SIZE)
+    workers = [asyncio.create_task(_old_message_worker(channel.id, queue, progress)) for _ in range(OLD_DELETE_WORKERS)]
+    bulk: List[discord.Message] = []
+
+    async def report_loop():
+        # Aussi pendant la vidange de la file des messages anciens, après la lecture de l'historique.
+        while True:
+            await asyncio.sleep(progress_interval)
+            await on_progress(progress)
+
+    reporter = asyncio.create_task(report_loop()) if on_progress is not None else None
+
+    async def flush_bulk():
+        if not bulk:
+            return
+        chunk = bulk[:]
+        bulk.clear()
+        try:
+            await channel.delete_messages(chunk)
+            progress.bulk_deleted += len(chunk)
+        except discord.Forbidden:
+            raise
+        except discord.HTTPException:
+            # Lot refusé (ex. un message disparu entre-temps) : suppression unitaire par les workers.
+            for message in chunk:
+                await queue.put(message)
+
+    try:
+        bulk_cutoff = discord.utils.utcnow() - BULK_MAX_AGE
+        async for message in channel.history(limit=scan_limit or limit, before=before):
+            progress.scanned += 1
+            if check is not None and not check(message):
+                continue
+            progress.matched += 1
+            if message.created_at > bulk_cutoff:
+                bulk.append(message)
+                if len(bulk) >= BULK_SIZE:
+                    await flush_bulk()
+            else:
+                await queue.put(message)  # Attend si les workers sont en retard
+            if progress.matched >= limit:
+                break
+        await flush_bulk()
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+    finally:
+        for task in workers + ([reporter] if reporter else []):
+            task.cancel()
+    progress.finished = True
+    if on_progress is not None:
+        await on_progress(progress)
+    return progress
@@ -0,0 +1,61 @@
+# utils/queries.py
+"""
+Requêtes SQL des chemins chauds, partagées par `DatabaseManager` (utils/database.py) et la
+vérification des plans d'exécution (utils/migrations.py) : le plan vérifié est celui de la
+requête réellement exécutée.
+"""
+
+# --- Bans temporaires ---
+EXPIRED_BANS = "SELECT id, guild_id, user_id FROM temp_bans WHERE unban_timestamp <= ?"
+
+# --- Mariages ---
+PARTNERS = """
+    SELECT user2_id as partner_id FROM marriages WHERE guild_id = ? AND user1_id = ?
+    UNION
+    SELECT user1_id as partner_id FROM marriages WHERE guild_id = ? AND user2_id = ?
+"""
+
+# --- Classement XP (index idx_user_data_rank) ---
+XP_LEADERBOARD = """
+    SELECT user_id, xp, level FROM user_data WHERE guild_id = ?
+    ORDER BY level DESC, xp DESC, user_id DESC LIMIT ?
+"""
+XP_RANK = "SELECT COUNT(*) AS above FROM user_data WHERE guild_id = ? AND (level, xp, user_id) > (?, ?, ?)"
+XP_WINDOW_ABOVE = """
+    SELECT user_id, xp, level FROM user_data WHERE guild_id = ? AND (level, xp, user_id) > (?, ?, ?)
+    ORDER BY level, xp, user_id LIMIT ?
+"""
+XP_WINDOW_BELOW = """
+    SELECT user_id, xp, level FROM user_data WHERE guild_id = ? AND (level, xp, user_id) < (?, ?, ?)
+    ORDER BY level DESC, xp DESC, user_id DESC LIMIT ?
+"""
+
+# --- Synchronisation des rôles récompenses ---
+ROLE_REWARD_TARGETS = """
+    SELECT u.user_id, group_concat(r.value) AS role_ids
+    FROM user_data u JOIN json_each(?) r ON u.level >= CAST(r.key AS INTEGER)
+    WHERE u.guild_id = ? AND u.user_id > ?
+    GROUP BY u.user_id ORDER BY u.user_id LIMIT ?
+"""
+
+# --- Économie et activité ---
+BALANCE_LEADERBOARD = "SELECT user_id, balance FROM user_balances WHERE guild_id = ? ORDER BY balance DESC, user_id DESC LIMIT ?"
+ACTIVITY_LEADERBOARD = "SELECT user_id, messages FROM activity WHERE guild_id = ? ORDER BY messages DESC, user_id DESC LIMIT ?"
+
+# --- Historique des infractions (index idx_infractions_history, curseur (timestamp, id)) ---
+INFRACTIONS_FIRST_PAGE = """
+    SELECT id, moderator_id, type, reason, timestamp FROM infractions
+    WHERE guild_id = ? AND user_id = ?
+    ORDER BY timestamp DESC, id DESC LIMIT ?
+"""
+INFRACTIONS_OLDER = """
+    SELECT id, moderator_id, type, reason, timestamp FROM infractions
+    WHERE guild_id = ? AND user_id = ? AND (timestamp, id) < (?, ?)
+    ORDER BY timestamp DESC, id DESC LIMIT ?
+"""
+INFRACTIONS_NEWER = """
+    SELECT id, moderator_id, type, reason, timestamp FROM infractions
+    WHERE guild_id = ? AND user_id = ? AND (timestamp, id) > (?, ?)
+    ORDER BY timestamp, id LIMIT ?
+"""
+INFRACTIONS_COUNT = "SELECT COUNT(*) AS total FROM infractions WHERE guild_id = ? AND user_id = ?"
@@ -0,0 +1,147 @@
+# utils/role_sync.py
+"""
+Synchronisation en masse des rôles récompenses de niveau.
+
+Une tâche par serveur, enregistrée dans `role_sync_jobs` : les membres sont parcourus par
+lots (user_id croissant) via une jointure niveaux x récompenses faite en SQL, comparés aux
+rôles déjà en cache, et seuls les membres à qui il manque un rôle sont modifiés, par des
+ajouts unitaires qui ne réécrivent jamais la liste complète des rôles. Le point de reprise
+est enregistré après chaque lot : après un redémarrage, `resume_all()` reprend là où la
+tâche s'était arrêtée.
+"""
+import asyncio
+import json
+import time
+import traceback
+from typing import Dict, Optional
+
+import discord
+
+from utils.cooldowns import Cooldown
+from utils.database import DatabaseManager
+
+BATCH_SIZE = 50
+EDIT_INTERVAL = 0.5        # Espacement minimal entre deux ajouts de rôles d'un même serveur (secondes)
+PROGRESS_INTERVAL = 5.0    # Fréquence maximale de mise à jour du message de progression
+
+
+class RoleSyncManager:
+    def __init__(self, bot, db: DatabaseManager):
+        self.bot = bot
+        self.db = db
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._routes = Cooldown(EDIT_INTERVAL)
+
+    def is_running(self, guild_id: int) -> bool:
+        task = self._tasks.get(guild_id)
+        return task is not None and not task.done()
+
+    async def start(self, guild: discord.Guild, role_rewards: Dict[str, int],
+                    progress_message: Optional[discord.Message] = None) -> bool:
+        """Lance la synchronisation d'un serveur. Retourne False si une tâche existe déjà."""
+        if not role_rewards:
+            return False
+        # Les gains encore en tampon doivent être en base avant la jointure.
+        await self.bot.xp_buffer.flush()
+        rewards_json = json.dumps(role_rewards)
+        total = await self.db.count_role_reward_targets(guild.id, min(int(level) for level in role_rewards))
+        created = await self.db.create_role_sync_job(
+            guild.id, rewards_json, total,
+            progress_message.channel.id if progress_message else None,
+            progress_message.id if progress_message else None,
+        )
+        if not created:
+            return False
+        job = {"guild_id": guild.id, "rewards": rewards_json, "last_user_id": 0, "total": total,
+               "done": 0, "edited": 0, "channel_id": None, "message_id": None}
+        # Édition via l'API des messages (le jeton d'interaction expire au bout de 15 minutes).
+        self._spawn(job, progress_message.channel.get_partial_message(progress_message.id) if progress_message else None)
+        return True
+
+    async def resume_all(self):
+        """Reprend les tâches interrompues par un redémarrage (à appeler une fois le cache des membres prêt)."""
+        for job in await self.db.get_role_sync_jobs():
+            if self.is_running(job["guild_id"]):
+                continue
+            print(f"[ROLES] Reprise de la synchronisation du serveur {job['guild_id']} ({job['done']}/{job['total']}).")
+            self._spawn(job, None)
+
+    def _spawn(self, job: Dict, progress_message: Optional[discord.Message]):
+        self._tasks[job["guild_id"]] = asyncio.create_task(self._run(job, progress_message))
+
+    def cancel_all(self):
+        for task in self._tasks.values():
+            task.cancel()
+
+    async def _progress_message(self, job: Dict) -> Optional[discord.PartialMessage]:
+        channel = self.bot.get_channel(job["channel_id"]) if job.get("channel_id") else None
+        return channel.get_partial_message(job["message_id"]) if channel else None
+
+    async def _report(self, message, job: Dict, finished: bool = False):
+        if message is None:
+            return
+        state = "✅ Synchronisation terminée" if finished else "⏳ Synchronisation des rôles récompenses"
+        try:
+            await message.edit(content=f"{state} : {job['done']}/{job['total']} membres vérifiés, {job['edited']} mis à jour.")
+        except discord.HTTPException:
+            pass
+
+    async def _run(self, job: Dict, message):
+        guild_id = job["guild_id"]
+        try:
+            guild = self.bot.get_guild(guild_id)
+            if guild is None:
+                await self.db.delete_role_sync_job(guild_id)
+                return
+            if message is None:
+                message = await self._progress_message(job)
+            last_report = 0.0
+            while True:
+                rows = await self.db.get_role_reward_targets(guild_id, job["rewards"], job["last_user_id"], BATCH_SIZE)
+                if not rows:
+                    break
+                for row in rows:
+                    if await self._reconcile_member(guild, row["user_id"], row["role_ids"]):
+                        job["edited"] += 1
+                job["done"] += len(rows)
+                job["last_user_id"] = rows[-1]["user_id"]
+                await self.db.update_role_sync_job(guild_id, job["last_user_id"], job["done"], job["edited"])
+                if time.monotonic() - last_report >= PROGRESS_INTERVAL:
+                    last_report = time.monotonic()
+                    await self._report(message, job)
+            await self.db.delete_role_sync_job(guild_id)
+            await self._report(message, job, finished=True)
+            print(f"[ROLES] Synchronisation du serveur {guild_id} terminée ({job['edited']} membre(s) mis à jour).")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # La tâche reste en base : elle sera reprise au prochain démarrage.
+            print(f"ERREUR lors de la synchronisation des rôles du serveur {guild_id} : {e}")
+            traceback.print_exc()
+        finally:
+            self._tasks.pop(guild_id, None)
+
+    async def _reconcile_member(self, guild: discord.Guild, user_id: int, role_ids) -> bool:
+        """Ajoute les rôles récompenses manquants. Retourne True si le membre a été modifié."""
+        member = guild.get_member(user_id)
+        if member is None:
+            return False
+        # Un passage de niveau en attente ou en cours s'occupe déjà des rôles de ce membre.
+        if self.bot.level_up_queue.is_pending(guild.id, user_id):
+            return False
+        current = {role.id for role in member.roles}
+        top_role = guild.me.top_role
+        missing = [
+            role for role_id in set(role_ids) - current
+            if (role := guild.get_role(role_id)) is not None and role < top_role and not role.managed
+        ]
+        if not missing:
+            return False
+        # Ajout rôle par rôle (PUT) : fusionné côté Discord, sans écraser un rôle donné entre-temps.
+        for role in missing:
+            await self._routes.reserve(guild.id)
+            try:
+                await member.add_roles(role, reason="Synchronisation des rôles récompenses de niveau")
+            except (discord.Forbidden, discord.NotFound):
+                return False
+        return True
@@ -0,0 +1,91 @@
+# utils/settings_registry.py
+"""
+Registre partagé des paramètres par serveur (sections "automod_config", "ticket_config"...).
+
+Une seule instance par bot (`bot.settings`), chargée au démarrage depuis la table
+`guild_config` : les cogs lisent et modifient les mêmes dictionnaires en mémoire,
+sans accès disque par interaction. Après une modification, `mark_dirty(guild_id)`
+programme l'écriture (avec debounce) des seuls serveurs modifiés.
+"""
+import asyncio
+import json
+import traceback
+from typing import Dict, Optional, Set
+
+from utils.database import DatabaseManager
+
+DEFAULT_DEBOUNCE = 2.0
+
+
+class SettingsRegistry:
+    def __init__(self, db: DatabaseManager, debounce: float = DEFAULT_DEBOUNCE):
+        self.db = db
+        self.debounce = debounce
+        self._guilds: Dict[int, Dict] = {}
+        self._dirty: Set[int] = set()
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+
+    async def load(self):
+        rows = await self.db.fetch_all("SELECT guild_id, data FROM guild_config")
+        for row in rows:
+            try:
+                self._guilds[row["guild_id"]] = json.loads(row["data"])
+            except json.JSONDecodeError:
+                print(f"AVERTISSEMENT : configuration illisible pour le serveur {row['guild_id']}, ignorée.")
+        print(f"  [+] Paramètres de {len(self._guilds)} serveur(s) chargés.")
+
+    # --- Lecture ---
+    def get(self, guild_id: int) -> Dict:
+        """Paramètres d'un serveur, sans les créer (dictionnaire vide s'il n'en a pas)."""
+        return self._guilds.get(guild_id, {})
+
+    def guild(self, guild_id: int) -> Dict:
+        """Paramètres modifiables d'un serveur (créés si absents)."""
+        return self._guilds.setdefault(guild_id, {})
+
+    def section(self, guild_id: int, name: str, default: Optional[Dict] = None) -> Dict:
+        """Section modifiable (ex. "automod_config"), initialisée avec `default` si absente."""
+        return self.guild(guild_id).setdefault(name, dict(default) if default else {})
+
+    # --- Écriture ---
+    def mark_dirty(self, guild_id: int):
+        """Signale une modification des paramètres du serveur ; écriture après le debounce."""
+        self._dirty.add(guild_id)
+        if self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(self.debounce, self._schedule_flush)
+
+    def _schedule_flush(self):
+        self._flush_handle = None
+        self._flush_task = asyncio.create_task(self.flush())
+
+    async def flush(self):
+        """Écrit maintenant les serveurs modifiés (un seul COMMIT)."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        async with self._flush_lock:
+            if not self._dirty:
+                return
+            dirty, self._dirty = self._dirty, set()
+            try:
+                async with self.db.transaction():
+                    for guild_id in dirty:
+                        await self.db.execute(
+                            """INSERT INTO guild_config (guild_id, data) VALUES (?, ?)
+                               ON CONFLICT(guild_id) DO UPDATE SET data = excluded.data""",
+                            (guild_id, json.dumps(self._guilds.get(guild_id, {})))
+                        )
+            except Exception as e:
+                print(f"ERREUR lors de la sauvegarde des paramètres : {e}"); traceback.print_exc()
+                self._dirty |= dirty
+                if self._flush_handle is None:
+                    self._flush_handle = asyncio.get_running_loop().call_later(self.debounce, self._schedule_flush)
+
+    async def close(self):
+        """Attend l'écriture programmée en cours, puis écrit ce qui reste en attente."""
+        if self._flush_task is not None:
+            await self._flush_task
+            self._flush_task = None
+        await self.flush()
@@ -0,0 +1,148 @@
+# utils/xp_buffer.py
+"""
+Tampon d'XP en mémoire : les gains par message sont appliqués sur une copie locale
+de (xp, level) par membre, le passage de niveau est décidé en mémoire, et les
+membres modifiés sont écrits dans `user_data` par lots (un seul COMMIT) toutes
+les `flush_interval` secondes, ainsi qu'à l'arrêt du bot.
+"""
+import asyncio
+import time
+import traceback
+from contextlib import asynccontextmanager
+from typing import Dict, Optional, Set, Tuple
+
+from utils.database import DatabaseManager
+from utils import level_curve
+
+FLUSH_INTERVAL = 5.0
+# Les membres sans gain depuis ce délai sont retirés du tampon (une fois écrits).
+IDLE_TTL = 900.0
+
+Key = Tuple[int, int]
+
+
+class XpBuffer:
+    def __init__(self, db: DatabaseManager, flush_interval: float = FLUSH_INTERVAL, idle_ttl: float = IDLE_TTL):
+        self.db = db
+        self.flush_interval = flush_interval
+        self.idle_ttl = idle_ttl
+        # (guild_id, user_id) -> [xp, level, dernier gain (monotonic)]
+        self._state: Dict[Key, list] = {}
+        self._dirty: Set[Key] = set()
+        self._flush_lock = asyncio.Lock()
+        # Membres en cours de modification hors du tampon (voir external_write) -> fin de l'écriture
+        self._external: Dict[Key, asyncio.Event] = {}
+        # Incrémenté au début et à la fin de chaque écriture externe : une lecture qui chevauche l'une
+        # ou l'autre a pu lire une valeur périmée et est recommencée.
+        self._external_writes = 0
+        self._task = None
+        self.flushed_rows = 0
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def close(self):
+        """Arrête la tâche de fond puis écrit ce qui reste en attente."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _load(self, key: Key) -> list:
+        while True:
+            entry = self._state.get(key)
+            if entry is not None:
+                return entry
+            pending = self._external.get(key)
+            if pending is not None:
+                await pending.wait()
+                continue
+            generation = self._external_writes
+            row = await self.db.fetch_one(
+                "SELECT xp, level FROM user_data WHERE guild_id = ? AND user_id = ?", key
+            )
+            if generation != self._external_writes:
+                continue
+            # Un autre message du même membre a pu charger l'entrée pendant l'attente.
+            return self._state.setdefault(key, [row["xp"], row["level"], 0.0] if row else [0, 1, 0.0])
+
+    async def add_xp(self, guild_id: int, user_id: int, delta: int) -> Dict:
+        """
+        Ajoute `delta` XP en mémoire. Retourne {"xp", "level", "previous_level", "leveled_up"} ;
+        l'écriture en base se fera au prochain flush.
+        """
+        key = (guild_id, user_id)
+        entry = await self._load(key)
+        start_level = entry[1]
+        level, xp = level_curve.add_xp(entry[1], entry[0], delta)
+        entry[0], entry[1], entry[2] = xp, level, time.monotonic()
+        self._dirty.add(key)
+        return {"xp": xp, "level": level, "previous_level": start_level, "leveled_up": level > start_level}
+
+    def peek(self, guild_id: int, user_id: int) -> Optional[Tuple[int, int]]:
+        """(level, xp) du membre s'il est dans le tampon (plus récent que la base), sinon None."""
+        entry = self._state.get((guild_id, user_id))
+        return (entry[1], entry[0]) if entry is not None else None
+
+    @asynccontextmanager
+    async def external_write(self, guild_id: int, user_id: int):
+        """
+        Encadre une modification de l'XP d'un membre hors du tampon (commandes admin, boutique...).
+        Usage : `async with xp_buffer.external_write(g, u): await db.add_xp(...)`
+        Ses gains en attente sont écrits et sa copie locale oubliée ; jusqu'à la fin du bloc
+        (écriture validée), ses nouveaux gains attendent au lieu de recharger l'ancienne valeur.
+        """
+        key = (guild_id, user_id)
+        while key in self._external:
+            await self._external[key].wait()
+        done = self._external[key] = asyncio.Event()
+        self._external_writes += 1
+        try:
+            await self.flush()  # attend aussi un flush déjà en cours
+            self._state.pop(key, None)
+            yield
+        finally:
+            del self._external[key]
+            self._external_writes += 1
+            done.set()
+
+    async def flush(self):
+        """Écrit tous les membres modifiés en une seule transaction."""
+        async with self._flush_lock:
+            if not self._dirty:
+                return
+            dirty, self._dirty = self._dirty, set()
+            rows = [(g, u, self._state[(g, u)][0], self._state[(g, u)][1]) for g, u in dirty if (g, u) in self._state]
+            try:
+                await self.db.executemany("""
+                    INSERT INTO user_data (guild_id, user_id, xp, level) VALUES (?, ?, ?, ?)
+                    ON CONFLICT(guild_id, user_id) DO UPDATE SET xp = excluded.xp, level = excluded.level
+                """, rows)
+                self.flushed_rows += len(rows)
+            except Exception:
+                # On garde les gains en mémoire pour le prochain essai.
+                self._dirty |= dirty
+                raise
+
+    def _evict_idle(self):
+        cutoff = time.monotonic() - self.idle_ttl
+        for key in [k for k, entry in self._state.items() if entry[2] < cutoff and k not in self._dirty]:
+            del self._state[key]
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+                self._evict_idle()
+            except Exception as e:
+                print(f"ERREUR lors de l'écriture du tampon d'XP : {e}")
+                traceback.print_exc()
+
+    def stats(self) -> Dict[str, int]:
+        return {"cached": len(self._state), "pending": len(self._dirty), "flushed_rows": self.flushed_rows}